@@ -2,28 +2,73 @@
 """
 Script to add total_projects data from chief_investigators_data.json 
 to ci_gender.json based on name matching.
+
+Names are matched exactly on the normalized name first; the rest go through
+the blocked fuzzy matcher in name_matcher.py (e.g. a missing middle initial,
+an extra honorific or accents spelled differently).
 """
 
+import argparse
 import json
 import os
+from columnar import write_columnar
+from name_matcher import DEFAULT_THRESHOLD, NameMatcher
+from result_store import ResultStore
+
+def print_fuzzy_matches(fuzzy_matches, limit=10):
+    """Show a sample of fuzzy matches so they can be spot-checked"""
+    if not fuzzy_matches:
+        return
+    print(f"\nFirst {min(limit, len(fuzzy_matches))} fuzzy matches (please spot-check):")
+    for name, matched_name, score in fuzzy_matches[:limit]:
+        print(f"  - {name} -> {matched_name} ({score:.2f})")
 
-def normalize_name(name):
+def add_project_counts_from_store(chief_investigators_file, store_path, output_file, threshold=DEFAULT_THRESHOLD):
     """
-    Normalize names for better matching by removing common prefixes and 
-    standardizing format
+    Join project counts onto the merged results inside the SQLite result store.
+    
+    Project counts are (re-)imported from chief_investigators_file whenever
+    it changed since the store last imported it; matching is an indexed join
+    on the normalized name, with the fuzzy matcher as a fallback for the rest.
+    
+    The researchers come from the store's tier-1 and tier-2 tables, not from
+    ci_gender.json: in store mode, hand edits belong in the store.
     """
-    # Remove common academic prefixes
-    prefixes = ['Prof ', 'Dr ', 'A/Prof ', 'Assoc Prof ', 'Associate Prof ', 'Hon Prof ', 'Hon A/Prof ']
-    normalized = name
-    for prefix in prefixes:
-        if normalized.startswith(prefix):
-            normalized = normalized[len(prefix):]
-            break
-    
-    # Strip whitespace and convert to lowercase for comparison
-    return normalized.strip().lower()
+    with ResultStore(store_path) as store:
+        stale = os.path.exists(chief_investigators_file) and not store.import_is_current('project_counts',
+                                                                                          chief_investigators_file)
+        if stale or not store.has_project_counts():
+            print("Importing chief investigators data into the result store...")
+            store.import_json('project_counts', chief_investigators_file)
+        
+        print("Joining project counts onto merged results...")
+        researchers = list(store.iter_merged_results(include_project_counts=True))
+        
+        unmatched = [r for r in researchers if r['total_projects'] is None]
+        fuzzy_matches = []
+        if unmatched:
+            print(f"Fuzzy matching {len(unmatched)} names without an exact match...")
+            matcher = NameMatcher(list(store.iter_project_counts()), threshold)
+            for researcher in unmatched:
+                record, method, score = matcher.match(researcher['name'], researcher.get('affiliations'))
+                if method == "fuzzy":
+                    researcher['total_projects'] = record['total_projects']
+                    fuzzy_matches.append((researcher['name'], record['name'], score))
+    
+    print(f"Saving updated data to {output_file}...")
+    with open(output_file, 'w') as f:
+        json.dump({"total_analyzed": len(researchers), "results": researchers}, f, indent=2)
+    print(f"Columnar copy saved to {write_columnar(researchers, output_file)}")
+    
+    no_matches = [r['name'] for r in researchers if r['total_projects'] is None]
+    matches_found = len(researchers) - len(no_matches)
+    print(f"Matches found: {matches_found} ({len(fuzzy_matches)} fuzzy)")
+    print(f"No matches: {len(no_matches)}")
+    print_fuzzy_matches(fuzzy_matches)
+    
+    return matches_found, len(no_matches)
 
-def add_project_counts(chief_investigators_file, ci_gender_file, output_file):
+def add_project_counts(chief_investigators_file, ci_gender_file, output_file, threshold=DEFAULT_THRESHOLD):
     """
     Add total_projects from chief_investigators_data.json to ci_gender.json
     """
@@ -36,42 +81,38 @@ def add_project_counts(chief_investigators_file, ci_gender_file, output_file):
     with open(ci_gender_file, 'r') as f:
         gender_data = json.load(f)
     
-    # Create lookup dictionary from chief investigators data
-    print("Creating name lookup dictionary...")
-    name_to_projects = {}
-    
-    for ci in chief_data['unique_chief_investigators']:
-        normalized_name = normalize_name(ci['name'])
-        name_to_projects[normalized_name] = {
-            'original_name': ci['name'],
-            'total_projects': ci['total_projects'],
-            'affiliations': ci['affiliations']
-        }
+    # Index chief investigators data by exact name and by fuzzy blocking keys
+    print("Creating name index...")
+    matcher = NameMatcher(chief_data['unique_chief_investigators'], threshold)
     
-    print(f"Found {len(name_to_projects)} researchers in chief investigators data")
+    print(f"Found {len(matcher.exact)} researchers in chief investigators data")
     
     # Add project counts to gender data
-    matches_found = 0
+    method_counts = {"exact": 0, "fuzzy": 0, "ambiguous": 0, "none": 0}
+    fuzzy_matches = []
     no_matches = []
     
     print("Matching names and adding project counts...")
     
     for researcher in gender_data['results']:
-        normalized_name = normalize_name(researcher['name'])
+        record, method, score = matcher.match(researcher['name'], researcher.get('affiliations'))
+        method_counts[method] += 1
         
-        if normalized_name in name_to_projects:
-            # Found a match
-            researcher['total_projects'] = name_to_projects[normalized_name]['total_projects']
-            matches_found += 1
+        if record is not None:
+            researcher['total_projects'] = record['total_projects']
+            if method == "fuzzy":
+                fuzzy_matches.append((researcher['name'], record['name'], score))
         else:
-            # No match found
             researcher['total_projects'] = None
             no_matches.append(researcher['name'])
     
+    matches_found = method_counts["exact"] + method_counts["fuzzy"]
+    
     # Save the updated data
     print(f"Saving updated data to {output_file}...")
     with open(output_file, 'w') as f:
         json.dump(gender_data, f, indent=2)
+    columnar_file = write_columnar(gender_data['results'], output_file)
     
     # Print statistics
     print("\n" + "="*60)
@@ -79,9 +120,15 @@ def add_project_counts(chief_investigators_file, ci_gender_file, output_file):
     print("="*60)
     print(f"Total researchers in gender data: {len(gender_data['results'])}")
     print(f"Matches found: {matches_found}")
+    print(f"  Exact: {method_counts['exact']}")
+    print(f"  Fuzzy: {method_counts['fuzzy']}")
     print(f"No matches: {len(no_matches)}")
+    if method_counts["ambiguous"]:
+        print(f"  Ambiguous (several equally close candidates): {method_counts['ambiguous']}")
     print(f"Match rate: {matches_found/len(gender_data['results'])*100:.1f}%")
     
+    print_fuzzy_matches(fuzzy_matches)
+    
     if no_matches:
         print(f"\nFirst 10 researchers without project count matches:")
         for name in no_matches[:10]:
@@ -91,17 +138,32 @@ def add_project_counts(chief_investigators_file, ci_gender_file, output_file):
             print(f"  ... and {len(no_matches) - 10} more")
     
     print(f"\nUpdated data saved to: {output_file}")
+    print(f"Columnar copy for the analytics scripts: {columnar_file}")
     
     return matches_found, len(no_matches)
 
 def main():
     """Main function"""
     
+    parser = argparse.ArgumentParser(description="Add total_projects to the gender analysis data")
+    parser.add_argument('--store', metavar='DB', help="Join inside this SQLite result store instead of loading ci_gender.json")
+    parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum similarity for a fuzzy name match (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+    
     # File paths
     chief_investigators_file = "chief_investigators_data.json"
     ci_gender_file = "ci_gender.json"
     output_file = "ci_gender_with_projects.json"
     
+    if args.store:
+        print(f"🔄 Adding project counts using result store {args.store}...")
+        print(f"ℹ️  Researchers come from the store; {ci_gender_file} is not read in store mode")
+        matches, no_matches = add_project_counts_from_store(chief_investigators_file, args.store, output_file,
+                                                             args.fuzzy_threshold)
+        print(f"\n✅ {matches} researchers have project count information, {no_matches} need manual matching")
+        return
+    
     # Check if input files exist
     if not os.path.exists(chief_investigators_file):
         print(f"❌ Error: {chief_investigators_file} not found!")
@@ -121,7 +183,8 @@ def main():
         matches, no_matches = add_project_counts(
             chief_investigators_file, 
             ci_gender_file, 
-            output_file
+            output_file,
+            args.fuzzy_threshold
         )
         
         print("\n✅ Successfully added project counts!")
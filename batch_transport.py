@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Pluggable transports for submitting JSONL batch request files.
+
+A transport has three methods:
+- submit(batch_file) -> batch_id
+- poll(batch_id) -> status ("completed", "failed", "expired", "cancelled" or in progress)
+- fetch_results(batch_id) -> list of output lines (JSON strings)
+
+OpenAIBatchTransport talks to the OpenAI Batch API. LocalBatchTransport is a
+stand-in that answers every request with a local handler, so the batch
+workflow can be exercised without network access or cost.
+"""
+
+import json
+import time
+import uuid
+from typing import Callable, Dict, List
+
+# Batch statuses after which polling stops
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def batch_request_line(custom_id: str, body: Dict, url: str = "/v1/chat/completions") -> str:
+    """One line of a batch request file"""
+    return json.dumps({"custom_id": custom_id, "method": "POST", "url": url, "body": body}, ensure_ascii=False)
+
+class OpenAIBatchTransport:
+    """Submit batch files through the OpenAI Files and Batches endpoints"""
+
+    def __init__(self, client, completion_window: str = "24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, batch_file: str) -> str:
+        with open(batch_file, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def fetch_results(self, batch_id: str) -> List[str]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        # Requests that failed validation end up in the error file rather than the output file
+        for file_id in (batch.output_file_id, getattr(batch, 'error_file_id', None)):
+            if file_id:
+                lines.extend(line for line in self.client.files.content(file_id).text.splitlines() if line.strip())
+        return lines
+
+class LocalBatchTransport:
+    """
+    Local stand-in for the Batch API.
+
+    handler receives each request body and returns either the assistant's
+    message text or raises to simulate a failed request. Batches complete
+    after poll_count_until_complete polls.
+    """
+
+    def __init__(self, handler: Callable[[Dict], str], poll_count_until_complete: int = 1):
+        self.handler = handler
+        self.poll_count_until_complete = poll_count_until_complete
+        self._batches = {}
+
+    def submit(self, batch_file: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        with open(batch_file, 'r', encoding='utf-8') as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        self._batches[batch_id] = {"requests": requests, "polls": 0}
+        return batch_id
+
+    def poll(self, batch_id: str) -> str:
+        batch = self._batches[batch_id]
+        batch["polls"] += 1
+        return "completed" if batch["polls"] >= self.poll_count_until_complete else "in_progress"
+
+    def fetch_results(self, batch_id: str) -> List[str]:
+        lines = []
+        for request in self._batches[batch_id]["requests"]:
+            line = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+            try:
+                content = self.handler(request["body"])
+                line["response"] = {
+                    "status_code": 200,
+                    "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+                }
+                line["error"] = None
+            except Exception as e:
+                line["response"] = None
+                line["error"] = {"code": "local_error", "message": str(e)}
+            lines.append(json.dumps(line, ensure_ascii=False))
+        return lines
+
+def wait_for_batch(transport, batch_id: str, poll_interval: float = 60) -> str:
+    """Poll until the batch reaches a terminal status and return it"""
+    while True:
+        status = transport.poll(batch_id)
+        print(f"Batch {batch_id}: {status}")
+        if status in TERMINAL_STATUSES:
+            return status
+        time.sleep(poll_interval)
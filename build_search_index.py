@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Build the static search index used by visualizer.html.
+
+Instead of downloading every researcher and filtering them on each
+keystroke, the page loads:
+- search_index/manifest.json: totals and the names of the files below
+- index.<hash>.json: a sorted term list with delta-encoded posting lists
+  (tokens of names, affiliations and research areas) plus per-researcher
+  gender/confidence codes, so filters and prefix search run on the index
+- shard-NNN.<hash>.json: the researcher records, shard_size per file, in
+  the same order as the index's document ids
+
+Index and shard file names carry a content hash, so they can be cached
+forever and only change when their content does. Files from earlier builds
+are removed once the new manifest is in place. Without search_index/ the
+page falls back to loading the full results JSON.
+
+Usage:
+    python build_search_index.py
+    python build_search_index.py --input ci_gender.json --shard-size 100
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List
+from ci_reader import RESULTS_KEY, iter_records
+from name_utils import fold_diacritics
+
+DEFAULT_INPUT = "ci_short_search_results.json"
+DEFAULT_OUTPUT_DIR = "search_index"
+DEFAULT_SHARD_SIZE = 50
+MANIFEST_FILE = "manifest.json"
+INDEX_FORMAT_VERSION = 1
+
+# Fields searched; the summary is left out to keep the index small
+INDEXED_FIELDS = ('name', 'affiliations', 'research_areas')
+
+# Must match tokenize() in visualizer.html
+STOPWORDS = {'and', 'of', 'the', 'for', 'in', 'at', 'on', 'to'}
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ASCII tokens of text, without one-letter tokens and stopwords"""
+    return [token for token in _NON_ALNUM.split(fold_diacritics(text).lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+def record_tokens(record: Dict) -> set:
+    tokens = set()
+    for field in INDEXED_FIELDS:
+        value = record.get(field) or []
+        for text in ([value] if isinstance(value, str) else value):
+            tokens.update(tokenize(text))
+    return tokens
+
+def delta_encode(ids: List[int]) -> List[int]:
+    """[3, 7, 8] -> [3, 4, 1]; posting lists are sorted, so the gaps are small numbers"""
+    return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+
+def write_hashed(output_dir: str, prefix: str, payload: object) -> str:
+    """Write payload as compact JSON under a content-hashed name and return the name"""
+    data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    name = f"{prefix}.{hashlib.sha256(data).hexdigest()[:16]}.json"
+    path = os.path.join(output_dir, name)
+    if not os.path.exists(path):
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    return name
+
+def build_search_index(input_file: str = DEFAULT_INPUT, output_dir: str = DEFAULT_OUTPUT_DIR,
+                       shard_size: int = DEFAULT_SHARD_SIZE) -> Dict:
+    """Build the index and shards for input_file; returns the manifest"""
+    os.makedirs(output_dir, exist_ok=True)
+
+    postings: Dict[str, List[int]] = {}
+    categories = {'gender': [], 'confidence': []}
+    codes = {'gender': [], 'confidence': []}
+    shards = []
+    shard = []
+    doc_id = 0
+
+    # Records are streamed: only the current shard and the postings are held in memory
+    for record in iter_records(input_file, RESULTS_KEY):
+        for token in record_tokens(record):
+            postings.setdefault(token, []).append(doc_id)
+        for field in codes:
+            value = record.get(field, 'unknown')
+            if value not in categories[field]:
+                categories[field].append(value)
+            codes[field].append(categories[field].index(value))
+
+        shard.append(record)
+        doc_id += 1
+        if len(shard) == shard_size:
+            shards.append(write_hashed(output_dir, f"shard-{len(shards):03d}", shard))
+            shard = []
+    if shard:
+        shards.append(write_hashed(output_dir, f"shard-{len(shards):03d}", shard))
+
+    terms = sorted(postings)
+    index = {
+        "version": INDEX_FORMAT_VERSION,
+        "total": doc_id,
+        "terms": terms,
+        "postings": [delta_encode(postings[term]) for term in terms],
+        "categories": categories,
+        "codes": codes,
+    }
+    index_file = write_hashed(output_dir, "index", index)
+
+    gender_counts = {value: codes['gender'].count(i) for i, value in enumerate(categories['gender'])}
+    manifest = {
+        "version": INDEX_FORMAT_VERSION,
+        "source": os.path.basename(input_file),
+        "total": doc_id,
+        "gender_counts": gender_counts,
+        "shard_size": shard_size,
+        "index": index_file,
+        "shards": shards,
+        "stopwords": sorted(STOPWORDS),
+    }
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    # Drop files no longer referenced (after the new manifest is live)
+    referenced = set(shards) | {index_file, MANIFEST_FILE}
+    for name in os.listdir(output_dir):
+        if name not in referenced and name.endswith('.json'):
+            os.remove(os.path.join(output_dir, name))
+
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sharded search index for visualizer.html")
+    parser.add_argument('--input', default=DEFAULT_INPUT, help=f"Results JSON or JSONL (default: {DEFAULT_INPUT})")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help=f"Default: {DEFAULT_OUTPUT_DIR}")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f"Researchers per shard (default: {DEFAULT_SHARD_SIZE})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Error: {args.input} not found!")
+        raise SystemExit(1)
+
+    manifest = build_search_index(args.input, args.output_dir, args.shard_size)
+    index_size = os.path.getsize(os.path.join(args.output_dir, manifest['index']))
+    shard_sizes = [os.path.getsize(os.path.join(args.output_dir, name)) for name in manifest['shards']]
+    print(f"✅ Indexed {manifest['total']} researchers into {args.output_dir}/")
+    print(f"   Index: {manifest['index']} ({index_size / 1024:.0f} KB)")
+    print(f"   Shards: {len(shard_sizes)} x ~{(sum(shard_sizes) / max(1, len(shard_sizes))) / 1024:.0f} KB")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL checkpoint journal for the analyzers.
+
+Each finished result is appended as one JSON line instead of rewriting the
+whole cache, so checkpoint cost per record stays constant. Lines are flushed
+immediately and fsync'd in groups (every sync_every records or sync_interval
+seconds, whichever comes first). On startup the journal is replayed; at the
+end it is compacted into the usual {"total_analyzed", "results"} file.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List
+
+def journal_path(cache_file: str) -> str:
+    """Journal file used for a given cache file name (e.g. foo_cache.json -> foo_cache.jsonl)"""
+    if cache_file.endswith('.jsonl'):
+        return cache_file
+    return os.path.splitext(cache_file)[0] + '.jsonl'
+
+def read_journal(path: str) -> List[Dict]:
+    """
+    Read every complete record from a journal.
+
+    A torn final line (from a crash mid-append) is ignored rather than
+    treated as corruption; everything before it is still recovered.
+    """
+    records = []
+    if not os.path.exists(path):
+        return records
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping unreadable journal line {line_number} in {path}")
+    return records
+
+def write_results_file(output_file: str, results: List[Dict]):
+    """Atomically write results in the standard {"total_analyzed", "results"} layout"""
+    output_data = {"total_analyzed": len(results), "results": results}
+    temp_file = output_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(output_data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, output_file)
+
+class CheckpointJournal:
+    """Append-only result journal with group-committed fsyncs"""
+
+    def __init__(self, path: str, sync_every: int = 32, sync_interval: float = 5.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def replay(self) -> List[Dict]:
+        """Return every record already in the journal"""
+        records = read_journal(self.path)
+        if records:
+            print(f"Replayed {len(records)} results from journal {self.path}")
+        return records
+
+    def append(self, record: Dict):
+        """Append one record; fsync once the current group is full or old enough"""
+        if self._file is None:
+            self._open_for_append()
+
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._pending += 1
+
+        if self._pending >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def _open_for_append(self):
+        # Terminate a torn final line left by a crash so the next record starts cleanly
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        else:
+            needs_newline = False
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if needs_newline:
+            self._file.write('\n')
+
+    def sync(self):
+        """Force pending records to disk"""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def compact(self, output_file: str, results: List[Dict]):
+        """Sync the journal and write the full results file in one pass"""
+        self.sync()
+        write_results_file(output_file, results)
+
+    def remove(self):
+        """Delete the journal once its contents have been compacted"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+            print(f"Journal file {self.path} cleaned up")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
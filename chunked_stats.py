@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Out-of-core version of the CSV export and gender statistics.
+
+Results are read in fixed-size chunks and never held in memory all at once:
+- JSONL files are split into byte ranges of chunk_size lines, which the
+  workers read themselves
+- columnar copies (columnar.py) are split into row ranges, read per column
+- pretty-printed {"results": [...]} JSON is streamed (ci_reader) and sent
+  to the workers chunk by chunk
+
+Each worker builds the partial crosstabs of its chunk (gender_stats) and, if
+wanted, the chunk's rows of the results CSV. Partials are merged in chunk
+order, so first-seen ordering (and therefore every table) comes out exactly
+as convert_results_to_csv.py and print_summary_statistics produce it.
+
+Usage:
+    python chunked_stats.py ci_short_search_results.jsonl
+    python chunked_stats.py ci_gender_with_projects.json --project-summary --statistics-only
+    python chunked_stats.py huge.jsonl --chunk-size 100000 --processes 8
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from ci_reader import JSONL_EXTENSIONS, RESULTS_KEY, iter_records
+from columnar import SCHEMA, ColumnarDataset, find_columnar
+from convert_results_to_csv import FIELDNAMES, OUTPUT_DIR, RESULTS_CSV, STATISTICS_CSV, csv_row, write_statistics_csv
+from gender_stats import GenderTable, print_summary_statistics
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Columns the statistics need when reading a columnar copy
+STATISTICS_COLUMNS = ['gender', 'confidence', 'affiliations', 'total_projects', 'search_successful',
+                      'web_sources_found']
+
+# Tables that are merged by adding counts
+PARTIAL_TABLES = ('gender_counts', 'confidence_counts', 'by_projects', 'by_confidence', 'by_institution')
+PARTIAL_TOTALS = ('total', 'successful_searches', 'total_sources')
+
+# Chunk sources
+
+def iter_jsonl_ranges(path: str, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Byte ranges of path holding chunk_size records each"""
+    start = position = count = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            position += len(line)
+            if line.strip():
+                count += 1
+            if count == chunk_size:
+                yield start, position
+                start, count = position, 0
+    if count:
+        yield start, position
+
+def iter_tasks(input_file: str, chunk_size: int, with_rows: bool) -> Iterator[Tuple]:
+    """Chunk descriptions for the workers: ('jsonl'|'columnar', path, start, stop) or ('records', records)"""
+    if input_file.endswith(JSONL_EXTENSIONS):
+        for start, stop in iter_jsonl_ranges(input_file, chunk_size):
+            yield ('jsonl', input_file, start, stop)
+        return
+
+    if input_file.endswith(('.parquet', '.columns')):
+        dataset = ColumnarDataset(input_file)
+    else:
+        dataset = find_columnar(input_file)
+    if dataset is not None:
+        columns = list(SCHEMA) if with_rows else STATISTICS_COLUMNS
+        for start in range(0, dataset.num_rows, chunk_size):
+            yield ('columnar', dataset.path, start, min(start + chunk_size, dataset.num_rows), columns)
+        return
+
+    chunk = []
+    for record in iter_records(input_file, RESULTS_KEY):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield ('records', chunk)
+            chunk = []
+    if chunk:
+        yield ('records', chunk)
+
+def read_chunk(task: Tuple) -> List[Dict]:
+    kind = task[0]
+    if kind == 'records':
+        return task[1]
+    if kind == 'jsonl':
+        _, path, start, stop = task
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(stop - start)
+        return [json.loads(line) for line in data.splitlines() if line.strip()]
+    _, path, start, stop, columns = task
+    return ColumnarDataset(path).records(columns, start, stop)
+
+# Map and reduce
+
+def map_chunk(task: Tuple, with_rows: bool) -> Tuple[Dict, Optional[str]]:
+    """Partial crosstabs of one chunk, plus its results CSV rows if with_rows"""
+    records = read_chunk(task)
+    summary = GenderTable.from_records(records).summary()
+    partial = {key: summary[key] for key in PARTIAL_TABLES + PARTIAL_TOTALS}
+
+    rows = None
+    if with_rows:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+        for entry in records:
+            writer.writerow(csv_row(entry))
+        rows = buffer.getvalue()
+    return partial, rows
+
+def empty_partial() -> Dict:
+    partial = {key: {} for key in PARTIAL_TABLES}
+    partial.update({key: 0 for key in PARTIAL_TOTALS})
+    return partial
+
+def _add_counts(into: Dict, counts: Dict):
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            _add_counts(into.setdefault(key, {}), value)
+        else:
+            into[key] = into.get(key, 0) + value
+
+def merge_partial(merged: Dict, partial: Dict):
+    """Add a chunk's partial into merged; chunks must be merged in order to keep first-seen ordering"""
+    for key in PARTIAL_TABLES:
+        _add_counts(merged[key], partial[key])
+    for key in PARTIAL_TOTALS:
+        merged[key] += partial[key]
+
+def aggregate(input_file: str, chunk_size: int = DEFAULT_CHUNK_SIZE, processes: int = os.cpu_count() or 1,
+              rows_file: Optional[str] = None) -> Dict:
+    """
+    Merged statistics of input_file, computed chunk by chunk in a process
+    pool. If rows_file is given, the results CSV is written to it as well.
+    At most 2 x processes chunks are in flight or waiting to be merged.
+    """
+    merged = empty_partial()
+    rows_out = None
+    if rows_file:
+        rows_out = open(rows_file, 'w', newline='', encoding='utf-8')
+        csv.DictWriter(rows_out, fieldnames=FIELDNAMES).writeheader()
+
+    def merge(partial, rows):
+        merge_partial(merged, partial)
+        if rows_out is not None:
+            rows_out.write(rows)
+
+    try:
+        tasks = iter_tasks(input_file, chunk_size, with_rows=rows_out is not None)
+        if processes <= 1:
+            for task in tasks:
+                merge(*map_chunk(task, rows_out is not None))
+            return merged
+
+        window = 2 * processes
+        pending = {}
+        finished = {}
+        next_index = 0
+
+        def collect():
+            nonlocal next_index
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+            while next_index in finished:
+                merge(*finished.pop(next_index))
+                next_index += 1
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for index, task in enumerate(tasks):
+                pending[executor.submit(map_chunk, task, rows_out is not None)] = index
+                while len(pending) + len(finished) >= window:
+                    collect()
+            while pending:
+                collect()
+        return merged
+    finally:
+        if rows_out is not None:
+            rows_out.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked, multi-process CSV export and gender statistics")
+    parser.add_argument('input', help="Results file: JSONL, a columnar copy (.parquet / .columns), or JSON")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Records per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help=f"Where the CSV files go (default: {OUTPUT_DIR})")
+    parser.add_argument('--statistics-only', action='store_true', help="Skip writing the per-researcher results CSV")
+    parser.add_argument('--project-summary', action='store_true',
+                        help="Print the gender by project count table (needs total_projects)")
+    args = parser.parse_args()
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    rows_file = None if args.statistics_only else os.path.join(args.output_dir, RESULTS_CSV)
+
+    start = time.time()
+    stats = aggregate(args.input, args.chunk_size, args.processes, rows_file)
+    if rows_file:
+        print(f"Converted {stats['total']} entries to {rows_file}")
+
+    summary_file = os.path.join(args.output_dir, STATISTICS_CSV)
+    write_statistics_csv(summary_file, stats['total'], stats['gender_counts'], stats['confidence_counts'],
+                         stats['by_institution'])
+    print(f"Summary statistics saved to {summary_file}")
+
+    if args.project_summary:
+        print_summary_statistics(stats['by_projects'])
+
+    print(f"\n✅ Aggregated {stats['total']} records in {time.time() - start:.1f}s "
+          f"({args.processes} processes, chunks of {args.chunk_size})")
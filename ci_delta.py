@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Delta classification of a new CI list against existing tier-1 results.
+
+CIs are matched on a stable identity key (the normalized name used across the
+pipeline) and compared on their affiliations, so each one is classed as:
+- new:       no existing result
+- changed:   affiliations differ, or the existing analysis failed
+- unchanged: existing result is carried forward as-is
+Existing results whose CI no longer appears are reported as removed.
+
+Usage:
+    python ci_delta.py ci_full.json ci_short_search_results.json
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+from name_utils import normalize_name
+from retry_policy import is_failed
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+def identity_key(name: str) -> str:
+    """Stable identity of a CI across grant rounds"""
+    return normalize_name(name)
+
+def affiliation_fingerprint(affiliations: List[str]) -> Tuple[str, ...]:
+    """Affiliations compared regardless of order, case and surrounding whitespace"""
+    return tuple(sorted({a.strip().lower() for a in affiliations or [] if a.strip()}))
+
+class CIDelta:
+    """Classifies CIs one at a time against an index of existing results and tallies the outcome"""
+
+    def __init__(self, existing_results: Iterable[Dict]):
+        self.previous = {identity_key(r['name']): r for r in existing_results}
+        self.seen = set()
+        self.names = {NEW: [], CHANGED: [], UNCHANGED: []}
+        # Existing results matched under a different spelling (e.g. 'Dr X' -> 'Prof X')
+        self.renamed = []
+
+    def classify(self, ci: Dict) -> Tuple[str, Optional[Dict]]:
+        """Return (status, existing result or None) for one CI from the new list"""
+        key = identity_key(ci['name'])
+        self.seen.add(key)
+        previous = self.previous.get(key)
+
+        if previous is None:
+            status = NEW
+        elif is_failed(previous):
+            status = CHANGED
+        elif affiliation_fingerprint(previous.get('affiliations')) != affiliation_fingerprint(ci.get('affiliations')):
+            status = CHANGED
+        else:
+            status = UNCHANGED
+
+        self.names[status].append(ci['name'])
+        if previous is not None and previous['name'] != ci['name']:
+            self.renamed.append(previous['name'])
+        return status, previous
+
+    def removed(self) -> List[str]:
+        """Existing results whose CI was not in the new list (valid once every CI has been classified)"""
+        return [r['name'] for key, r in self.previous.items() if key not in self.seen]
+
+    def summary(self) -> Dict[str, int]:
+        counts = {status: len(names) for status, names in self.names.items()}
+        counts[REMOVED] = len(self.removed())
+        return counts
+
+    def print_summary(self):
+        counts = self.summary()
+        print("\nDelta against existing results:")
+        for status in (NEW, CHANGED, UNCHANGED, REMOVED):
+            print(f"  {status}: {counts[status]}")
+
+    def write_report(self, path: str):
+        report = {"summary": self.summary(), **self.names, REMOVED: self.removed()}
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Delta report saved to {path}")
+
+def delta_report_path(output_file: str) -> str:
+    """Report written next to an output file (foo.json -> foo_delta.json)"""
+    return os.path.splitext(output_file)[0] + '_delta.json'
+
+if __name__ == "__main__":
+    from ci_reader import iter_cis
+
+    if len(sys.argv) != 3:
+        print("Usage: python ci_delta.py NEW_CI_LIST EXISTING_RESULTS")
+        sys.exit(1)
+
+    with open(sys.argv[2], 'r') as f:
+        delta = CIDelta(json.load(f).get('results', []))
+    for ci in iter_cis(sys.argv[1]):
+        delta.classify(ci)
+
+    delta.print_summary()
+    cost_share = (len(delta.names[NEW]) + len(delta.names[CHANGED])) / max(1, len(delta.seen)) * 100
+    print(f"\nA delta run would send {cost_share:.1f}% of the CIs to the search tier")
@@ -1,13 +1,41 @@
 #!/usr/bin/env python3
+import argparse
 import json
-import time
 import os
-from typing import Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional
 from openai import OpenAI
+from ci_reader import iter_cis
+from ci_delta import UNCHANGED, CIDelta, affiliation_fingerprint, delta_report_path
+from gender_stats import GenderTable
+from checkpoint_journal import CheckpointJournal, journal_path, write_results_file
+from result_store import ResultStore
+from rate_limiter import get_rate_limiter, rate_limited_completion
+from retry_policy import FAILED_FIELD, get_circuit_breaker, is_failed, write_failed_records
+from response_cache import get_response_cache, make_key
+from progress_metrics import get_metrics_stream
 
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
+SEARCH_MODEL = "gpt-4o-mini-search-preview"
+
+# Shared adaptive limiter; starts at the old 2-second pacing and tunes itself
+# from the API's rate-limit headers and 429 responses
+rate_limiter = get_rate_limiter(SEARCH_MODEL, requests_per_second=0.5)
+
+# Pauses every worker during an outage instead of failing the whole queue
+circuit_breaker = get_circuit_breaker(SEARCH_MODEL)
+
+# Persistent response cache shared with the name-based analyzer
+response_cache = get_response_cache()
+
+# Live progress telemetry tailed by monitor_progress.py
+metrics = get_metrics_stream()
+
+# Number of CI lookups kept in flight at once
+DEFAULT_MAX_WORKERS = 4
+
 def analyze_ci_profile_with_search_model(name: str, affiliations: List[str]) -> Dict:
     """
     Analyze a CI profile using OpenAI's search-enabled models
@@ -39,21 +67,29 @@ def analyze_ci_profile_with_search_model(name: str, affiliations: List[str]) ->
     Return ONLY valid JSON, no other text.
     """
     
+    request = {
+        "model": SEARCH_MODEL,  # Using search-enabled model
+        "messages": [
+            {"role": "system", "content": "You are an academic profile analyzer with web search capabilities. Always be honest about what you find vs. what you don't find. Return only valid JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": 400
+    }
+    cache_key = make_key(**request)
+    
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-search-preview",  # Using search-enabled model
-            messages=[
-                {"role": "system", "content": "You are an academic profile analyzer with web search capabilities. Always be honest about what you find vs. what you don't find. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=400
-        )
+        result_text = response_cache.get(cache_key)
+        from_cache = result_text is not None
         
-        result_text = response.choices[0].message.content.strip()
+        if not from_cache:
+            response = rate_limited_completion(client, rate_limiter, breaker=circuit_breaker, metrics=metrics, **request)
+            result_text = response.choices[0].message.content.strip()
         
         # Try to parse JSON
         try:
             result = json.loads(result_text)
+            if not from_cache:
+                response_cache.put(cache_key, SEARCH_MODEL, result_text)
             return result
         except json.JSONDecodeError:
             # Try to extract JSON from the response
@@ -62,6 +98,8 @@ def analyze_ci_profile_with_search_model(name: str, affiliations: List[str]) ->
                 end = result_text.rfind('}') + 1
                 try:
                     result = json.loads(result_text[start:end])
+                    if not from_cache:
+                        response_cache.put(cache_key, SEARCH_MODEL, result_text)
                     return result
                 except json.JSONDecodeError:
                     pass
@@ -74,7 +112,8 @@ def analyze_ci_profile_with_search_model(name: str, affiliations: List[str]) ->
                 "research_areas": ["Unknown"],
                 "web_sources_found": 0,
                 "search_successful": False,
-                "search_notes": "JSON parsing failed"
+                "search_notes": "JSON parsing failed",
+                FAILED_FIELD: "JSON parsing failed"
             }
         
     except Exception as e:
@@ -86,7 +125,8 @@ def analyze_ci_profile_with_search_model(name: str, affiliations: List[str]) ->
             "research_areas": ["Unknown"],
             "web_sources_found": 0,
             "search_successful": False,
-            "search_notes": f"API error: {str(e)}"
+            "search_notes": f"API error: {str(e)}",
+            FAILED_FIELD: f"API error: {str(e)}"
         }
 
 def load_cache(cache_file: str) -> Dict:
@@ -111,92 +151,250 @@ def save_cache(cache_file: str, data: Dict):
     except Exception as e:
         print(f"Error saving cache: {e}")
 
+def load_checkpoint(cache_file: str, journal: Optional[CheckpointJournal]) -> Dict:
+    """Load results from the JSON cache plus, in journal mode, everything replayed from the journal"""
+    cache_data = load_cache(cache_file)
+    if journal is not None:
+        cache_data['results'] = cache_data.get('results', []) + journal.replay()
+        cache_data['total_analyzed'] = len(cache_data['results'])
+    return cache_data
+
 def get_processed_names(cache_data: Dict) -> set:
-    """Get set of already processed names from cache"""
-    return {result['name'] for result in cache_data.get('results', [])}
+    """Get set of already processed names from cache (failed analyses don't count)"""
+    return {result['name'] for result in cache_data.get('results', []) if not is_failed(result)}
+
+def build_result_entry(ci: Dict, analysis: Dict) -> Dict:
+    """Create the result entry stored for a single CI"""
+    entry = {
+        "name": ci['name'],
+        "affiliations": ci['affiliations'],
+        "gender": analysis.get('gender', 'unknown'),
+        "summary": analysis.get('summary', ''),
+        "confidence": analysis.get('confidence', 'low'),
+        "research_areas": analysis.get('research_areas', []),
+        "web_sources_found": analysis.get('web_sources_found', 0),
+        "search_successful": analysis.get('search_successful', False),
+        "search_notes": analysis.get('search_notes', '')
+    }
+    if FAILED_FIELD in analysis:
+        entry[FAILED_FIELD] = analysis[FAILED_FIELD]
+    return entry
+
+def analyze_ci(ci: Dict) -> Dict:
+    """Analyze a single CI and build its result entry (runs inside a worker thread)"""
+    with metrics.analyzing():
+        analysis = analyze_ci_profile_with_search_model(ci['name'], ci['affiliations'])
+    return build_result_entry(ci, analysis)
+
+def iter_completed_analyses(cis: Iterable[Dict], executor: ThreadPoolExecutor, max_pending: int) -> Iterator[Dict]:
+    """
+    Submit CIs to the pool as they are drawn from cis and yield result entries
+    in completion order. At most max_pending CIs are in flight, so CIs are
+    consumed (and the input parsed) only as fast as they are analyzed.
+    
+    A worker that raises yields a failed entry for its CI instead of
+    aborting the run, so results from the other workers are kept.
+    """
+    pending = {}
+    
+    def completed(done) -> Iterator[Dict]:
+        for future in done:
+            ci = pending.pop(future)
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"Worker failed for {ci['name']}: {e}")
+                entry = build_result_entry(ci, {"search_notes": f"Worker error: {e}", FAILED_FIELD: f"Worker error: {e}"})
+            yield entry
+    
+    for ci in cis:
+        pending[executor.submit(analyze_ci, ci)] = ci
+        while len(pending) >= max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from completed(done)
+    
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        yield from completed(done)
 
-def process_cis_with_search_model(input_file: str, output_file: str, cache_file: str = "ci_search_model_cache.json"):
-    """Process all CIs with search-enabled OpenAI models"""
+def process_cis_with_search_model(input_file: str, output_file: str, cache_file: str = "ci_search_model_cache.json",
+                                  max_workers: int = DEFAULT_MAX_WORKERS, checkpoint_mode: str = "journal",
+                                  store_path: Optional[str] = None, delta: bool = False):
+    """
+    Process all CIs with search-enabled OpenAI models.
+    
+    CIs are streamed from input_file (a bare list, {"unique_chief_investigators": [...]}
+    or JSONL) and submitted as they are parsed. Up to max_workers requests are
+    kept in flight at once; results are appended to the cache and output file
+    in completion order. Request pacing is left to the shared adaptive rate limiter.
     
-    # Load input data
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    checkpoint_mode="journal" appends each result to a JSONL journal next to
+    cache_file and writes output_file once at the end; "json" rewrites the
+    whole cache and output file after every result.
     
-    # Handle different input formats
-    if isinstance(data, list):
-        cis_list = data
-    elif isinstance(data, dict) and 'unique_chief_investigators' in data:
-        cis_list = data['unique_chief_investigators']
+    With store_path set, results are written transactionally to the SQLite
+    result store instead, which also provides the resume check; output_file
+    is exported from it at the end.
+    
+    delta=True diffs input_file against the existing results (output_file,
+    or the store) by identity key: only new CIs and CIs whose affiliations
+    changed are analyzed, unchanged results are carried forward untouched
+    and results for CIs no longer in the list are dropped. A report is
+    written next to output_file.
+    """
+    
+    store = ResultStore(store_path) if store_path else None
+    journal = None
+    
+    ci_delta = None
+    if delta:
+        if store is not None:
+            existing_results = list(store.iter_search_results())
+        else:
+            existing_results = load_cache(output_file).get('results', []) if os.path.exists(output_file) else []
+        ci_delta = CIDelta(existing_results)
+        print(f"Delta mode: comparing against {len(existing_results)} existing results")
+    
+    if store is None:
+        # Load existing cache
+        if checkpoint_mode == "journal":
+            journal = CheckpointJournal(journal_path(cache_file))
+        cache_data = load_checkpoint(cache_file, journal)
+        processed_names = get_processed_names(cache_data)
+        # Failed analyses are dropped here and redone below
+        results = [r for r in cache_data.get('results', []) if not is_failed(r)]
+        print(f"Already processed: {len(processed_names)}")
     else:
-        raise ValueError("Unsupported data format")
+        results = []
     
-    # Load existing cache
-    cache_data = load_cache(cache_file)
-    processed_names = get_processed_names(cache_data)
-    results = cache_data.get('results', [])
+    redone = {}
+    if ci_delta is not None and store is None:
+        # A delta rebuilds the results from the input; the checkpoint only
+        # supplies CIs already redone by an interrupted delta run
+        redone = {r['name']: r for r in results}
+        results = []
+    
+    print(f"Streaming CIs from {input_file} to search-enabled model ({SEARCH_MODEL}) using {max_workers} worker(s)...")
+    
+    total_cis = 0
+    submitted = 0
+    
+    def cis_to_analyze():
+        nonlocal total_cis, submitted
+        for ci in iter_cis(input_file):
+            total_cis += 1
+            
+            if ci_delta is not None:
+                status, previous = ci_delta.classify(ci)
+                if store is not None:
+                    store.add_cis([ci])
+                if status == UNCHANGED:
+                    # Carried forward untouched, apart from a changed title or spelling of the name
+                    if previous['name'] != ci['name']:
+                        previous = dict(previous, name=ci['name'])
+                        if store is not None:
+                            store.save_search_result(previous)
+                    results.append(previous)
+                    continue
+                checkpointed = redone.get(ci['name'])
+                if checkpointed is not None and (affiliation_fingerprint(checkpointed.get('affiliations'))
+                                                 == affiliation_fingerprint(ci.get('affiliations'))):
+                    # Already redone earlier in this (interrupted) delta run
+                    results.append(checkpointed)
+                    continue
+            elif store is not None:
+                # Resume from the store with indexed per-CI lookups
+                store.add_cis([ci])
+                existing = store.get_search_result(ci['name'])
+                if existing is not None and not is_failed(existing):
+                    results.append(existing)
+                    continue
+            elif ci['name'] in processed_names:
+                continue
+            
+            submitted += 1
+            yield ci
+        # The input is only counted as it streams past; the ETA starts once it has been read
+        metrics.set_total(total_cis)
     
-    total_cis = len(cis_list)
-    remaining_cis = [ci for ci in cis_list if ci['name'] not in processed_names]
+    metrics.start_run('tier1_search', total=None, done=len(results))
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    finished = False
+    try:
+        # Bounded in-flight window: CIs are submitted while the input is still
+        # being parsed, and memory stays flat however large the input file is
+        completed = iter_completed_analyses(cis_to_analyze(), executor, max_pending=max_workers * 2)
+        for i, result_entry in enumerate(completed, 1):
+            print(f"Completed {i}/{submitted} submitted: {result_entry['name']}")
+            
+            # Workers only analyze; results are recorded here on the main thread
+            results.append(result_entry)
+            metrics.record(result_entry, done=len(results), failed=is_failed(result_entry))
+            
+            if store is not None:
+                store.save_search_result(result_entry)
+            elif journal is not None:
+                # Constant-cost checkpoint: one appended line per result
+                journal.append(result_entry)
+            else:
+                # Save progress frequently
+                cache_data = {"total_analyzed": len(results), "results": results}
+                save_cache(cache_file, cache_data)
+                
+                # Also save to final output (a delta keeps the existing output as its baseline until it finishes)
+                if ci_delta is None:
+                    output_data = {"total_analyzed": len(results), "results": results}
+                    with open(output_file, 'w') as f:
+                        json.dump(output_data, f, indent=2)
+        finished = True
+    except KeyboardInterrupt:
+        # Drop queued CIs so the run stops promptly; the cache lets us resume later
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"\nInterrupted. {len(results)} results saved to cache; re-run to resume.")
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        metrics.end_run()
+        if store is not None:
+            write_results_file(output_file, results)
+            store.close()
+        elif journal is not None:
+            # Compact whatever we have into the regular output file; an
+            # interrupted delta leaves the output alone so a re-run diffs against it again
+            if finished or ci_delta is None:
+                journal.compact(output_file, results)
+            journal.close()
     
     print(f"Total CIs: {total_cis}")
-    print(f"Already processed: {len(processed_names)}")
-    print(f"Remaining to process: {len(remaining_cis)}")
+    print(f"Processed this run: {submitted}")
+    if ci_delta is not None:
+        ci_delta.print_summary()
+        ci_delta.write_report(delta_report_path(output_file))
+        removed = ci_delta.removed()
+        if store is not None and (removed or ci_delta.renamed):
+            with ResultStore(store_path) as cleanup_store:
+                # Renamed CIs now live under their new name
+                cleanup_store.delete_search_results(removed + ci_delta.renamed)
+            print(f"Removed {len(removed)} results for CIs no longer in {input_file} from the store")
+        elif store is None and journal is None:
+            write_results_file(output_file, results)
+    write_failed_records(output_file, results)
     
-    if not remaining_cis:
+    if not submitted:
         print("All CIs already processed!")
-        output_data = {"total_analyzed": len(results), "results": results}
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        if store is None and journal is None and ci_delta is None:
+            write_results_file(output_file, results)
         return
     
-    print(f"Processing {len(remaining_cis)} remaining CIs with search-enabled model (gpt-4o-mini-search-preview)...")
-    
-    for i, ci in enumerate(remaining_cis, 1):
-        print(f"Processing {i}/{len(remaining_cis)}: {ci['name']}")
-        
-        # Analyze with search-enabled model
-        analysis = analyze_ci_profile_with_search_model(ci['name'], ci['affiliations'])
-        
-        # Create result entry
-        result_entry = {
-            "name": ci['name'],
-            "affiliations": ci['affiliations'],
-            "gender": analysis.get('gender', 'unknown'),
-            "summary": analysis.get('summary', ''),
-            "confidence": analysis.get('confidence', 'low'),
-            "research_areas": analysis.get('research_areas', []),
-            "web_sources_found": analysis.get('web_sources_found', 0),
-            "search_successful": analysis.get('search_successful', False),
-            "search_notes": analysis.get('search_notes', '')
-        }
-        
-        results.append(result_entry)
-        
-        # Save progress frequently
-        cache_data = {"total_analyzed": len(results), "results": results}
-        save_cache(cache_file, cache_data)
-        
-        # Also save to final output
-        output_data = {"total_analyzed": len(results), "results": results}
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
-        
-        # Rate limiting
-        time.sleep(2)
-    
     print(f"\nAnalysis complete! Results saved to {output_file}")
     
     # Print statistics
-    gender_counts = {}
-    successful_searches = 0
-    total_sources = 0
-    
-    for result in results:
-        gender = result['gender']
-        gender_counts[gender] = gender_counts.get(gender, 0) + 1
-        if result.get('search_successful'):
-            successful_searches += 1
-        total_sources += result.get('web_sources_found', 0)
+    table = GenderTable.from_records(results)
+    gender_counts = table.gender_counts()
+    search_stats = table.search_stats()
+    successful_searches = search_stats['successful_searches']
+    total_sources = search_stats['total_sources']
     
     print("\nGender Distribution:")
     for gender, count in gender_counts.items():
@@ -208,10 +406,59 @@ def process_cis_with_search_model(input_file: str, output_file: str, cache_file:
     print(f"  Total web sources found: {total_sources}")
     print(f"  Average sources per CI: {total_sources/len(results):.1f}")
     
+    response_cache.print_stats()
+    
     # Clean up cache after completion
-    if os.path.exists(cache_file):
+    if store is None and os.path.exists(cache_file):
         os.remove(cache_file)
         print(f"Cache file {cache_file} cleaned up")
+    if journal is not None:
+        journal.remove()
+
+def retry_failed_cis(output_file: str, max_workers: int = DEFAULT_MAX_WORKERS, store_path: Optional[str] = None):
+    """
+    Re-run only the CIs whose analysis failed, replacing their placeholder
+    results in output_file (or in the result store, which output_file is
+    then re-exported from).
+    """
+    store = ResultStore(store_path) if store_path else None
+    if store is not None:
+        results = list(store.iter_search_results())
+    else:
+        results = load_cache(output_file).get('results', [])
+    
+    failed_cis = [{"name": r['name'], "affiliations": r['affiliations']} for r in results if is_failed(r)]
+    print(f"Retrying {len(failed_cis)} failed CIs out of {len(results)} results using {max_workers} worker(s)...")
+    
+    index_by_name = {r['name']: i for i, r in enumerate(results)}
+    fixed = 0
+    metrics.start_run('tier1_retry', total=len(failed_cis))
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        completed = iter_completed_analyses(failed_cis, executor, max_pending=max_workers * 2)
+        for i, result_entry in enumerate(completed, 1):
+            status = "failed again" if is_failed(result_entry) else "ok"
+            print(f"Retried {i}/{len(failed_cis)}: {result_entry['name']} ({status})")
+            results[index_by_name[result_entry['name']]] = result_entry
+            metrics.record(result_entry, failed=is_failed(result_entry))
+            if not is_failed(result_entry):
+                fixed += 1
+            if store is not None:
+                store.save_search_result(result_entry)
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"\nInterrupted after fixing {fixed} records.")
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        metrics.end_run()
+        write_results_file(output_file, results)
+        if store is not None:
+            store.close()
+    
+    print(f"\nRetry complete: {fixed}/{len(failed_cis)} failed CIs now analyzed. Results saved to {output_file}")
+    write_failed_records(output_file, results)
 
 if __name__ == "__main__":
     # Check if API key is set
@@ -220,5 +467,24 @@ if __name__ == "__main__":
         print("Please set your OpenAI API key in a .env file or environment variable")
         exit(1)
     
+    parser = argparse.ArgumentParser(description="Analyze CI profiles with a search-enabled OpenAI model")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"Number of requests kept in flight at once (default: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument('--checkpoint-mode', choices=['journal', 'json'], default='journal',
+                        help="journal: append-only JSONL checkpoints (default); json: rewrite the cache after every result")
+    parser.add_argument('--store', metavar='DB',
+                        help="Write results to this SQLite result store instead of the JSON cache")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Re-run only the CIs whose analysis failed in a previous run")
+    parser.add_argument('--delta', action='store_true',
+                        help="Only analyze CIs that are new or whose affiliations changed since the existing results")
+    args = parser.parse_args()
+    
+    if args.retry_failed:
+        retry_failed_cis('ci_short_search_results.json', max_workers=args.workers, store_path=args.store)
+        exit(0)
+    
     # Process CIs with search-enabled model
-    process_cis_with_search_model('ci_short.json', 'ci_short_search_results.json', 'ci_short_search_cache.json')
+    process_cis_with_search_model('ci_short.json', 'ci_short_search_results.json', 'ci_short_search_cache.json',
+                                  max_workers=args.workers, checkpoint_mode=args.checkpoint_mode,
+                                  store_path=args.store, delta=args.delta)
@@ -7,19 +7,45 @@ and uses GPT (without web search) to make educated guesses based on name pattern
 All predictions are clearly marked as speculative and based solely on name analysis.
 """
 
+import argparse
 import json
 import time
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
 from openai import OpenAI
+from checkpoint_journal import CheckpointJournal, journal_path, write_results_file
+from gender_stats import value_counts
+from result_store import ResultStore, apply_name_analysis
+from rate_limiter import get_rate_limiter, rate_limited_completion
+from retry_policy import FAILED_FIELD, get_circuit_breaker, is_failed, write_failed_records
+from response_cache import get_response_cache, make_key
+from batch_transport import OpenAIBatchTransport, batch_request_line, wait_for_batch
+from name_lexicon import GivenNameLexicon, load_or_build_lexicon
+from name_utils import given_name, given_name_key, strip_honorifics
+from progress_metrics import get_metrics_stream
 
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
-def analyze_name_for_gender(name: str) -> Dict:
-    """
-    Analyze a name using GPT (without web search) to make educated gender guess
-    """
+NAME_MODEL = "gpt-4o-mini"
+
+# Shared adaptive limiter; starts at the old 1-second pacing and tunes itself
+# from the API's rate-limit headers and 429 responses
+rate_limiter = get_rate_limiter(NAME_MODEL, requests_per_second=1.0)
+
+# Pauses requests during an outage instead of failing every remaining name
+circuit_breaker = get_circuit_breaker(NAME_MODEL)
+
+# Persistent response cache shared with the web search analyzer
+response_cache = get_response_cache()
+
+# Live progress telemetry tailed by monitor_progress.py
+metrics = get_metrics_stream()
+
+NAME_SYSTEM_MESSAGE = "You are a name analysis expert. You analyze names for likely gender associations based on linguistic and cultural patterns. You do NOT have web search access and must base analysis purely on the name provided. Be honest about uncertainty."
+
+def build_name_prompt(name: str) -> str:
+    """Prompt asking for a name-only gender guess"""
     
     prompt = f"""
     Analyze the name "{name}" and make your best educated guess about the person's gender based solely on the name.
@@ -45,52 +71,315 @@ def analyze_name_for_gender(name: str) -> Dict:
     Return ONLY valid JSON, no other text.
     """
     
+    return prompt
+
+def build_name_request(name: str) -> Dict:
+    """Chat completion request body for a single name"""
+    return {
+        "model": NAME_MODEL,  # Using standard model without web search
+        "messages": [
+            {"role": "system", "content": NAME_SYSTEM_MESSAGE},
+            {"role": "user", "content": build_name_prompt(name)}
+        ],
+        "max_tokens": 300,
+        "temperature": 0.1  # Low temperature for more consistent analysis
+    }
+
+def parse_json_response(result_text: str) -> Optional[Dict]:
+    """Parse a JSON object from a model response, tolerating text around it"""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Using standard model without web search
-            messages=[
-                {"role": "system", "content": "You are a name analysis expert. You analyze names for likely gender associations based on linguistic and cultural patterns. You do NOT have web search access and must base analysis purely on the name provided. Be honest about uncertainty."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300,
-            temperature=0.1  # Low temperature for more consistent analysis
-        )
+        return json.loads(result_text)
+    except json.JSONDecodeError:
+        # Try to extract JSON from the response
+        if '{' in result_text and '}' in result_text:
+            start = result_text.find('{')
+            end = result_text.rfind('}') + 1
+            try:
+                return json.loads(result_text[start:end])
+            except json.JSONDecodeError:
+                pass
+    return None
+
+def parsing_failed_analysis(result_text: str) -> Dict:
+    """Placeholder analysis for a response that could not be parsed"""
+    return {
+        "gender": "unknown",
+        "confidence": "low",
+        "reasoning": f"JSON parsing failed. Raw response: {result_text[:150]}...",
+        "name_origin": "Unknown",
+        "ambiguity_notes": "Analysis failed due to parsing error",
+        FAILED_FIELD: "JSON parsing failed"
+    }
+
+def api_error_analysis(error) -> Dict:
+    """Placeholder analysis for a request that failed"""
+    return {
+        "gender": "unknown",
+        "confidence": "low", 
+        "reasoning": f"API error: {str(error)}",
+        "name_origin": "Unknown",
+        "ambiguity_notes": "Analysis failed due to API error",
+        FAILED_FIELD: f"API error: {str(error)}"
+    }
+
+def analyze_name_for_gender(name: str) -> Dict:
+    """
+    Analyze a name using GPT (without web search) to make educated gender guess
+    """
+    
+    request = build_name_request(name)
+    cache_key = make_key(**request)
+    
+    try:
+        result_text = response_cache.get(cache_key)
+        from_cache = result_text is not None
         
-        result_text = response.choices[0].message.content.strip()
+        if not from_cache:
+            with metrics.analyzing():
+                response = rate_limited_completion(client, rate_limiter, breaker=circuit_breaker, metrics=metrics,
+                                                   **request)
+            result_text = response.choices[0].message.content.strip()
         
         # Try to parse JSON
-        try:
-            result = json.loads(result_text)
-            return result
-        except json.JSONDecodeError:
-            # Try to extract JSON from the response
-            if '{' in result_text and '}' in result_text:
-                start = result_text.find('{')
-                end = result_text.rfind('}') + 1
-                try:
-                    result = json.loads(result_text[start:end])
-                    return result
-                except json.JSONDecodeError:
-                    pass
-            
+        result = parse_json_response(result_text)
+        if result is None:
             # If we can't parse JSON, return an error result
-            return {
-                "gender": "unknown",
-                "confidence": "low",
-                "reasoning": f"JSON parsing failed. Raw response: {result_text[:150]}...",
-                "name_origin": "Unknown",
-                "ambiguity_notes": "Analysis failed due to parsing error"
-            }
+            return parsing_failed_analysis(result_text)
+        
+        if not from_cache:
+            response_cache.put(cache_key, NAME_MODEL, result_text)
+        return result
         
     except Exception as e:
         print(f"Error analyzing name {name}: {e}")
-        return {
-            "gender": "unknown",
-            "confidence": "low", 
-            "reasoning": f"API error: {str(e)}",
-            "name_origin": "Unknown",
-            "ambiguity_notes": "Analysis failed due to API error"
-        }
+        return api_error_analysis(e)
+
+# Packed mode: rough token accounting used to size each pack
+PACKED_TOKEN_BUDGET = 8000       # prompt + completion tokens per packed request
+PACKED_OUTPUT_TOKENS_PER_NAME = 90
+MAX_PACK_SIZE = 50
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+def build_packed_prompt(names: List[str]) -> str:
+    """Prompt asking for name-only gender guesses for several names at once"""
+    name_lines = '\n'.join(f"    - {name}" for name in names)
+    
+    prompt = f"""
+    Analyze each of the following names and make your best educated guess about each person's gender based solely on the name.
+    
+    Names:
+{name_lines}
+    
+    Consider:
+    1. Common gender associations with given names
+    2. Cultural and linguistic patterns
+    3. Name variations and origins
+    
+    IMPORTANT: You do NOT have access to web search or any external information about these specific people.
+    Base your analysis ONLY on the names themselves and general naming patterns.
+    
+    Provide a JSON array with one object per name, in the same order, each with:
+    - "name": the name exactly as given above
+    - "gender": "male", "female", or "unknown" (your best guess based on name only)
+    - "confidence": "high", "medium", or "low" (how confident you are in this name-based guess)
+    - "reasoning": Brief explanation of why you made this guess
+    - "name_origin": If recognizable, the likely cultural/linguistic origin of the name
+    - "ambiguity_notes": Any notes about name ambiguity or uncertainty
+    
+    Be honest about uncertainty. If a name is genuinely ambiguous or you're unsure, 
+    use "unknown" and explain why.
+    
+    Return ONLY the valid JSON array, no other text.
+    """
+    
+    return prompt
+
+def build_packed_request(names: List[str]) -> Dict:
+    """Chat completion request body for a pack of names"""
+    return {
+        "model": NAME_MODEL,
+        "messages": [
+            {"role": "system", "content": NAME_SYSTEM_MESSAGE},
+            {"role": "user", "content": build_packed_prompt(names)}
+        ],
+        "max_tokens": PACKED_OUTPUT_TOKENS_PER_NAME * len(names) + 100,
+        "temperature": 0.1
+    }
+
+def choose_pack_size(names: List[str], token_budget: int = PACKED_TOKEN_BUDGET) -> int:
+    """Largest pack whose estimated prompt + completion tokens fit in token_budget"""
+    if not names:
+        return 1
+    
+    fixed_tokens = estimate_tokens(NAME_SYSTEM_MESSAGE) + estimate_tokens(build_packed_prompt([]))
+    average_name_tokens = sum(estimate_tokens(name) + 2 for name in names) / len(names)
+    per_name_tokens = average_name_tokens + PACKED_OUTPUT_TOKENS_PER_NAME
+    
+    pack_size = int((token_budget - fixed_tokens - 100) // per_name_tokens)
+    return max(1, min(MAX_PACK_SIZE, pack_size))
+
+def parse_packed_response(result_text: str, names: List[str]) -> Dict[str, Dict]:
+    """Map each requested name to its analysis; names missing from the response are left out"""
+    try:
+        parsed = json.loads(result_text)
+    except json.JSONDecodeError:
+        parsed = None
+        if '[' in result_text and ']' in result_text:
+            start = result_text.find('[')
+            end = result_text.rfind(']') + 1
+            try:
+                parsed = json.loads(result_text[start:end])
+            except json.JSONDecodeError:
+                pass
+    
+    # Some responses wrap the array in an object
+    if isinstance(parsed, dict):
+        parsed = next((value for value in parsed.values() if isinstance(value, list)), None)
+    if not isinstance(parsed, list):
+        return {}
+    
+    requested = set(names)
+    analyses = {}
+    for item in parsed:
+        if isinstance(item, dict) and item.get('name') in requested:
+            analyses[item['name']] = item
+    return analyses
+
+def analyze_names_for_gender_packed(names: List[str]) -> Dict[str, Dict]:
+    """
+    Analyze several names in one request.
+    
+    Names the model leaves out of its response, or every name when the
+    response can't be parsed, fall back to individual analyze_name_for_gender calls.
+    """
+    unique_names = list(dict.fromkeys(names))
+    request = build_packed_request(unique_names)
+    cache_key = make_key(**request)
+    analyses = {}
+    
+    try:
+        result_text = response_cache.get(cache_key)
+        from_cache = result_text is not None
+        
+        if not from_cache:
+            with metrics.analyzing():
+                response = rate_limited_completion(client, rate_limiter, breaker=circuit_breaker, metrics=metrics,
+                                                   **request)
+            result_text = response.choices[0].message.content.strip()
+        
+        analyses = parse_packed_response(result_text, unique_names)
+        if analyses and not from_cache:
+            response_cache.put(cache_key, NAME_MODEL, result_text)
+        
+    except Exception as e:
+        print(f"Error analyzing pack of {len(unique_names)} names: {e}")
+    
+    missing = [name for name in unique_names if name not in analyses]
+    if missing:
+        print(f"Packed response missing {len(missing)}/{len(unique_names)} names; falling back to per-name calls")
+        for name in missing:
+            analyses[name] = analyze_name_for_gender(name)
+    
+    return analyses
+
+def split_by_lexicon(researchers: List[Dict], lexicon: Optional[GivenNameLexicon]):
+    """Return ([(researcher, analysis)] decided by the lexicon, [researchers] still needing the LLM)"""
+    decided, undecided = [], []
+    for researcher in researchers:
+        analysis = lexicon.classify(researcher['name']) if lexicon is not None else None
+        if analysis is not None:
+            decided.append((researcher, analysis))
+        else:
+            undecided.append(researcher)
+    return decided, undecided
+
+def group_by_given_name(researchers: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Group researchers by normalized given name ('Prof Wei Li' and 'Dr Wei Zhang'
+    share one group). Keys are the name sent for analysis: the given name as
+    first written, or the name without honorifics when no given name can be parsed.
+    """
+    groups = {}
+    labels = {}
+    for researcher in researchers:
+        key = given_name_key(researcher['name'])
+        if key is None:
+            label = strip_honorifics(researcher['name'])
+        else:
+            label = labels.setdefault(key, given_name(researcher['name']))
+        groups.setdefault(label, []).append(researcher)
+    return groups
+
+def iter_name_analyses(researchers: List[Dict], pack: bool = False, token_budget: int = PACKED_TOKEN_BUDGET,
+                       lexicon: Optional[GivenNameLexicon] = None):
+    """
+    Yield (researcher, name_analysis) pairs. Names the lexicon can decide come
+    first without any request; the rest are grouped by given name and cost one
+    analysis per distinct given name (one request each, or one per pack),
+    shared by every researcher in the group.
+    """
+    decided, researchers = split_by_lexicon(researchers, lexicon)
+    if lexicon is not None:
+        print(f"Given-name lexicon decided {len(decided)}, {len(researchers)} left for the LLM")
+    yield from decided
+    
+    groups = group_by_given_name(researchers)
+    print(f"{len(researchers)} researchers share {len(groups)} distinct given names")
+    
+    if not pack:
+        for label, members in groups.items():
+            analysis = analyze_name_for_gender(label)
+            for researcher in members:
+                yield researcher, analysis
+        return
+    
+    labels = list(groups)
+    pack_size = choose_pack_size(labels, token_budget)
+    print(f"Packing up to {pack_size} names per request")
+    
+    for start in range(0, len(labels), pack_size):
+        batch = labels[start:start + pack_size]
+        analyses = analyze_names_for_gender_packed(batch)
+        for label in batch:
+            for researcher in groups[label]:
+                yield researcher, analyses[label]
+
+def build_result_entry(researcher: Dict, name_analysis: Dict) -> Dict:
+    """Create the enhanced result entry stored for a researcher"""
+    analysis_method = name_analysis.get('analysis_method', 'name_pattern_only')
+    if analysis_method == 'given_name_lexicon':
+        source = "a lookup of the given name in our own previously classified researchers"
+    else:
+        source = "name pattern analysis using AI"
+    
+    entry = {
+        "name": researcher['name'],
+        "affiliations": researcher['affiliations'],
+        "original_gender": researcher['gender'],  # Keep track of original classification
+        "original_summary": researcher.get('summary', ''),
+        "original_search_notes": researcher.get('search_notes', ''),
+        
+        # Name-based analysis results
+        "name_based_gender": name_analysis.get('gender', 'unknown'),
+        "name_analysis_confidence": name_analysis.get('confidence', 'low'),
+        "name_reasoning": name_analysis.get('reasoning', ''),
+        "name_origin": name_analysis.get('name_origin', 'Unknown'),
+        "ambiguity_notes": name_analysis.get('ambiguity_notes', ''),
+        
+        # Updated search notes with clear disclaimer
+        "updated_search_notes": f"{researcher.get('search_notes', '')} | NAME-BASED GENDER ANALYSIS: No clear evidence found on websites during original search. Gender prediction '{name_analysis.get('gender', 'unknown')}' is based solely on {source}, not on verified information about this specific person. Confidence: {name_analysis.get('confidence', 'low')}. Reasoning: {name_analysis.get('reasoning', 'No reasoning provided')}",
+        
+        # Analysis metadata
+        "analysis_method": analysis_method,
+        "analysis_date": time.strftime("%Y-%m-%d"),
+        "disclaimer": "This gender classification is speculative and based only on name patterns, not verified information about the individual."
+    }
+    if FAILED_FIELD in name_analysis:
+        entry[FAILED_FIELD] = name_analysis[FAILED_FIELD]
+    return entry
 
 def load_cache(cache_file: str) -> Dict:
     """Load existing cache if it exists"""
@@ -114,27 +403,91 @@ def save_cache(cache_file: str, data: Dict):
     except Exception as e:
         print(f"Error saving cache: {e}")
 
+def load_checkpoint(cache_file: str, journal: Optional[CheckpointJournal]) -> Dict:
+    """Load results from the JSON cache plus, in journal mode, everything replayed from the journal"""
+    cache_data = load_cache(cache_file)
+    if journal is not None:
+        cache_data['results'] = cache_data.get('results', []) + journal.replay()
+        cache_data['total_analyzed'] = len(cache_data['results'])
+    return cache_data
+
 def get_processed_names(cache_data: Dict) -> set:
-    """Get set of already processed names from cache"""
-    return {result['name'] for result in cache_data.get('results', [])}
+    """Get set of already processed names from cache (failed analyses don't count)"""
+    return {result['name'] for result in cache_data.get('results', []) if not is_failed(result)}
 
-def process_unknown_gender_researchers(input_file: str, output_file: str, cache_file: str = "name_analysis_cache.json"):
-    """Process researchers with unknown gender using name-based analysis"""
-    
-    # Load input data
+def load_unknown_gender_researchers(input_file: str) -> List[Dict]:
+    """Load the tier-1 researchers whose gender is still unknown"""
     with open(input_file, 'r') as f:
         data = json.load(f)
     
     # Extract researchers with unknown gender
     all_researchers = data.get('results', [])
-    unknown_gender_researchers = [r for r in all_researchers if r.get('gender') == 'unknown']
+    return [r for r in all_researchers if r.get('gender') == 'unknown']
+
+def print_name_analysis_statistics(results: List[Dict]):
+    """Print the prediction and confidence breakdown for name-based results"""
+    gender_counts = value_counts(result['name_based_gender'] for result in results)
+    confidence_counts = value_counts(result['name_analysis_confidence'] for result in results)
+    
+    print("\nName-Based Gender Predictions:")
+    for gender, count in gender_counts.items():
+        percentage = (count / len(results)) * 100
+        print(f"  {gender}: {count} ({percentage:.1f}%)")
+    
+    print("\nConfidence Levels:")
+    for confidence, count in confidence_counts.items():
+        percentage = (count / len(results)) * 100
+        print(f"  {confidence}: {count} ({percentage:.1f}%)")
+    
+    print(f"\nTotal researchers analyzed: {len(results)}")
+    response_cache.print_stats()
+
+def process_unknown_gender_researchers(input_file: str, output_file: str, cache_file: str = "name_analysis_cache.json",
+                                       checkpoint_mode: str = "journal", store_path: Optional[str] = None,
+                                       pack: bool = False, token_budget: int = PACKED_TOKEN_BUDGET,
+                                       use_lexicon: bool = True):
+    """
+    Process researchers with unknown gender using name-based analysis.
+    
+    checkpoint_mode="journal" appends each result to a JSONL journal next to
+    cache_file and writes output_file once at the end; "json" rewrites the
+    whole cache and output file after every result.
+    
+    With store_path set, unknown-gender researchers are queried from the
+    SQLite result store (when it holds tier-1 results), analyses are written
+    to it transactionally and output_file is exported from it at the end.
+    
+    pack=True classifies several names per request, with the pack size
+    chosen from token_budget.
+    
+    use_lexicon=True first resolves given names that are unambiguous in our
+    own accumulated results locally (analysis_method "given_name_lexicon").
+    """
+    
+    store = ResultStore(store_path) if store_path else None
+    journal = None
+    
+    if store is not None and store.count_search_results():
+        # Indexed query instead of parsing the whole tier-1 file
+        unknown_gender_researchers = list(store.iter_search_results(gender='unknown'))
+    else:
+        unknown_gender_researchers = load_unknown_gender_researchers(input_file)
     
     print(f"Found {len(unknown_gender_researchers)} researchers with unknown gender")
     
-    # Load existing cache
-    cache_data = load_cache(cache_file)
-    processed_names = get_processed_names(cache_data)
-    results = cache_data.get('results', [])
+    if store is not None:
+        # Resume from the store with indexed per-researcher lookups
+        results = [a for a in (store.get_name_analysis(r['name']) for r in unknown_gender_researchers)
+                   if a is not None and not is_failed(a)]
+        processed_names = {a['name'] for a in results}
+    else:
+        # Load existing cache
+        if checkpoint_mode == "journal":
+            journal = CheckpointJournal(journal_path(cache_file))
+        cache_data = load_checkpoint(cache_file, journal)
+        processed_names = get_processed_names(cache_data)
+        # Failed analyses are dropped here and redone below
+        results = [r for r in cache_data.get('results', []) if not is_failed(r)]
     
     remaining_researchers = [r for r in unknown_gender_researchers if r['name'] not in processed_names]
     
@@ -143,94 +496,289 @@ def process_unknown_gender_researchers(input_file: str, output_file: str, cache_
     
     if not remaining_researchers:
         print("All unknown gender researchers already processed!")
-        output_data = {"total_analyzed": len(results), "results": results}
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        write_results_file(output_file, results)
         return
     
     print(f"Processing {len(remaining_researchers)} researchers with name-based gender analysis...")
+    start_time = time.time()
+    metrics.start_run('tier2_names', total=len(unknown_gender_researchers), done=len(results))
     
-    for i, researcher in enumerate(remaining_researchers, 1):
-        print(f"Processing {i}/{len(remaining_researchers)}: {researcher['name']}")
-        
-        # Analyze name for gender
-        name_analysis = analyze_name_for_gender(researcher['name'])
-        
-        # Create enhanced result entry
-        result_entry = {
-            "name": researcher['name'],
-            "affiliations": researcher['affiliations'],
-            "original_gender": researcher['gender'],  # Keep track of original classification
-            "original_summary": researcher.get('summary', ''),
-            "original_search_notes": researcher.get('search_notes', ''),
+    try:
+        lexicon = load_or_build_lexicon() if use_lexicon else None
+        analyses = iter_name_analyses(remaining_researchers, pack, token_budget, lexicon)
+        for i, (researcher, name_analysis) in enumerate(analyses, 1):
+            print(f"Processed {i}/{len(remaining_researchers)}: {researcher['name']}")
             
-            # Name-based analysis results
-            "name_based_gender": name_analysis.get('gender', 'unknown'),
-            "name_analysis_confidence": name_analysis.get('confidence', 'low'),
-            "name_reasoning": name_analysis.get('reasoning', ''),
-            "name_origin": name_analysis.get('name_origin', 'Unknown'),
-            "ambiguity_notes": name_analysis.get('ambiguity_notes', ''),
+            # Create enhanced result entry
+            result_entry = build_result_entry(researcher, name_analysis)
             
-            # Updated search notes with clear disclaimer
-            "updated_search_notes": f"{researcher.get('search_notes', '')} | NAME-BASED GENDER ANALYSIS: No clear evidence found on websites during original search. Gender prediction '{name_analysis.get('gender', 'unknown')}' is based solely on name pattern analysis using AI, not on verified information about this specific person. Confidence: {name_analysis.get('confidence', 'low')}. Reasoning: {name_analysis.get('reasoning', 'No reasoning provided')}",
+            results.append(result_entry)
+            metrics.record(result_entry, done=len(results), failed=is_failed(result_entry),
+                           gender=result_entry['name_based_gender'])
             
-            # Analysis metadata
-            "analysis_method": "name_pattern_only",
-            "analysis_date": time.strftime("%Y-%m-%d"),
-            "disclaimer": "This gender classification is speculative and based only on name patterns, not verified information about the individual."
-        }
-        
-        results.append(result_entry)
-        
-        # Save progress frequently
-        cache_data = {"total_analyzed": len(results), "results": results}
-        save_cache(cache_file, cache_data)
-        
-        # Also save to final output
-        output_data = {"total_analyzed": len(results), "results": results}
-        with open(output_file, 'w') as f:
-            json.dump(output_data, f, indent=2)
-        
-        # Rate limiting to be respectful to API
-        time.sleep(1)
+            if store is not None:
+                store.save_name_analysis(result_entry)
+            elif journal is not None:
+                # Constant-cost checkpoint: one appended line per result
+                journal.append(result_entry)
+            else:
+                # Save progress frequently
+                cache_data = {"total_analyzed": len(results), "results": results}
+                save_cache(cache_file, cache_data)
+                
+                # Also save to final output
+                output_data = {"total_analyzed": len(results), "results": results}
+                with open(output_file, 'w') as f:
+                    json.dump(output_data, f, indent=2)
+    finally:
+        metrics.end_run()
+        if store is not None:
+            write_results_file(output_file, results)
+            store.close()
+        elif journal is not None:
+            # Compact whatever we have into the regular output file
+            journal.compact(output_file, results)
+            journal.close()
     
     print(f"\nName-based analysis complete! Results saved to {output_file}")
+    write_failed_records(output_file, results)
     
     # Print statistics
-    gender_counts = {}
-    confidence_counts = {}
+    print_name_analysis_statistics(results)
+    elapsed = time.time() - start_time
+    print(f"Processing time: {elapsed:.0f} seconds ({elapsed / len(remaining_researchers):.1f} sec per researcher, "
+          f"final rate {rate_limiter.rate:.2f} req/s)")
     
-    for result in results:
-        gender = result['name_based_gender']
-        confidence = result['name_analysis_confidence']
-        
-        gender_counts[gender] = gender_counts.get(gender, 0) + 1
-        confidence_counts[confidence] = confidence_counts.get(confidence, 0) + 1
+    # Clean up cache after completion
+    if store is None and os.path.exists(cache_file):
+        os.remove(cache_file)
+        print(f"Cache file {cache_file} cleaned up")
+    if journal is not None:
+        journal.remove()
+
+def build_batch_file(names: List[str], batch_file: str) -> Dict[str, str]:
+    """
+    Write one chat completion request per name to a JSONL batch file.
     
-    print("\nName-Based Gender Predictions:")
-    for gender, count in gender_counts.items():
-        percentage = (count / len(results)) * 100
-        print(f"  {gender}: {count} ({percentage:.1f}%)")
+    Returns the custom_id -> name mapping needed to ingest the results.
+    """
+    id_to_name = {}
+    with open(batch_file, 'w', encoding='utf-8') as f:
+        for i, name in enumerate(names):
+            custom_id = f"name-{i}"
+            id_to_name[custom_id] = name
+            f.write(batch_request_line(custom_id, build_name_request(name)) + '\n')
+    return id_to_name
+
+def parse_batch_output_line(line: str):
+    """Return (custom_id, analysis, response_text) for one batch output line"""
+    output = json.loads(line)
+    custom_id = output.get('custom_id')
+    
+    response = output.get('response') or {}
+    if output.get('error') or response.get('status_code') != 200:
+        error = output.get('error') or {"message": f"HTTP {response.get('status_code')}"}
+        return custom_id, api_error_analysis(error.get('message', error)), None
+    
+    result_text = response['body']['choices'][0]['message']['content'].strip()
+    analysis = parse_json_response(result_text)
+    if analysis is None:
+        return custom_id, parsing_failed_analysis(result_text), None
+    return custom_id, analysis, result_text
+
+def ingest_batch_results(lines: List[str], id_to_name: Dict[str, str], researchers_by_name: Dict[str, Dict],
+                         groups: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+    """
+    Turn batch output lines into the same result entries that
+    process_unknown_gender_researchers produces, fanning each analysis out
+    to every researcher name in its given-name group. Parsed responses are
+    also added to the shared response cache.
+    """
+    analyses = {}
+    for line in lines:
+        custom_id, analysis, result_text = parse_batch_output_line(line)
+        name = id_to_name.get(custom_id)
+        if name is None:
+            continue
+        analyses[name] = analysis
+        if result_text is not None:
+            response_cache.put(make_key(**build_name_request(name)), NAME_MODEL, result_text)
+    
+    results = []
+    for name in id_to_name.values():
+        analysis = analyses.get(name, api_error_analysis("No result returned in batch output"))
+        # Batches submitted before grouping existed hold one request per researcher
+        for researcher_name in (groups or {}).get(name, [name]):
+            results.append(build_result_entry(researchers_by_name[researcher_name], analysis))
+    return results
+
+def process_unknown_gender_researchers_batch(input_file: str, output_file: str,
+                                             batch_file: str = "name_analysis_batch.jsonl",
+                                             state_file: str = "name_analysis_batch_state.json",
+                                             transport=None, poll_interval: float = 60,
+                                             store_path: Optional[str] = None, use_lexicon: bool = True):
+    """
+    Process researchers with unknown gender through a single batch submission.
+    
+    Names already in output_file, decided by the given-name lexicon or in the
+    response cache are resolved locally; the rest are written to batch_file, submitted through transport
+    (the OpenAI Batch API by default), polled until finished and ingested
+    into the usual result entries. The submitted batch id is kept in
+    state_file so an interrupted run resumes polling instead of resubmitting;
+    researchers covered by that batch are taken from it, not answered locally.
+    With store_path set, the results are also written to the SQLite result store.
+    """
+    if transport is None:
+        transport = OpenAIBatchTransport(client)
     
-    print("\nConfidence Levels:")
-    for confidence, count in confidence_counts.items():
-        percentage = (count / len(results)) * 100
-        print(f"  {confidence}: {count} ({percentage:.1f}%)")
+    unknown_gender_researchers = load_unknown_gender_researchers(input_file)
+    researchers_by_name = {r['name']: r for r in unknown_gender_researchers}
+    print(f"Found {len(unknown_gender_researchers)} researchers with unknown gender")
     
-    print(f"\nTotal researchers analyzed: {len(results)}")
-    print(f"Average processing time: ~{len(results)} seconds (1 sec per researcher)")
+    results = load_cache(output_file).get('results', []) if os.path.exists(output_file) else []
+    processed_names = get_processed_names({"results": results})
+    # Failed analyses are resubmitted
+    results = [r for r in results if not is_failed(r)]
+    
+    state = None
+    in_submitted_batch = set()
+    if os.path.exists(state_file):
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+        print(f"Resuming batch {state['batch_id']} from {state_file}")
+        # Researchers the submitted batch covers are ingested from it, not answered again locally
+        for label in state['id_to_name'].values():
+            in_submitted_batch.update(state.get('groups', {}).get(label, [label]))
+    
+    remaining_researchers = [r for r in unknown_gender_researchers
+                             if r['name'] not in processed_names and r['name'] not in in_submitted_batch]
+    
+    # Answer whatever we can from the lexicon and response cache before building the batch
+    lexicon_decided, undecided = split_by_lexicon(remaining_researchers, load_or_build_lexicon() if use_lexicon else None)
+    for researcher, analysis in lexicon_decided:
+        results.append(build_result_entry(researcher, analysis))
+    
+    # One request per distinct given name
+    groups = group_by_given_name(undecided)
+    to_submit = []
+    answered_from_cache = 0
+    for label, members in groups.items():
+        cached_text = response_cache.get(make_key(**build_name_request(label)))
+        analysis = parse_json_response(cached_text) if cached_text is not None else None
+        if analysis is not None:
+            results.extend(build_result_entry(researcher, analysis) for researcher in members)
+            answered_from_cache += len(members)
+        else:
+            to_submit.append(label)
     
-    # Clean up cache after completion
-    if os.path.exists(cache_file):
-        os.remove(cache_file)
-        print(f"Cache file {cache_file} cleaned up")
+    print(f"Already processed: {len(processed_names)}")
+    print(f"Decided by given-name lexicon: {len(lexicon_decided)}")
+    print(f"Answered from response cache: {answered_from_cache}")
+    print(f"Remaining to submit: {len(to_submit)} distinct given names "
+          f"({sum(len(groups[label]) for label in to_submit)} researchers)")
+    
+    if state is None and to_submit:
+        id_to_name = build_batch_file(to_submit, batch_file)
+        batch_id = transport.submit(batch_file)
+        state = {"batch_id": batch_id, "batch_file": batch_file, "id_to_name": id_to_name,
+                 "groups": {label: [r['name'] for r in groups[label]] for label in to_submit},
+                 "submitted_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        with open(state_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        print(f"Submitted batch {batch_id} with {len(id_to_name)} requests")
+    
+    if state is not None:
+        status = wait_for_batch(transport, state['batch_id'], poll_interval)
+        if status not in ("completed", "expired"):
+            print(f"Batch {state['batch_id']} ended with status '{status}'; nothing ingested")
+            os.remove(state_file)
+            write_results_file(output_file, results)
+            return
+        
+        # Expired batches still return the requests that finished in time
+        batch_results = ingest_batch_results(transport.fetch_results(state['batch_id']), state['id_to_name'],
+                                             researchers_by_name, state.get('groups'))
+        batch_results = [r for r in batch_results if r['name'] not in processed_names]
+        results.extend(batch_results)
+        print(f"Ingested {len(batch_results)} results from batch {state['batch_id']}")
+        
+        os.remove(state_file)
+        if os.path.exists(state['batch_file']):
+            os.remove(state['batch_file'])
+    
+    write_results_file(output_file, results)
+    if store_path:
+        with ResultStore(store_path) as store:
+            store.save_name_analyses(results)
+    print(f"\nName-based batch analysis complete! Results saved to {output_file}")
+    write_failed_records(output_file, results)
+    print_name_analysis_statistics(results)
+
+def retry_failed_name_analyses(output_file: str, store_path: Optional[str] = None):
+    """
+    Re-run only the name analyses that failed, replacing their placeholder
+    results in output_file (and in the result store when store_path is set).
+    """
+    store = ResultStore(store_path) if store_path else None
+    if store is not None:
+        results = list(store.iter_name_analyses())
+    else:
+        results = load_cache(output_file).get('results', [])
+    
+    # Rebuild the tier-1 researcher records the failed entries were made from
+    failed_researchers = [{
+        "name": r['name'],
+        "affiliations": r['affiliations'],
+        "gender": r['original_gender'],
+        "summary": r.get('original_summary', ''),
+        "search_notes": r.get('original_search_notes', '')
+    } for r in results if is_failed(r)]
+    print(f"Retrying {len(failed_researchers)} failed name analyses out of {len(results)} results...")
+    
+    index_by_name = {r['name']: i for i, r in enumerate(results)}
+    fixed = 0
+    metrics.start_run('tier2_retry', total=len(failed_researchers))
+    
+    try:
+        for i, (researcher, name_analysis) in enumerate(iter_name_analyses(failed_researchers), 1):
+            result_entry = build_result_entry(researcher, name_analysis)
+            metrics.record(result_entry, failed=is_failed(result_entry), gender=result_entry['name_based_gender'])
+            status = "failed again" if is_failed(result_entry) else "ok"
+            print(f"Retried {i}/{len(failed_researchers)}: {researcher['name']} ({status})")
+            results[index_by_name[researcher['name']]] = result_entry
+            if not is_failed(result_entry):
+                fixed += 1
+            if store is not None:
+                store.save_name_analysis(result_entry)
+    finally:
+        metrics.end_run()
+        write_results_file(output_file, results)
+        if store is not None:
+            store.close()
+    
+    print(f"\nRetry complete: {fixed}/{len(failed_researchers)} failed analyses now done. Results saved to {output_file}")
+    write_failed_records(output_file, results)
 
-def merge_results_back_to_main(original_file: str, name_analysis_file: str, output_file: str):
+def merge_results_back_to_main(original_file: str, name_analysis_file: str, output_file: str,
+                               store_path: Optional[str] = None):
     """
-    Merge the name-based analysis results back into the main dataset
+    Merge the name-based analysis results back into the main dataset.
+    
+    With store_path set, the merge is a join inside the SQLite result store
+    and the two input files are not read.
     """
     print("Merging name-based analysis back into main dataset...")
     
+    if store_path:
+        with ResultStore(store_path) as store:
+            updated_results = list(store.iter_merged_results())
+        updates_made = sum(1 for r in updated_results
+                           if r.get('name_analysis', {}).get('name_based_gender', 'unknown') != 'unknown')
+        write_results_file(output_file, updated_results)
+        print(f"Merge complete! {updates_made} researchers updated with name-based gender predictions")
+        print(f"Merged results saved to {output_file}")
+        return
+    
     # Load original data
     with open(original_file, 'r') as f:
         original_data = json.load(f)
@@ -251,30 +799,10 @@ def merge_results_back_to_main(original_file: str, name_analysis_file: str, outp
             # This researcher had name-based analysis
             analysis = name_analysis_lookup[researcher['name']]
             
-            # Update the researcher data
-            updated_researcher = researcher.copy()
-            
-            # Only update if name-based analysis provided a gender prediction
             if analysis['name_based_gender'] != 'unknown':
-                updated_researcher['gender'] = analysis['name_based_gender']
-                updated_researcher['confidence'] = analysis['name_analysis_confidence']
                 updates_made += 1
             
-            # Always update search notes to include the disclaimer
-            updated_researcher['search_notes'] = analysis['updated_search_notes']
-            
-            # Add name analysis metadata
-            updated_researcher['name_analysis'] = {
-                "method": "name_pattern_analysis",
-                "original_gender": analysis['original_gender'],
-                "name_based_gender": analysis['name_based_gender'],
-                "confidence": analysis['name_analysis_confidence'],
-                "reasoning": analysis['name_reasoning'],
-                "name_origin": analysis['name_origin'],
-                "disclaimer": analysis['disclaimer']
-            }
-            
-            updated_results.append(updated_researcher)
+            updated_results.append(apply_name_analysis(researcher, analysis))
         else:
             # No name-based analysis for this researcher
             updated_results.append(researcher)
@@ -298,6 +826,25 @@ if __name__ == "__main__":
         print("Please set your OpenAI API key in a .env file or environment variable")
         exit(1)
     
+    parser = argparse.ArgumentParser(description="Name-based gender analysis for researchers with unknown gender")
+    parser.add_argument('--checkpoint-mode', choices=['journal', 'json'], default='journal',
+                        help="journal: append-only JSONL checkpoints (default); json: rewrite the cache after every result")
+    parser.add_argument('--store', metavar='DB',
+                        help="Read tier-1 results from and write analyses to this SQLite result store")
+    parser.add_argument('--batch', action='store_true',
+                        help="Submit all names as one OpenAI Batch API job instead of synchronous requests")
+    parser.add_argument('--poll-interval', type=float, default=60,
+                        help="Seconds between batch status checks (default: 60)")
+    parser.add_argument('--pack', action='store_true',
+                        help="Classify several names per request (pack size chosen from --token-budget)")
+    parser.add_argument('--token-budget', type=int, default=PACKED_TOKEN_BUDGET,
+                        help=f"Estimated tokens per packed request (default: {PACKED_TOKEN_BUDGET})")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Re-run only the name analyses that failed in a previous run, then merge")
+    parser.add_argument('--no-lexicon', action='store_true',
+                        help="Send every name to the LLM instead of resolving unambiguous given names locally first")
+    args = parser.parse_args()
+    
     # Process unknown gender researchers with name-based analysis
     input_file = 'ci_short_search_results.json'
     analysis_output = 'ci_name_based_gender_analysis.json'
@@ -312,14 +859,22 @@ if __name__ == "__main__":
     print("=" * 60)
     
     # Step 1: Analyze unknown gender researchers
-    process_unknown_gender_researchers(input_file, analysis_output)
+    if args.retry_failed:
+        retry_failed_name_analyses(analysis_output, store_path=args.store)
+    elif args.batch:
+        process_unknown_gender_researchers_batch(input_file, analysis_output, poll_interval=args.poll_interval,
+                                                 store_path=args.store, use_lexicon=not args.no_lexicon)
+    else:
+        process_unknown_gender_researchers(input_file, analysis_output, checkpoint_mode=args.checkpoint_mode,
+                                           store_path=args.store, pack=args.pack, token_budget=args.token_budget,
+                                           use_lexicon=not args.no_lexicon)
     
     print("\n" + "=" * 60)
     print("Analysis complete! Now merging results...")
     print("=" * 60)
     
     # Step 2: Merge results back into main dataset
-    merge_results_back_to_main(input_file, analysis_output, merged_output)
+    merge_results_back_to_main(input_file, analysis_output, merged_output, store_path=args.store)
     
     print("\n" + "=" * 60)
     print("✅ Name-based gender analysis complete!")
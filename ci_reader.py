@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for CI input files.
+
+Yields CI records one at a time, without loading the whole file, from any of
+the layouts the analyzers accept:
+- a bare JSON list of CIs
+- {"unique_chief_investigators": [...]} (other top-level keys are skipped)
+- JSONL, one CI per line
+
+iter_records does the same for other wrapper keys, e.g. the "results" list of
+the analysis output files.
+
+Usage:
+    python ci_reader.py ci_full.json
+"""
+
+import json
+import os
+import sys
+from typing import Dict, Iterator
+
+CIS_KEY = "unique_chief_investigators"
+RESULTS_KEY = "results"
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+# Without a JSONL extension, the format is decided from this much of the file
+JSONL_SNIFF_CHARS = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_NUMBER_CHARS = set('0123456789+-.eE')
+
+class _StreamBuffer:
+    """Text read from a file in chunks, with incremental JSON value decoding"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping consumed text; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file), without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Unsupported data format: expected '{char}' but found '{self.peek()}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more chunks as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read more, or fail if the file has ended
+                if not self._fill():
+                    raise
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                # A number running to the end of the buffer could continue in the
+                # next chunk ('1.' + '5'), even where its start already decodes
+                token_end = end
+                while token_end < len(self.buffer) and self.buffer[token_end] in _NUMBER_CHARS:
+                    token_end += 1
+                if token_end == len(self.buffer) and self._fill():
+                    continue
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator:
+        """Yield the elements of the JSON array starting at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect(']')
+                return
+
+def _is_jsonl(input_file: str, key: str = CIS_KEY) -> bool:
+    """
+    JSONL by extension, or when the first line is a complete record on its
+    own. Only the first JSONL_SNIFF_CHARS are read, so a minified
+    single-line JSON file isn't loaded whole just to decide.
+    """
+    if input_file.endswith(JSONL_EXTENSIONS):
+        return True
+    with open(input_file, 'r', encoding='utf-8') as f:
+        prefix = f.read(JSONL_SNIFF_CHARS)
+    newline = prefix.find('\n')
+    if newline == -1 and len(prefix) == JSONL_SNIFF_CHARS:
+        # First line longer than any CI record
+        return False
+    try:
+        record = json.loads(prefix if newline == -1 else prefix[:newline])
+    except json.JSONDecodeError:
+        return False
+    return isinstance(record, dict) and 'name' in record and key not in record
+
+def iter_cis(input_file: str, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """Yield CI records from input_file one at a time"""
+    return iter_records(input_file, CIS_KEY, chunk_size)
+
+def iter_records(input_file: str, key: str, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """Yield the records of a bare list, of the list under key, or of a JSONL file, one at a time"""
+    if _is_jsonl(input_file, key):
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        stream = _StreamBuffer(f, chunk_size)
+        first = stream.peek()
+
+        if first == '[':
+            yield from stream.iter_array()
+            return
+
+        if first == '{':
+            stream.pos += 1
+            while stream.peek() != '}':
+                current_key = stream.value()
+                stream.expect(':')
+                if current_key == key:
+                    yield from stream.iter_array()
+                    return
+                stream.value()  # skip other top-level values
+                if stream.peek() == ',':
+                    stream.pos += 1
+
+        raise ValueError("Unsupported data format")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python ci_reader.py INPUT_FILE")
+        sys.exit(1)
+
+    count = 0
+    for ci in iter_cis(sys.argv[1]):
+        count += 1
+    print(f"{count} CI records in {sys.argv[1]} ({os.path.getsize(sys.argv[1])} bytes)")
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Columnar copy of a results file for the analytics scripts.
+
+The merged results are written once as pretty-printed JSON for people and
+the web visualizer. Next to it, a columnar copy lets the charts and
+statistics load only the fields they use instead of parsing every summary:
+- gender, confidence and name_analysis_method are dictionary-encoded
+  (integer codes + the distinct values)
+- affiliations and research_areas are lists of dictionary codes
+- total_projects and web_sources_found are integer columns
+
+With pyarrow installed the copy is a Parquet file (foo.parquet). Without
+it, a directory (foo.columns/) holds one flat binary file per column
+(stdlib array, Arrow-style offsets for strings and lists) plus a
+manifest.json with the schema and dictionaries.
+
+Both record the size and mtime of the JSON they were built from; readers
+fall back to the JSON when it has changed since.
+
+Usage:
+    python columnar.py ci_gender_with_projects.json            # write the columnar copy
+    python columnar.py ci_gender_with_projects.json --format stdlib
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FORMAT_VERSION = 1
+
+# Column kinds
+STRING = "string"
+DICTIONARY = "dictionary"
+LIST_DICTIONARY = "list_dictionary"
+INT = "int"
+BOOL = "bool"
+
+SCHEMA = {
+    "name": STRING,
+    "gender": DICTIONARY,
+    "confidence": DICTIONARY,
+    "affiliations": LIST_DICTIONARY,
+    "total_projects": INT,
+    "web_sources_found": INT,
+    "search_successful": BOOL,
+    "research_areas": LIST_DICTIONARY,
+    "name_analysis_method": DICTIONARY,
+    "summary": STRING,
+    "search_notes": STRING,
+}
+
+# Code / value standing in for a missing value in the stdlib format
+NULL_CODE = -1
+NULL_INT = -(2 ** 31)
+
+# Parquet row group size, which is also the unit chunked readers can skip to
+ROW_GROUP_SIZE = 65536
+
+def _field(record: Dict, column: str):
+    if column == "name_analysis_method":
+        return (record.get("name_analysis") or {}).get("method")
+    return record.get(column)
+
+def source_fingerprint(json_file: str) -> Dict:
+    """Size and mtime of the JSON a columnar copy was built from"""
+    stat = os.stat(json_file)
+    return {"file": os.path.basename(json_file), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def columnar_path(json_file: str, fmt: str) -> str:
+    """foo.json -> foo.parquet (pyarrow) or foo.columns (stdlib)"""
+    stem = os.path.splitext(json_file)[0]
+    return stem + (".parquet" if fmt == "parquet" else ".columns")
+
+def _resolve_format(fmt: str) -> str:
+    if fmt == "auto":
+        return "parquet" if pa is not None else "stdlib"
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("pyarrow is not installed; use --format stdlib")
+    return fmt
+
+class _Dictionary:
+    """Assigns integer codes to distinct values in first-seen order"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value) -> int:
+        if value is None:
+            return NULL_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+# Writing
+
+def write_columnar(records: Iterable[Dict], json_file: str, fmt: str = "auto") -> str:
+    """Write the columnar copy of records that were just saved to json_file; returns its path"""
+    fmt = _resolve_format(fmt)
+    records = list(records)
+    source = source_fingerprint(json_file)
+    path = columnar_path(json_file, fmt)
+
+    if fmt == "parquet":
+        _write_parquet(records, path, source)
+    else:
+        _write_stdlib(records, path, source)
+    return path
+
+def _write_stdlib(records: List[Dict], path: str, source: Dict):
+    # Written to a temporary directory and swapped in, so readers never see half a dataset
+    temp_dir = f"{path}.tmp{os.getpid()}"
+    os.makedirs(temp_dir)
+    manifest = {"format_version": FORMAT_VERSION, "num_rows": len(records), "byteorder": sys.byteorder,
+                "source": source, "columns": {}}
+
+    for column, kind in SCHEMA.items():
+        values = [_field(r, column) for r in records]
+        spec = {"kind": kind}
+
+        if kind == STRING:
+            data = bytearray()
+            offsets = array('q', [0])
+            for value in values:
+                data += (value or '').encode('utf-8')
+                offsets.append(len(data))
+            _write_file(temp_dir, f"{column}.offsets", offsets.tobytes())
+            _write_file(temp_dir, f"{column}.data", bytes(data))
+        elif kind == DICTIONARY:
+            dictionary = _Dictionary()
+            codes = array('i', (dictionary.encode(v) for v in values))
+            spec["dictionary"] = dictionary.values
+            _write_file(temp_dir, f"{column}.codes", codes.tobytes())
+        elif kind == LIST_DICTIONARY:
+            dictionary = _Dictionary()
+            codes = array('i')
+            offsets = array('q', [0])
+            for value in values:
+                codes.extend(dictionary.encode(v) for v in value or [])
+                offsets.append(len(codes))
+            spec["dictionary"] = dictionary.values
+            _write_file(temp_dir, f"{column}.offsets", offsets.tobytes())
+            _write_file(temp_dir, f"{column}.codes", codes.tobytes())
+        elif kind == INT:
+            ints = array('i', (NULL_INT if v is None else v for v in values))
+            _write_file(temp_dir, f"{column}.values", ints.tobytes())
+        elif kind == BOOL:
+            bools = array('b', (NULL_CODE if v is None else int(bool(v)) for v in values))
+            _write_file(temp_dir, f"{column}.values", bools.tobytes())
+
+        manifest["columns"][column] = spec
+
+    with open(os.path.join(temp_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.isdir(path):
+        old_dir = f"{path}.old{os.getpid()}"
+        os.rename(path, old_dir)
+        os.rename(temp_dir, path)
+        for name in os.listdir(old_dir):
+            os.remove(os.path.join(old_dir, name))
+        os.rmdir(old_dir)
+    else:
+        os.rename(temp_dir, path)
+
+def _write_file(directory: str, name: str, payload: bytes):
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(payload)
+
+def _write_parquet(records: List[Dict], path: str, source: Dict):
+    string_dictionary = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        STRING: pa.string(),
+        DICTIONARY: string_dictionary,
+        # Parquet dictionary-encodes the list values on disk; pyarrow can't read back list<dictionary> in chunks
+        LIST_DICTIONARY: pa.list_(pa.string()),
+        INT: pa.int32(),
+        BOOL: pa.bool_(),
+    }
+    schema = pa.schema([(column, types[kind]) for column, kind in SCHEMA.items()],
+                       metadata={b"source": json.dumps(source).encode('utf-8')})
+    table = pa.table({column: [_field(r, column) for r in records] for column in SCHEMA}, schema=schema)
+
+    temp_file = f"{path}.tmp{os.getpid()}"
+    pq.write_table(table, temp_file, row_group_size=ROW_GROUP_SIZE)
+    os.replace(temp_file, path)
+
+# Reading
+
+class ColumnarDataset:
+    """Read-only access to the columns of a columnar copy (either format)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_parquet = path.endswith(".parquet")
+        if self.is_parquet:
+            if pq is None:
+                raise RuntimeError(f"pyarrow is needed to read {path}")
+            self._parquet = pq.ParquetFile(path)
+            metadata = self._parquet.schema_arrow.metadata or {}
+            self.source = json.loads(metadata.get(b"source", b"{}"))
+            self.num_rows = self._parquet.metadata.num_rows
+        else:
+            with open(os.path.join(path, "manifest.json"), 'r') as f:
+                self.manifest = json.load(f)
+            self.source = self.manifest["source"]
+            self.num_rows = self.manifest["num_rows"]
+
+    def is_fresh(self, json_file: str) -> bool:
+        """True if json_file is unchanged since this copy was written"""
+        try:
+            current = source_fingerprint(json_file)
+        except OSError:
+            return True  # only the columnar copy was shipped
+        return all(self.source.get(key) == current[key] for key in ("size", "mtime_ns"))
+
+    def dictionary_column(self, column: str, start: int = 0, stop: Optional[int] = None) -> Tuple[array, List]:
+        """(codes, dictionary) of a dictionary column; missing values have code -1"""
+        if SCHEMA[column] != DICTIONARY:
+            raise ValueError(f"{column} is not a dictionary column")
+        stop = self.num_rows if stop is None else stop
+        if self.is_parquet:
+            chunked = self._read_parquet(column, start, stop).unify_dictionaries()
+            encoded = chunked.combine_chunks() if chunked.num_chunks else pa.array([], type=chunked.type)
+            codes = array('i', (NULL_CODE if c is None else c for c in encoded.indices.to_pylist()))
+            return codes, encoded.dictionary.to_pylist()
+        return self._read_array(column, "codes", 'i', start, stop), self.manifest["columns"][column]["dictionary"]
+
+    def column(self, column: str, start: int = 0, stop: Optional[int] = None) -> List:
+        """Decoded values of one column for rows [start, stop), in row order"""
+        kind = SCHEMA[column]
+        stop = self.num_rows if stop is None else stop
+        if self.is_parquet:
+            return self._read_parquet(column, start, stop).to_pylist()
+
+        if kind == STRING:
+            offsets = self._read_array(column, "offsets", 'q', start, stop + 1)
+            data = self._read_bytes(f"{column}.data", offsets[0], offsets[-1])
+            base = offsets[0]
+            return [data[offsets[i] - base:offsets[i + 1] - base].decode('utf-8') for i in range(stop - start)]
+        if kind == DICTIONARY:
+            codes, dictionary = self.dictionary_column(column, start, stop)
+            return [None if c == NULL_CODE else dictionary[c] for c in codes]
+        if kind == LIST_DICTIONARY:
+            offsets = self._read_array(column, "offsets", 'q', start, stop + 1)
+            codes = self._read_array(column, "codes", 'i', offsets[0], offsets[-1])
+            base = offsets[0]
+            dictionary = self.manifest["columns"][column]["dictionary"]
+            return [[dictionary[c] for c in codes[offsets[i] - base:offsets[i + 1] - base]]
+                    for i in range(stop - start)]
+        if kind == INT:
+            return [None if v == NULL_INT else v for v in self._read_array(column, "values", 'i', start, stop)]
+        return [None if v == NULL_CODE else bool(v) for v in self._read_array(column, "values", 'b', start, stop)]
+
+    def records(self, columns: Optional[List[str]] = None, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """Rows [start, stop) as dicts holding only the requested columns"""
+        columns = list(columns or SCHEMA)
+        values = [self.column(column, start, stop) for column in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)] if columns else []
+
+    def _read_bytes(self, name: str, start: int, stop: int) -> bytes:
+        with open(os.path.join(self.path, name), 'rb') as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+    def _read_array(self, column: str, suffix: str, typecode: str, start: int, stop: int) -> array:
+        """Elements [start, stop) of a column file, reading only that byte range"""
+        values = array(typecode)
+        values.frombytes(self._read_bytes(f"{column}.{suffix}", start * values.itemsize, stop * values.itemsize))
+        if self.manifest.get("byteorder", sys.byteorder) != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def _read_parquet(self, column: str, start: int, stop: int):
+        """Rows [start, stop) of one column, reading only the row groups that hold them"""
+        if start == 0 and stop == self.num_rows:
+            return self._parquet.read([column]).column(0)
+        groups = []
+        group_start = 0
+        first_row = None
+        for i in range(self._parquet.num_row_groups):
+            group_stop = group_start + self._parquet.metadata.row_group(i).num_rows
+            if group_start < stop and group_stop > start:
+                groups.append(i)
+                first_row = group_start if first_row is None else first_row
+            group_start = group_stop
+        if not groups:
+            return self._parquet.read([column]).column(0).slice(0, 0)
+        table = self._parquet.read_row_groups(groups, columns=[column])
+        return table.column(0).slice(start - first_row, stop - start)
+
+def find_columnar(json_file: str) -> Optional[ColumnarDataset]:
+    """The up-to-date columnar copy of json_file, if there is one this interpreter can read"""
+    for fmt in ("parquet", "stdlib"):
+        path = columnar_path(json_file, fmt)
+        if not os.path.exists(path) or (fmt == "parquet" and pq is None):
+            continue
+        dataset = ColumnarDataset(path)
+        if dataset.is_fresh(json_file):
+            return dataset
+        print(f"⚠️  {path} is older than {json_file}; reading the JSON instead")
+    return None
+
+def load_results(json_file: str, columns: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Results of json_file with (at least) the given columns, read from the
+    columnar copy when it is up to date and every column is in SCHEMA, and
+    from the JSON otherwise. Without columns the full JSON records are
+    returned: the copy holds only the analytics columns.
+    """
+    if columns is not None and all(column in SCHEMA for column in columns):
+        dataset = find_columnar(json_file)
+        if dataset is not None:
+            return dataset.records(columns)
+
+    with open(json_file, 'r') as f:
+        return json.load(f)['results']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the columnar copy of a results JSON file")
+    parser.add_argument('input', help="Results JSON file ({'results': [...]})")
+    parser.add_argument('--format', choices=['auto', 'parquet', 'stdlib'], default='auto',
+                        help="parquet needs pyarrow; auto picks parquet when it is installed (default: auto)")
+    args = parser.parse_args()
+
+    start = time.time()
+    with open(args.input, 'r') as f:
+        results = json.load(f)['results']
+    json_time = time.time() - start
+
+    path = write_columnar(results, args.input, args.format)
+    print(f"✅ Wrote {len(results)} rows to {path}")
+
+    start = time.time()
+    find_columnar(args.input).records(["gender", "total_projects"])
+    print(f"📊 Loading gender + total_projects: {time.time() - start:.3f}s columnar vs {json_time:.3f}s JSON")
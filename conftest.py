@@ -0,0 +1,2 @@
+# Manual scripts that call the OpenAI API or write demo caches; run them directly, not under pytest
+collect_ignore = ["test_assistants.py", "test_cache.py", "test_openai_v2.py", "test_web_search.py"]
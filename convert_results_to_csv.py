@@ -3,95 +3,72 @@
 Convert CI analysis results to CSV format for further analysis.
 """
 
-import json
+import argparse
 import csv
 from pathlib import Path
+import columnar
+from facet_cube import FacetCube, load_cube
+from result_store import ResultStore
 
-def convert_to_csv():
-    # Read the JSON results
-    with open('ci_short_search_results.json', 'r') as f:
-        data = json.load(f)
+def load_results(input_file='ci_short_search_results.json', store_path=None):
+    """Load tier-1 results from the JSON file, or query them from the result store"""
+    if store_path:
+        with ResultStore(store_path) as store:
+            return list(store.iter_search_results())
     
-    results = data['results']
-    
-    # Create CSV output
-    output_file = 'data/output/australian_academics_gender_analysis.csv'
-    Path('data/output').mkdir(parents=True, exist_ok=True)
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'name',
-            'primary_affiliation', 
-            'all_affiliations',
-            'gender',
-            'confidence',
-            'summary',
-            'research_areas',
-            'web_sources_found',
-            'search_successful',
-            'search_notes'
-        ]
-        
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for entry in results:
-            # Process affiliations
-            affiliations = entry.get('affiliations', [])
-            primary_affiliation = affiliations[0] if affiliations else ''
-            all_affiliations = '; '.join(affiliations)
-            
-            # Process research areas
-            research_areas = '; '.join(entry.get('research_areas', []))
-            
-            # Clean summary (remove potential CSV issues)
-            summary = entry.get('summary', '').replace('\n', ' ').replace('\r', ' ')
-            
-            writer.writerow({
-                'name': entry.get('name', ''),
-                'primary_affiliation': primary_affiliation,
-                'all_affiliations': all_affiliations,
-                'gender': entry.get('gender', 'unknown'),
-                'confidence': entry.get('confidence', 'unknown'),
-                'summary': summary,
-                'research_areas': research_areas,
-                'web_sources_found': entry.get('web_sources_found', 0),
-                'search_successful': entry.get('search_successful', False),
-                'search_notes': entry.get('search_notes', '')
-            })
-    
-    print(f"Converted {len(results)} entries to {output_file}")
-    
-    # Create a summary statistics file
-    summary_file = 'data/output/gender_analysis_statistics.csv'
+    return columnar.load_results(input_file)
+
+OUTPUT_DIR = 'data/output'
+RESULTS_CSV = 'australian_academics_gender_analysis.csv'
+STATISTICS_CSV = 'gender_analysis_statistics.csv'
+
+FIELDNAMES = [
+    'name',
+    'primary_affiliation', 
+    'all_affiliations',
+    'gender',
+    'confidence',
+    'summary',
+    'research_areas',
+    'web_sources_found',
+    'search_successful',
+    'search_notes'
+]
+
+def csv_row(entry):
+    """One result flattened to a row of the results CSV"""
+    # Process affiliations
+    affiliations = entry.get('affiliations', [])
+    primary_affiliation = affiliations[0] if affiliations else ''
+    all_affiliations = '; '.join(affiliations)
     
-    # Calculate statistics
-    gender_counts = {}
-    confidence_counts = {}
-    affiliation_gender = {}
+    # Process research areas
+    research_areas = '; '.join(entry.get('research_areas', []))
     
-    for entry in results:
-        gender = entry.get('gender', 'unknown')
-        confidence = entry.get('confidence', 'unknown')
-        
-        gender_counts[gender] = gender_counts.get(gender, 0) + 1
-        confidence_counts[confidence] = confidence_counts.get(confidence, 0) + 1
-        
-        # Track by primary affiliation
-        primary_aff = entry.get('affiliations', ['Unknown'])[0]
-        if primary_aff not in affiliation_gender:
-            affiliation_gender[primary_aff] = {'male': 0, 'female': 0, 'unknown': 0, 'total': 0}
-        affiliation_gender[primary_aff][gender] += 1
-        affiliation_gender[primary_aff]['total'] += 1
+    # Clean summary (remove potential CSV issues)
+    summary = entry.get('summary', '').replace('\n', ' ').replace('\r', ' ')
     
-    # Write summary statistics
+    return {
+        'name': entry.get('name', ''),
+        'primary_affiliation': primary_affiliation,
+        'all_affiliations': all_affiliations,
+        'gender': entry.get('gender', 'unknown'),
+        'confidence': entry.get('confidence', 'unknown'),
+        'summary': summary,
+        'research_areas': research_areas,
+        'web_sources_found': entry.get('web_sources_found', 0),
+        'search_successful': entry.get('search_successful', False),
+        'search_notes': entry.get('search_notes', '')
+    }
+
+def write_statistics_csv(summary_file, total, gender_counts, confidence_counts, affiliation_gender):
+    """Write the overall and per-institution statistics table"""
     with open(summary_file, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
         
         # Overall statistics
         writer.writerow(['OVERALL STATISTICS'])
         writer.writerow(['Category', 'Count', 'Percentage'])
-        total = len(results)
         
         for gender, count in sorted(gender_counts.items()):
             percentage = (count / total) * 100
@@ -122,8 +99,38 @@ def convert_to_csv():
                     counts['unknown'],
                     f'{female_pct:.1f}%'
                 ])
+
+def convert_to_csv(input_file='ci_short_search_results.json', store_path=None):
+    # Read the results
+    results = load_results(input_file, store_path)
+    
+    # Create CSV output
+    output_file = f'{OUTPUT_DIR}/{RESULTS_CSV}'
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+    
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        
+        for entry in results:
+            writer.writerow(csv_row(entry))
+    
+    print(f"Converted {len(results)} entries to {output_file}")
+    
+    # Create a summary statistics file
+    summary_file = f'{OUTPUT_DIR}/{STATISTICS_CSV}'
+    
+    # Statistics come from the facet cube of the input (gender by primary affiliation included)
+    cube = FacetCube.from_records(results) if store_path else load_cube(input_file, results)
+    write_statistics_csv(summary_file, cube.total, cube.counts_by('gender'), cube.counts_by('confidence'),
+                         cube.gender_by('institution', totals=True))
     
     print(f"Summary statistics saved to {summary_file}")
 
 if __name__ == "__main__":
-    convert_to_csv()
+    parser = argparse.ArgumentParser(description="Convert CI analysis results to CSV")
+    parser.add_argument('--input', default='ci_short_search_results.json', help="Results JSON file")
+    parser.add_argument('--store', metavar='DB', help="Read results from this SQLite result store instead")
+    args = parser.parse_args()
+    
+    convert_to_csv(args.input, args.store)
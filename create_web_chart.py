@@ -2,36 +2,126 @@
 """
 Script to create a web-optimized gender ratio chart excluding 1-2 project entries
 and generate HTML/CSS for embedding in index.html
+
+The chart is keyed on a hash of the aggregated project data, the style
+parameters and this script. A matching PNG in .chart_cache/ is reused as-is;
+otherwise the figure is rendered once and both the PNG file and the base64
+payload come from that single render.
+
+The project data and the Key Insights percentages are read from the facet
+cube of the results (facet_cube.py), so they always match the data.
 """
 
+import argparse
+import hashlib
 import json
-import matplotlib.pyplot as plt
+import os
 import numpy as np
-from collections import defaultdict
+from facet_cube import load_cube
 import base64
 from io import BytesIO
 
-def load_data(filename):
-    """Load the gender data with project counts"""
-    with open(filename, 'r') as f:
-        data = json.load(f)
-    return data['results']
+CHART_FILE = 'gender_chart_web.png'
+CHART_CACHE_DIR = '.chart_cache'
+# Cached renders kept (most recently used first)
+CHART_CACHE_SIZE = 20
+
+WEB_CHART_STYLE = {
+    'figsize': [12, 6],
+    'dpi': 150,
+    'bar_width': 0.6,
+    'male_color': '#4472C4',
+    'female_color': '#E15759',
+    'unknown_color': '#70AD47',
+    'title': 'Gender Distribution by Project Count\n(Chief Investigators with 3+ Discovery Projects)',
+}
+
+# Project count from which researchers count as high-impact in the Key Insights
+HIGH_IMPACT_PROJECTS = 6
 
-def analyze_gender_by_projects(researchers, min_projects=3):
+def analyze_gender_by_projects(cube, min_projects=3):
     """Analyze gender distribution by project count, excluding entries below min_projects"""
-    
-    project_gender_data = defaultdict(lambda: {'male': 0, 'female': 0, 'unknown': 0})
-    
-    for researcher in researchers:
-        project_count = researcher.get('total_projects', 0)
-        if project_count >= min_projects:  # Filter out low project counts
-            gender = researcher.get('gender', 'unknown')
-            project_gender_data[project_count][gender] += 1
-    
-    return dict(project_gender_data)
+    return cube.gender_by('projects', min_projects=min_projects)
+
+def key_insights(project_data, high_impact=HIGH_IMPACT_PROJECTS):
+    """Percentages quoted in the Key Insights, computed from the project data (None if it is empty)"""
+    def share(rows, gender):
+        total = sum(sum(row.values()) for row in rows)
+        return sum(row[gender] for row in rows) / total * 100 if total else 0
+    
+    if not project_data:
+        return None
+    lowest = min(project_data)
+    # Fall back to the highest count present when nobody has high_impact projects
+    high_impact = high_impact if high_impact in project_data else max(project_data)
+    return {
+        'lowest': lowest,
+        'high_impact': high_impact,
+        'female_pct_lowest': share([project_data[lowest]], 'female'),
+        'female_pct_high_impact': share([project_data[high_impact]], 'female'),
+        'male_pct_high_impact_plus': share([row for pc, row in project_data.items() if pc >= high_impact], 'male'),
+    }
 
-def create_web_optimized_chart(project_data):
-    """Create a web-optimized chart for embedding in HTML"""
+def chart_cache_key(project_data, style):
+    """Hash of everything that determines the rendered chart"""
+    with open(__file__, 'rb') as f:
+        script_hash = hashlib.sha256(f.read()).hexdigest()
+    payload = json.dumps({
+        'data': sorted((int(pc), counts) for pc, counts in project_data.items()),
+        'style': style,
+        'script': script_hash,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def write_if_changed(path, payload):
+    """Write bytes to path unless it already holds exactly them (keeps the mtime for up-to-date checks)"""
+    if os.path.exists(path) and os.path.getsize(path) == len(payload):
+        with open(path, 'rb') as f:
+            if f.read() == payload:
+                return False
+    with open(path, 'wb') as f:
+        f.write(payload)
+    return True
+
+def prune_chart_cache(cache_dir, keep=CHART_CACHE_SIZE):
+    """Drop all but the most recently used cached renders"""
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith('.png')]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        os.remove(path)
+
+def create_web_optimized_chart(project_data, style=None, output_file=CHART_FILE, cache_dir=CHART_CACHE_DIR):
+    """
+    Create a web-optimized chart for embedding in HTML; returns the PNG as
+    base64. Pass cache_dir=None to always render.
+    """
+    style = dict(WEB_CHART_STYLE, **(style or {}))
+    
+    cached_file = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cached_file = os.path.join(cache_dir, f"{chart_cache_key(project_data, style)}.png")
+    
+    if cached_file and os.path.exists(cached_file):
+        print("♻️  Chart data and style unchanged; reusing the cached render")
+        with open(cached_file, 'rb') as f:
+            png = f.read()
+        os.utime(cached_file)
+    else:
+        png = render_chart_png(project_data, style)
+        if cached_file:
+            with open(cached_file + '.tmp', 'wb') as f:
+                f.write(png)
+            os.replace(cached_file + '.tmp', cached_file)
+            prune_chart_cache(cache_dir)
+    
+    write_if_changed(output_file, png)
+    return base64.b64encode(png).decode('utf-8')
+
+def render_chart_png(project_data, style):
+    """Render the chart once and return the PNG bytes"""
+    # Imported here so cache hits don't pay for loading matplotlib
+    import matplotlib.pyplot as plt
     
     # Prepare data for plotting
     project_counts = sorted(project_data.keys())
@@ -46,16 +136,16 @@ def create_web_optimized_chart(project_data):
     
     # Create figure
     plt.style.use('default')
-    fig, ax = plt.subplots(1, 1, figsize=(12, 6))
+    fig, ax = plt.subplots(1, 1, figsize=tuple(style['figsize']))
     
     # Create stacked bar chart with percentages
     x = np.arange(len(project_counts))
-    width = 0.6
+    width = style['bar_width']
     
     # Color scheme matching the website
-    male_color = '#4472C4'
-    female_color = '#E15759'
-    unknown_color = '#70AD47'
+    male_color = style['male_color']
+    female_color = style['female_color']
+    unknown_color = style['unknown_color']
     
     p1 = ax.bar(x, male_pct, width, label='Male', color=male_color, alpha=0.8)
     p2 = ax.bar(x, female_pct, width, bottom=male_pct, label='Female', color=female_color, alpha=0.8)
@@ -66,8 +156,7 @@ def create_web_optimized_chart(project_data):
     # Customize the chart
     ax.set_xlabel('Number of Discovery Projects', fontsize=12, fontweight='bold')
     ax.set_ylabel('Percentage of Researchers', fontsize=12, fontweight='bold')
-    ax.set_title('Gender Distribution by Project Count\n(Chief Investigators with 3+ Discovery Projects)', 
-                fontsize=14, fontweight='bold', pad=20)
+    ax.set_title(style['title'], fontsize=14, fontweight='bold', pad=20)
     
     ax.set_xticks(x)
     ax.set_xticklabels(project_counts)
@@ -105,21 +194,16 @@ def create_web_optimized_chart(project_data):
     
     plt.tight_layout()
     
-    # Save as high-quality PNG for web
-    plt.savefig('gender_chart_web.png', dpi=150, bbox_inches='tight', 
-                facecolor='white', edgecolor='none')
-    
-    # Convert to base64 for embedding
+    # Render once as high-quality PNG; the file and the base64 payload share these bytes
     buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
+    plt.savefig(buffer, format='png', dpi=style['dpi'], bbox_inches='tight', 
                 facecolor='white', edgecolor='none')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    png = buffer.getvalue()
     buffer.close()
     
-    plt.close()
+    plt.close(fig)
     
-    return image_base64
+    return png
 
 def generate_html_section(image_base64, project_data):
     """Generate HTML section with the chart and statistics"""
@@ -135,6 +219,17 @@ def generate_html_section(image_base64, project_data):
     female_pct = (total_female / total_researchers * 100) if total_researchers > 0 else 0
     unknown_pct = (total_unknown / total_researchers * 100) if total_researchers > 0 else 0
     
+    insights = key_insights(project_data)
+    if insights is None:
+        insight_items = '\n                <li>No researchers with 3+ projects in the data yet</li>'
+    else:
+        gap_widens = insights['female_pct_high_impact'] < insights['female_pct_lowest']
+        insight_items = (f"\n                <li><strong>Gender Gap {'Widens' if gap_widens else 'Narrows'}:</strong> Female representation {'decreases' if gap_widens else 'increases'} from {insights['female_pct_lowest']:.1f}% ({insights['lowest']} projects) to {insights['female_pct_high_impact']:.1f}% ({insights['high_impact']} projects)</li>"
+                         f"\n                <li><strong>High-Impact Researchers:</strong> Among researchers with {insights['high_impact']}+ projects, males represent {insights['male_pct_high_impact_plus']:.1f}% of the cohort</li>")
+        if gap_widens:
+            insight_items += ('\n                <li><strong>Leadership Pipeline:</strong> The data suggests a "leaky pipeline" '
+                              'where female participation diminishes at higher productivity levels</li>')
+    
     html_section = f'''
         <div class="stats" style="border-left: 4px solid #007acc; background: #f8f9ff;">
             <h3>📈 Gender Distribution by Project Count</h3>
@@ -162,10 +257,7 @@ def generate_html_section(image_base64, project_data):
             </div>
             
             <p><strong>Key Insights:</strong></p>
-            <ul>
-                <li><strong>Gender Gap Widens:</strong> Female representation decreases from 23.6% (3 projects) to 15.1% (6 projects)</li>
-                <li><strong>High-Impact Researchers:</strong> Among researchers with 6+ projects, males represent 76.9%+ of the cohort</li>
-                <li><strong>Leadership Pipeline:</strong> The data suggests a "leaky pipeline" where female participation diminishes at higher productivity levels</li>
+            <ul>{insight_items}
             </ul>
             <p><em>Note: Analysis excludes researchers with 1-2 projects to focus on established researchers. Data represents Chief Investigators in the Australian Discovery Projects system.</em></p>
         </div>'''
@@ -175,26 +267,30 @@ def generate_html_section(image_base64, project_data):
 def main():
     """Main function"""
     
+    parser = argparse.ArgumentParser(description="Create the web chart and its HTML section")
+    parser.add_argument('--no-cache', action='store_true', help="Always re-render the chart")
+    args = parser.parse_args()
+    
     print("📊 Creating web-optimized gender distribution chart...")
     
-    # Load data
+    # Load the facet cube (rebuilt from the data if it changed)
     try:
-        researchers = load_data('ci_gender_with_projects.json')
-        print(f"✅ Loaded {len(researchers)} researchers")
+        cube = load_cube('ci_gender_with_projects.json')
+        print(f"✅ Loaded facet cube of {cube.total} researchers")
     except FileNotFoundError:
         print("❌ Error: ci_gender_with_projects.json not found!")
         return
     
     # Analyze data (exclude 1-2 projects)
     print("🔍 Analyzing gender distribution (3+ projects only)...")
-    project_data = analyze_gender_by_projects(researchers, min_projects=3)
+    project_data = analyze_gender_by_projects(cube, min_projects=3)
     
     total_analyzed = sum(sum(project_data[pc].values()) for pc in project_data.keys())
     print(f"📈 Analyzing {total_analyzed} researchers with 3+ projects")
     
     # Create chart
     print("🎨 Creating web-optimized chart...")
-    image_base64 = create_web_optimized_chart(project_data)
+    image_base64 = create_web_optimized_chart(project_data, cache_dir=None if args.no_cache else CHART_CACHE_DIR)
     
     # Generate HTML
     print("📝 Generating HTML section...")
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Precomputed facet cube of a results file: researcher counts for every
+combination of gender x confidence x primary institution x project count x
+analysis tier that occurs.
+
+The cube is a few hundred cells, written next to the results as
+foo.cube.json. Dashboard numbers are sums of matching cells, so they need
+neither the records nor a scan over them:
+    cube = load_cube('ci_gender_with_projects.json')
+    cube.count(gender='female', min_projects=6)
+    cube.gender_by('projects', min_projects=3)   # same table as GenderTable.by_projects(3)
+
+Like the columnar copy, the cube records the size and mtime of the results
+file; load_cube() rebuilds it when the file has changed since.
+
+Researchers without a matched project count fall in the projects bucket
+"unknown", after the numeric counts.
+
+Analysis tiers (see README): web_search (tier 1 result), name_analysis
+(gender from the tier-2 name analysis), manual_review (still unknown after
+tier 2).
+
+Usage:
+    python facet_cube.py ci_gender_with_projects.json
+    python facet_cube.py ci_gender_with_projects.json --by institution --min-projects 6
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import columnar
+from gender_stats import GENDERS, encode
+
+CUBE_FORMAT_VERSION = 2
+DIMENSIONS = ('gender', 'confidence', 'institution', 'projects', 'tier')
+TIERS = ['web_search', 'name_analysis', 'manual_review']
+UNKNOWN_PROJECTS = 'unknown'
+
+# Columns read from the results (or their columnar copy) to build the cube
+CUBE_COLUMNS = ['gender', 'confidence', 'affiliations', 'total_projects', 'name_analysis_method']
+
+def analysis_tier(record: Dict) -> str:
+    method = record.get('name_analysis_method') or (record.get('name_analysis') or {}).get('method')
+    if method is None:
+        return 'web_search'
+    return 'manual_review' if record.get('gender', 'unknown') == 'unknown' else 'name_analysis'
+
+def cube_path(json_file: str) -> str:
+    """foo.json -> foo.cube.json"""
+    return os.path.splitext(json_file)[0] + '.cube.json'
+
+class FacetCube:
+    """Sparse cube: one row of category codes (in DIMENSIONS order) and a count per non-empty cell"""
+
+    def __init__(self, categories: Dict[str, List], coords: np.ndarray, counts: np.ndarray,
+                 source: Optional[Dict] = None):
+        self.categories = categories
+        self.coords = coords
+        self.counts = counts
+        self.source = source
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], source: Optional[Dict] = None) -> 'FacetCube':
+        """Count records per cell; defaults for missing fields follow GenderTable.from_records"""
+        records = list(records)
+        projects = [r.get('total_projects', 0) for r in records]
+        known_projects = sorted({p for p in projects if p is not None})
+        codes, categories = {}, {}
+        # Categories keep first-seen order (as gender_stats tables do); project counts are
+        # ascending, with unmatched researchers in a trailing UNKNOWN_PROJECTS bucket
+        codes['gender'], categories['gender'] = encode(r.get('gender', 'unknown') for r in records)
+        codes['confidence'], categories['confidence'] = encode(r.get('confidence', 'unknown') for r in records)
+        codes['institution'], categories['institution'] = encode((r.get('affiliations') or ['Unknown'])[0]
+                                                                 for r in records)
+        codes['projects'], categories['projects'] = encode((UNKNOWN_PROJECTS if p is None else p for p in projects),
+                                                           known_projects)
+        codes['tier'], categories['tier'] = encode(map(analysis_tier, records), TIERS)
+
+        shape = tuple(max(1, len(categories[dimension])) for dimension in DIMENSIONS)
+        if records:
+            flat = np.ravel_multi_index([codes[dimension] for dimension in DIMENSIONS], shape)
+            cells, counts = np.unique(flat, return_counts=True)
+        else:
+            cells, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        coords = np.stack(np.unravel_index(cells, shape), axis=1).astype(np.int64)
+        return cls(categories, coords.reshape(-1, len(DIMENSIONS)), counts.astype(np.int64), source)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FacetCube':
+        cells = np.array(data['cells'], dtype=np.int64).reshape(-1, len(DIMENSIONS) + 1)
+        return cls(data['categories'], cells[:, :-1], cells[:, -1], data.get('source'))
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": CUBE_FORMAT_VERSION,
+            "source": self.source,
+            "total": self.total,
+            "dimensions": list(DIMENSIONS),
+            "categories": self.categories,
+            "cells": [[int(code) for code in coords] + [int(count)] for coords, count in zip(self.coords, self.counts)],
+        }
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def mask(self, min_projects: Optional[int] = None, **filters) -> np.ndarray:
+        """
+        Cells matching every filter: dimension=value or dimension=[values]
+        (None means no filter), plus min_projects on the project count
+        """
+        mask = np.ones(len(self.counts), dtype=bool)
+        for dimension, wanted in filters.items():
+            if wanted is None:
+                continue
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension {dimension!r}; expected one of {', '.join(DIMENSIONS)}")
+            values = wanted if isinstance(wanted, (list, tuple, set, range)) else [wanted]
+            categories = self.categories[dimension]
+            axis = DIMENSIONS.index(dimension)
+            mask &= np.isin(self.coords[:, axis], [categories.index(value) for value in values if value in categories])
+        if min_projects is not None:
+            axis = DIMENSIONS.index('projects')
+            wanted = [code for code, projects in enumerate(self.categories['projects'])
+                      if projects != UNKNOWN_PROJECTS and projects >= min_projects]
+            mask &= np.isin(self.coords[:, axis], wanted)
+        return mask
+
+    def count(self, **filters) -> int:
+        return int(self.counts[self.mask(**filters)].sum())
+
+    def counts_by(self, dimension: str, **filters) -> Dict:
+        """{value: researchers} for the values of a dimension with any match, in category order"""
+        mask = self.mask(**filters)
+        categories = self.categories[dimension]
+        counts = np.bincount(self.coords[mask, DIMENSIONS.index(dimension)], weights=self.counts[mask],
+                             minlength=len(categories))
+        return {categories[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def gender_by(self, dimension: str, totals: bool = False, **filters) -> Dict:
+        """
+        {value: {'male', 'female', 'unknown'(, 'total')}} for the values of a
+        dimension with any such researcher; other gender values are left out,
+        as in the gender_stats crosstabs
+        """
+        rows = {}
+        for gender in GENDERS:
+            for value, count in self.counts_by(dimension, gender=gender, **filters).items():
+                rows.setdefault(value, {})[gender] = count
+        categories = self.categories[dimension]
+        table = {}
+        for value in sorted(rows, key=categories.index):
+            row = {gender: rows[value].get(gender, 0) for gender in GENDERS}
+            if totals:
+                row['total'] = sum(row.values())
+            table[value] = row
+        return table
+
+def write_cube(cube: FacetCube, path: str):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(cube.to_dict(), f, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+
+def build_cube(json_file: str, records: Optional[List[Dict]] = None) -> FacetCube:
+    """
+    Build the cube of json_file and write it. Pass records if the caller
+    already loaded them; otherwise they are read (through the columnar copy
+    when it is fresh).
+    """
+    source = columnar.source_fingerprint(json_file)
+    if records is None:
+        records = columnar.load_results(json_file, columns=CUBE_COLUMNS)
+    cube = FacetCube.from_records(records, source)
+    write_cube(cube, cube_path(json_file))
+    return cube
+
+def load_cube(json_file: str, records: Optional[List[Dict]] = None) -> FacetCube:
+    """The cube of json_file, rebuilt first (from records, if given) if it is missing or older than the file"""
+    path = cube_path(json_file)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') == CUBE_FORMAT_VERSION and data.get('source') == columnar.source_fingerprint(json_file):
+            return FacetCube.from_dict(data)
+    return build_cube(json_file, records)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the facet cube of a results file and query it")
+    parser.add_argument('input', help="Results JSON file ({'results': [...]})")
+    parser.add_argument('--by', choices=DIMENSIONS, help="Print the gender breakdown by this dimension")
+    parser.add_argument('--min-projects', type=int, help="Only count researchers with at least this many projects")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Error: {args.input} not found!")
+        raise SystemExit(1)
+
+    start = time.time()
+    cube = build_cube(args.input)
+    path = cube_path(args.input)
+    print(f"✅ Wrote {len(cube.counts)} cells for {cube.total} researchers to {path} "
+          f"({os.path.getsize(path) / 1024:.1f} KB, {time.time() - start:.2f}s)")
+
+    if args.by:
+        print(f"\n{args.by:<45} {'male':>6} {'female':>7} {'unknown':>8} {'total':>6}")
+        for value, row in cube.gender_by(args.by, totals=True, min_projects=args.min_projects).items():
+            print(f"{str(value):<45} {row['male']:>6} {row['female']:>7} {row['unknown']:>8} {row['total']:>6}")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Vectorized gender statistics shared by the analyzers, CSV export, charts and
+progress monitor.
+
+Records are encoded once into integer code arrays (gender, confidence,
+primary institution) plus project counts and search outcomes. Every
+published table is then a NumPy bincount over those codes instead of a
+dict-counting loop:
+- gender x project count   (charts)
+- gender x confidence
+- gender x institution     (CSV statistics)
+- search success / web sources
+
+Categories keep first-seen order, so tables iterate in the same order as
+the dict loops they replace.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Crosstab columns; other gender values are counted overall but not cross-tabulated
+GENDERS = ['male', 'female', 'unknown']
+
+def encode(values: Iterable, categories: Optional[List] = None) -> Tuple[np.ndarray, List]:
+    """Integer codes for values, with categories in first-seen order (after any given ones)"""
+    index = {category: code for code, category in enumerate(categories or [])}
+    categories = list(categories or [])
+    codes = []
+    for value in values:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(categories)
+            categories.append(value)
+        codes.append(code)
+    return np.array(codes, dtype=np.int64), categories
+
+def crosstab(row_codes: np.ndarray, n_rows: int, col_codes: np.ndarray, n_cols: int) -> np.ndarray:
+    """n_rows x n_cols table of counts of each (row, col) code pair"""
+    flat = np.bincount(row_codes * n_cols + col_codes, minlength=n_rows * n_cols)
+    return flat.reshape(n_rows, n_cols)
+
+def counts_by_first_seen(codes: np.ndarray, categories: List) -> Dict:
+    """{category: count} for categories present in codes, in first-seen order"""
+    if not len(codes):
+        return {}
+    counts = np.bincount(codes, minlength=len(categories))
+    present, first_index = np.unique(codes, return_index=True)
+    return {categories[code]: int(counts[code]) for code in present[np.argsort(first_index)]}
+
+def value_counts(values: Iterable) -> Dict:
+    """{value: count} in first-seen order"""
+    codes, categories = encode(values)
+    return counts_by_first_seen(codes, categories)
+
+def _gender_rows(table: np.ndarray, labels: List, extra: Optional[Dict] = None) -> Dict:
+    rows = {}
+    for label, counts in zip(labels, table):
+        row = {gender: int(count) for gender, count in zip(GENDERS, counts)}
+        if extra is not None:
+            row.update({key: fn(counts) for key, fn in extra.items()})
+        rows[label] = row
+    return rows
+
+class GenderTable:
+    """Researchers encoded as parallel arrays, ready for any gender crosstab"""
+
+    def __init__(self, gender: np.ndarray, genders: List, confidence: np.ndarray, confidences: List,
+                 institution: np.ndarray, institutions: List, total_projects: np.ndarray, has_projects: np.ndarray,
+                 search_successful: np.ndarray, web_sources_found: np.ndarray):
+        self.gender, self.genders = gender, genders
+        self.confidence, self.confidences = confidence, confidences
+        self.institution, self.institutions = institution, institutions
+        self.total_projects = total_projects
+        self.has_projects = has_projects
+        self.search_successful = search_successful
+        self.web_sources_found = web_sources_found
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'GenderTable':
+        """Encode result dicts (missing fields default like the scripts' .get() calls did)"""
+        records = list(records)
+        gender, genders = encode((r.get('gender', 'unknown') for r in records), GENDERS)
+        confidence, confidences = encode(r.get('confidence', 'unknown') for r in records)
+        institution, institutions = encode((r.get('affiliations') or ['Unknown'])[0] for r in records)
+        projects = [r.get('total_projects', 0) for r in records]
+        return cls(
+            gender, genders, confidence, confidences, institution, institutions,
+            total_projects=np.array([p or 0 for p in projects], dtype=np.int64),
+            has_projects=np.array([p is not None for p in projects], dtype=bool),
+            search_successful=np.array([bool(r.get('search_successful')) for r in records], dtype=bool),
+            web_sources_found=np.array([r.get('web_sources_found', 0) or 0 for r in records], dtype=np.int64),
+        )
+
+    @classmethod
+    def from_columnar(cls, dataset) -> 'GenderTable':
+        """Encode a columnar.ColumnarDataset, reusing its dictionary codes for gender and confidence"""
+        def recode(column, prefix=None):
+            codes, dictionary = dataset.dictionary_column(column)
+            _, categories = encode(dictionary + ['unknown'], prefix)
+            # Missing values (code -1) pick the trailing 'unknown' entry
+            lookup = np.array([categories.index(value) for value in dictionary + ['unknown']], dtype=np.int64)
+            return lookup[np.asarray(codes, dtype=np.int64)], categories
+
+        gender, genders = recode('gender', GENDERS)
+        confidence, confidences = recode('confidence')
+        institution, institutions = encode((affiliations or ['Unknown'])[0]
+                                           for affiliations in dataset.column('affiliations'))
+        projects = dataset.column('total_projects')
+        return cls(
+            gender, genders, confidence, confidences, institution, institutions,
+            total_projects=np.array([p or 0 for p in projects], dtype=np.int64),
+            has_projects=np.array([p is not None for p in projects], dtype=bool),
+            search_successful=np.array([bool(s) for s in dataset.column('search_successful')], dtype=bool),
+            web_sources_found=np.array([w or 0 for w in dataset.column('web_sources_found')], dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.gender)
+
+    def select(self, mask: np.ndarray) -> 'GenderTable':
+        """The researchers where mask is True, keeping the same categories"""
+        return GenderTable(
+            self.gender[mask], self.genders, self.confidence[mask], self.confidences,
+            self.institution[mask], self.institutions, self.total_projects[mask], self.has_projects[mask],
+            self.search_successful[mask], self.web_sources_found[mask],
+        )
+
+    def mask_for(self, institution: Optional[str] = None, confidence: Optional[str] = None) -> np.ndarray:
+        """Boolean mask of researchers at a primary institution and/or with a confidence level"""
+        mask = np.ones(len(self), dtype=bool)
+        for codes, categories, value in ((self.institution, self.institutions, institution),
+                                         (self.confidence, self.confidences, confidence)):
+            if value is not None:
+                mask &= codes == (categories.index(value) if value in categories else -1)
+        return mask
+
+    def institution_totals(self) -> Dict[str, int]:
+        """{primary institution: researchers}, largest first"""
+        counts = np.bincount(self.institution, minlength=len(self.institutions))
+        order = sorted(range(len(self.institutions)), key=lambda code: -counts[code])
+        return {self.institutions[code]: int(counts[code]) for code in order if counts[code]}
+
+    def _crosstab_genders(self, row_codes: np.ndarray, n_rows: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """n_rows x GENDERS table; row_codes (and mask) are aligned with the researchers"""
+        keep = self.gender < len(GENDERS)
+        if mask is not None:
+            keep &= mask
+        return crosstab(row_codes[keep], n_rows, self.gender[keep], len(GENDERS))
+
+    def gender_counts(self) -> Dict[str, int]:
+        return counts_by_first_seen(self.gender, self.genders)
+
+    def confidence_counts(self) -> Dict[str, int]:
+        return counts_by_first_seen(self.confidence, self.confidences)
+
+    def by_projects(self, min_projects: Optional[int] = None) -> Dict[int, Dict[str, int]]:
+        """{project count: {'male', 'female', 'unknown'}} over researchers with a project count"""
+        mask = self.has_projects.copy()
+        if min_projects is not None:
+            mask &= self.total_projects >= min_projects
+        # Researchers without a project count (no match) are left out
+        project_counts, codes = np.unique(self.total_projects, return_inverse=True)
+        table = self._crosstab_genders(codes.reshape(-1), len(project_counts), mask)
+        return {pc: row for pc, row in _gender_rows(table, [int(pc) for pc in project_counts]).items()
+                if sum(row.values())}
+
+    def by_confidence(self) -> Dict[str, Dict[str, int]]:
+        table = self._crosstab_genders(self.confidence, len(self.confidences))
+        return {label: row for label, row in _gender_rows(table, self.confidences).items() if sum(row.values())}
+
+    def by_institution(self) -> Dict[str, Dict[str, int]]:
+        """{primary institution: {'male', 'female', 'unknown', 'total'}} in first-seen order"""
+        table = self._crosstab_genders(self.institution, len(self.institutions))
+        return _gender_rows(table, self.institutions, extra={'total': lambda counts: int(counts.sum())})
+
+    def search_stats(self) -> Dict[str, int]:
+        return {
+            'successful_searches': int(self.search_successful.sum()),
+            'total_sources': int(self.web_sources_found.sum()),
+        }
+
+    def summary(self) -> Dict:
+        """Every published table at once"""
+        return {
+            'total': len(self),
+            'gender_counts': self.gender_counts(),
+            'confidence_counts': self.confidence_counts(),
+            'by_projects': self.by_projects(),
+            'by_confidence': self.by_confidence(),
+            'by_institution': self.by_institution(),
+            **self.search_stats(),
+        }
+
+def print_summary_statistics(project_data):
+    """Print the gender by project count table (the by_projects crosstab)"""
+    
+    print("\n" + "="*80)
+    print("GENDER DISTRIBUTION BY PROJECT COUNT - SUMMARY")
+    print("="*80)
+    
+    project_counts = sorted(project_data.keys())
+    
+    print(f"{'Projects':<10} {'Total':<8} {'Male':<6} {'Female':<8} {'Unknown':<8} {'Male%':<7} {'Female%':<9} {'F/M Ratio':<8}")
+    print("-" * 80)
+    
+    total_researchers = 0
+    total_male = 0
+    total_female = 0
+    total_unknown = 0
+    
+    for pc in project_counts:
+        male = project_data[pc]['male']
+        female = project_data[pc]['female']
+        unknown = project_data[pc]['unknown']
+        total = male + female + unknown
+        
+        male_pct = (male / total * 100) if total > 0 else 0
+        female_pct = (female / total * 100) if total > 0 else 0
+        ratio = (female / male) if male > 0 else 0
+        
+        print(f"{pc:<10} {total:<8} {male:<6} {female:<8} {unknown:<8} {male_pct:<6.1f}% {female_pct:<8.1f}% {ratio:<8.2f}")
+        
+        total_researchers += total
+        total_male += male
+        total_female += female
+        total_unknown += unknown
+    
+    print("-" * 80)
+    overall_male_pct = (total_male / total_researchers * 100) if total_researchers > 0 else 0
+    overall_female_pct = (total_female / total_researchers * 100) if total_researchers > 0 else 0
+    overall_ratio = (total_female / total_male) if total_male > 0 else 0
+    
+    print(f"{'TOTAL':<10} {total_researchers:<8} {total_male:<6} {total_female:<8} {total_unknown:<8} {overall_male_pct:<6.1f}% {overall_female_pct:<8.1f}% {overall_ratio:<8.2f}")
+    print("="*80)
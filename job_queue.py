@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed job queue for spreading tier-1 web search analysis over
+several worker processes.
+
+CIs are enqueued once into the result store database. Each worker process
+claims a batch of jobs under a lease, keeps the lease alive with heartbeats
+while it works, and commits every result together with its job's completion
+in one transaction. A result is only accepted from the worker that currently
+holds the job's lease, so a job whose lease expired (crashed or stalled
+worker) and was re-claimed by someone else is still recorded exactly once.
+
+Workers can run as local processes (--processes) or on other hosts that see
+the same database file; each process may use its own API key.
+
+Usage:
+    python job_queue.py enqueue ci_full.json --store results.db
+    python job_queue.py work --processes 4 --threads 2 --store results.db
+    python job_queue.py status --store results.db
+    python job_queue.py export ci_full_search_results.json --store results.db
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+from result_store import DEFAULT_STORE, ResultStore
+from retry_policy import is_failed
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_token TEXT,
+    lease_expires REAL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease_token ON jobs(lease_token);
+"""
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_BATCH_SIZE = 10
+DEFAULT_MAX_ATTEMPTS = 3
+
+class JobQueue:
+    """Leased job queue stored alongside the tier-1 results in the result store database"""
+
+    def __init__(self, path: str = DEFAULT_STORE, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.store = ResultStore(path)
+        self.conn = self.store.conn
+        # Several processes share the file; wait for the write lock instead of failing
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.executescript(JOBS_SCHEMA)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def enqueue(self, cis: Iterable[Dict]) -> int:
+        """Add CIs not yet queued and without a successful result; returns the number added"""
+        added = 0
+        now = time.time()
+        with self.store.transaction():
+            for ci in cis:
+                existing = self.store.get_search_result(ci['name'])
+                status = 'done' if existing is not None and not is_failed(existing) else 'pending'
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO jobs (name, payload, status, updated_at) VALUES (?, ?, ?, ?)",
+                    (ci['name'], json.dumps(ci, ensure_ascii=False), status, now)
+                )
+                if status == 'pending':
+                    added += cursor.rowcount
+        return added
+
+    def claim(self, worker: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[str, List[Dict]]:
+        """
+        Lease up to batch_size pending jobs, including jobs whose lease has
+        expired. Returns (lease_token, CI payloads); the list is empty when
+        nothing is claimable right now.
+        """
+        lease_token = uuid.uuid4().hex
+        now = time.time()
+        with self.store.transaction():
+            # A single UPDATE is atomic across processes, so no job is handed out twice
+            self.conn.execute(
+                "UPDATE jobs SET status = 'leased', lease_token = ?, lease_expires = ?, worker = ?, "
+                "attempts = attempts + 1, updated_at = ? "
+                "WHERE id IN (SELECT id FROM jobs WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT ?)",
+                (lease_token, now + self.lease_seconds, worker, now, now, batch_size)
+            )
+        rows = self.conn.execute("SELECT payload FROM jobs WHERE lease_token = ? ORDER BY id", (lease_token,))
+        return lease_token, [json.loads(payload) for (payload,) in rows]
+
+    def heartbeat(self, lease_token: str) -> int:
+        """Extend a lease; returns how many of its jobs are still held"""
+        with self.store.transaction():
+            return self.conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE lease_token = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, time.time(), lease_token)
+            ).rowcount
+
+    def complete(self, lease_token: str, result_entry: Dict) -> bool:
+        """
+        Atomically record a job's result and mark it done. Returns False (and
+        records nothing) if the lease was lost to another worker in the meantime.
+
+        A failed analysis goes back to the queue until max_attempts is
+        reached; the last placeholder result is kept so --retry-failed can find it.
+        """
+        with self.store.transaction():
+            # Take the write lock before checking the lease so it can't be re-claimed in between
+            self.conn.execute("BEGIN IMMEDIATE")
+            attempts_row = self.conn.execute(
+                "SELECT attempts FROM jobs WHERE name = ? AND lease_token = ? AND status = 'leased'",
+                (result_entry['name'], lease_token)
+            ).fetchone()
+            if attempts_row is None:
+                return False
+
+            if is_failed(result_entry) and attempts_row[0] < self.max_attempts:
+                status = 'pending'
+            else:
+                status = 'failed' if is_failed(result_entry) else 'done'
+                self.store.upsert_search_results([result_entry])
+
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_token = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE name = ? AND lease_token = ?",
+                (status, time.time(), result_entry['name'], lease_token)
+            )
+        return True
+
+    def release(self, lease_token: str) -> int:
+        """Return a lease's unfinished jobs to the queue (graceful shutdown)"""
+        with self.store.transaction():
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'pending', lease_token = NULL, lease_expires = NULL, "
+                "attempts = attempts - 1, updated_at = ? WHERE lease_token = ? AND status = 'leased'",
+                (time.time(), lease_token)
+            ).rowcount
+
+    def retry_failed(self) -> int:
+        """Put jobs that ran out of attempts back into the queue"""
+        with self.store.transaction():
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, updated_at = ? WHERE status = 'failed'",
+                (time.time(),)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"pending": 0, "leased": 0, "expired": 0, "done": 0, "failed": 0}
+        now = time.time()
+        for status, expired, count in self.conn.execute(
+            "SELECT status, status = 'leased' AND lease_expires < ?, COUNT(*) FROM jobs GROUP BY 1, 2", (now,)
+        ):
+            counts['expired' if expired else status] += count
+        return counts
+
+    def is_drained(self) -> bool:
+        """True when no job is pending or leased (expired leases count as pending)"""
+        counts = self.counts()
+        return counts['pending'] + counts['leased'] + counts['expired'] == 0
+
+class _Heartbeat(threading.Thread):
+    """Keeps a lease alive from its own connection while the batch is being analyzed"""
+
+    def __init__(self, path: str, lease_token: str, lease_seconds: float):
+        super().__init__(daemon=True)
+        self.path = path
+        self.lease_token = lease_token
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = JobQueue(self.path, lease_seconds=self.lease_seconds)
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                if queue.heartbeat(self.lease_token) == 0:
+                    return
+        finally:
+            queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def run_worker(path: str = DEFAULT_STORE, worker: Optional[str] = None, threads: int = 2,
+               batch_size: int = DEFAULT_BATCH_SIZE, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               idle_poll: float = 5.0, api_key_env: Optional[str] = None) -> int:
+    """
+    Claim and analyze batches until the queue is drained; returns the number
+    of results this worker committed.
+
+    api_key_env names an environment variable whose value is used as this
+    worker's OPENAI_API_KEY, so processes can be spread over several keys.
+    """
+    if api_key_env:
+        os.environ['OPENAI_API_KEY'] = os.environ[api_key_env]
+    # Imported here so the client is created with this process's API key
+    from concurrent.futures import ThreadPoolExecutor
+    from ci_gender_analyzer_v3 import iter_completed_analyses
+
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    committed = 0
+
+    with JobQueue(path, lease_seconds=lease_seconds) as queue, ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            lease_token, cis = queue.claim(worker, batch_size)
+            if not cis:
+                if queue.is_drained():
+                    break
+                # Other workers still hold leases; wait in case they expire
+                time.sleep(idle_poll)
+                continue
+
+            heartbeat = _Heartbeat(path, lease_token, lease_seconds)
+            heartbeat.start()
+            try:
+                for result_entry in iter_completed_analyses(cis, executor, max_pending=threads * 2):
+                    if queue.complete(lease_token, result_entry):
+                        committed += 1
+                        print(f"[{worker}] Completed: {result_entry['name']}")
+                    else:
+                        print(f"[{worker}] Lease lost, discarding result for {result_entry['name']}")
+            except KeyboardInterrupt:
+                queue.release(lease_token)
+                raise
+            finally:
+                heartbeat.stop()
+
+    print(f"[{worker}] Queue drained; committed {committed} results")
+    return committed
+
+def _worker_process(kwargs: Dict):
+    try:
+        run_worker(**kwargs)
+    except KeyboardInterrupt:
+        pass
+
+def run_workers(path: str = DEFAULT_STORE, processes: int = 2, api_key_envs: Optional[List[str]] = None, **kwargs):
+    """Run worker processes on this host, assigning API key variables round-robin"""
+    # Spawn rather than fork so each process builds its own client and connections
+    context = multiprocessing.get_context('spawn')
+    workers = []
+    for i in range(processes):
+        worker_kwargs = dict(kwargs, path=path, worker=f"{socket.gethostname()}:worker-{i}")
+        if api_key_envs:
+            worker_kwargs['api_key_env'] = api_key_envs[i % len(api_key_envs)]
+        process = context.Process(target=_worker_process, args=(worker_kwargs,))
+        process.start()
+        workers.append(process)
+
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.join()
+
+def print_status(queue: JobQueue):
+    counts = queue.counts()
+    total = sum(counts.values())
+    print(f"Jobs: {total}")
+    for status, count in counts.items():
+        percentage = (count / total * 100) if total else 0
+        print(f"  {status}: {count} ({percentage:.1f}%)")
+
+if __name__ == "__main__":
+    from ci_reader import iter_cis
+
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument('--store', default=DEFAULT_STORE, help=f"SQLite database file (default: {DEFAULT_STORE})")
+
+    parser = argparse.ArgumentParser(description="Multi-process job queue for tier-1 web search analysis")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', parents=[parent], help="Queue every CI in an input file")
+    enqueue_parser.add_argument('input', help="CI list (JSON list, unique_chief_investigators wrapper or JSONL)")
+
+    work_parser = subparsers.add_parser('work', parents=[parent], help="Process queued jobs until none are left")
+    work_parser.add_argument('--processes', type=int, default=2, help="Worker processes on this host (default: 2)")
+    work_parser.add_argument('--threads', type=int, default=2, help="Requests in flight per process (default: 2)")
+    work_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                             help=f"Jobs claimed per lease (default: {DEFAULT_BATCH_SIZE})")
+    work_parser.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS,
+                             help=f"Lease length; heartbeats renew it every third of this (default: {DEFAULT_LEASE_SECONDS})")
+    work_parser.add_argument('--api-key-envs', metavar='VAR[,VAR...]',
+                             help="Environment variables holding API keys, assigned to processes round-robin")
+
+    subparsers.add_parser('status', parents=[parent], help="Show job counts by status")
+    subparsers.add_parser('retry-failed', parents=[parent], help="Re-queue jobs that ran out of attempts")
+
+    export_parser = subparsers.add_parser('export', parents=[parent], help="Write tier-1 results to a JSON file")
+    export_parser.add_argument('output', help="Output file, e.g. ci_full_search_results.json")
+
+    args = parser.parse_args()
+
+    if args.command == 'work':
+        if not args.api_key_envs and not os.getenv('OPENAI_API_KEY'):
+            print("Error: OPENAI_API_KEY not found in environment variables")
+            exit(1)
+        run_workers(args.store, processes=args.processes, threads=args.threads, batch_size=args.batch_size,
+                    lease_seconds=args.lease_seconds,
+                    api_key_envs=args.api_key_envs.split(',') if args.api_key_envs else None)
+        with JobQueue(args.store) as queue:
+            print_status(queue)
+    else:
+        with JobQueue(args.store) as queue:
+            if args.command == 'enqueue':
+                added = queue.enqueue(iter_cis(args.input))
+                print(f"Queued {added} new jobs from {args.input}")
+                print_status(queue)
+            elif args.command == 'status':
+                print_status(queue)
+            elif args.command == 'retry-failed':
+                print(f"Re-queued {queue.retry_failed()} failed jobs")
+            elif args.command == 'export':
+                count = queue.store.export_json('search_results', args.output)
+                print(f"Exported {count} results to {args.output}")
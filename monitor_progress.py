@@ -1,46 +1,145 @@
 #!/usr/bin/env python3
 """
 Monitor the progress of the gender analyzer script
+
+Follows the analyzers' metrics stream (analyzer_metrics.jsonl, see
+progress_metrics.py), so each update only reads the events appended since
+the last one. Without a metrics file it falls back to counting the results
+in the search cache.
+
+Usage:
+    python monitor_progress.py
+    python monitor_progress.py --interval 2 --metrics-file analyzer_metrics.jsonl
 """
+import argparse
 import json
 import time
 import os
 from datetime import datetime
+from typing import Dict, Optional
+from checkpoint_journal import journal_path, read_journal
+from gender_stats import GenderTable
+from progress_metrics import METRICS_FILE, TailReader
+
+CACHE_FILE = 'ci_short_search_cache.json'
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return 'n/a'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}h {rest // 60:02d}m" if hours else f"{rest // 60}m {rest % 60:02d}s"
+
+def format_latency(seconds: Optional[float]) -> str:
+    return 'n/a' if seconds is None else f"{seconds:.2f}s"
 
 def get_progress_stats():
     """Get current progress statistics"""
     try:
-        # Load cache file to check progress
-        with open('ci_short_search_cache.json', 'r') as f:
-            cache_data = json.load(f)
+        # Journal mode appends to a .jsonl file; fall back to the legacy JSON cache
+        if os.path.exists(journal_path(CACHE_FILE)):
+            results = read_journal(journal_path(CACHE_FILE))
+        else:
+            with open(CACHE_FILE, 'r') as f:
+                cache_data = json.load(f)
+            results = cache_data.get('results', [])
         
-        results = cache_data.get('results', [])
         total_analyzed = len(results)
         
         # Get gender distribution
-        gender_counts = {}
-        successful_searches = 0
-        total_sources = 0
-        
-        for result in results:
-            gender = result.get('gender', 'unknown')
-            gender_counts[gender] = gender_counts.get(gender, 0) + 1
-            if result.get('search_successful'):
-                successful_searches += 1
-            total_sources += result.get('web_sources_found', 0)
+        table = GenderTable.from_records(results)
         
         return {
             'total_analyzed': total_analyzed,
-            'gender_counts': gender_counts,
-            'successful_searches': successful_searches,
-            'total_sources': total_sources,
+            'gender_counts': table.gender_counts(),
+            **table.search_stats(),
             'last_processed': results[-1]['name'] if results else 'None'
         }
     except Exception as e:
         return {'error': str(e)}
 
+def print_gender_distribution(gender_counts: Dict[str, int], total: int):
+    print("📈 Gender Distribution:")
+    for gender, count in gender_counts.items():
+        percentage = (count / total) * 100 if total > 0 else 0
+        print(f"  {gender.capitalize()}: {count} ({percentage:.1f}%)")
+    print()
+
+def print_metrics(snapshot: Dict):
+    """Print the view of a TailReader snapshot"""
+    latest = snapshot['latest']
+    record = snapshot['record'] or {}
+    start = snapshot['start'] or {}
+    done = record.get('done', start.get('done', 0))
+    total = record.get('total', start.get('total'))
+    status = "finished" if snapshot['ended'] else "running"
+    age = time.time() - latest['t']
+    
+    print(f"🤖 Analyzer: {latest['analyzer']} ({status}, last event {format_duration(age)} ago)")
+    if total:
+        print(f"📊 Progress: {done}/{total} researchers ({done / total * 100:.1f}%)")
+    else:
+        print(f"📊 Progress: {done} researchers (total known once the input has been read)")
+    print(f"👤 Last Processed: {record.get('name') or 'None'}")
+    if not snapshot['ended']:
+        print(f"⏳ ETA: {format_duration(record.get('eta_seconds'))}")
+    print()
+    
+    window_rate = snapshot['records_per_minute']
+    smoothed_rate = record.get('records_per_minute')
+    print("⚡ Throughput:")
+    print(f"  Records/min (recent window): {window_rate:.1f}" if window_rate is not None
+          else "  Records/min (recent window): n/a")
+    print(f"  Records/min (smoothed): {smoothed_rate:.1f}" if smoothed_rate is not None
+          else "  Records/min (smoothed): n/a")
+    print(f"  API requests: {latest['requests']} ({latest['in_flight']} in flight, "
+          f"{latest['retries']} retries, {latest['failures']} failed)")
+    print(f"  Latency p50/p95: {format_latency(snapshot['p50_latency'])} / "
+          f"{format_latency(snapshot['p95_latency'])} (last {snapshot['latency_samples']} requests)")
+    print(f"  Tokens: {latest['prompt_tokens']:,} prompt + {latest['completion_tokens']:,} completion")
+    print()
+    
+    # Counts cover this run (results recorded since it started)
+    recorded = sum(record.get('gender_counts', {}).values())
+    print_gender_distribution(record.get('gender_counts', {}), recorded)
+    
+    if recorded and record.get('total_sources') is not None:
+        success_rate = record['successful_searches'] / recorded * 100
+        print("🔍 Search Statistics (this run):")
+        print(f"  Successful searches: {record['successful_searches']}/{recorded} ({success_rate:.1f}%)")
+        print(f"  Total sources found: {record['total_sources']}")
+        print(f"  Average sources per researcher: {record['total_sources'] / recorded:.1f}")
+        print()
+
+def monitor_metrics(metrics_file: str = METRICS_FILE, interval: float = 5):
+    """Tail the metrics stream and display updates"""
+    reader = TailReader(metrics_file)
+    
+    while True:
+        reader.poll()
+        snapshot = reader.snapshot()
+        
+        os.system('clear' if os.name == 'posix' else 'cls')
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"🔍 Gender Analyzer Progress Monitor - {current_time}")
+        print("=" * 60)
+        
+        if snapshot['latest'] is None:
+            print(f"⌛ Waiting for events in {metrics_file}...")
+            print()
+        else:
+            print_metrics(snapshot)
+        
+        print(f"⏱️  Next update in {interval} seconds... (Ctrl+C to stop)")
+        
+        try:
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n\n👋 Monitoring stopped.")
+            break
+
 def monitor_progress(interval=30):
-    """Monitor progress and display updates"""
+    """Monitor progress from the search cache and display updates"""
     print("🔍 Gender Analyzer Progress Monitor")
     print("=" * 50)
     
@@ -63,11 +162,7 @@ def monitor_progress(interval=30):
         print(f"👤 Last Processed: {stats['last_processed']}")
         print()
         
-        print("📈 Gender Distribution:")
-        for gender, count in stats['gender_counts'].items():
-            percentage = (count / stats['total_analyzed']) * 100 if stats['total_analyzed'] > 0 else 0
-            print(f"  {gender.capitalize()}: {count} ({percentage:.1f}%)")
-        print()
+        print_gender_distribution(stats['gender_counts'], stats['total_analyzed'])
         
         success_rate = (stats['successful_searches'] / stats['total_analyzed'] * 100) if stats['total_analyzed'] > 0 else 0
         avg_sources = (stats['total_sources'] / stats['total_analyzed']) if stats['total_analyzed'] > 0 else 0
@@ -87,4 +182,14 @@ def monitor_progress(interval=30):
             break
 
 if __name__ == "__main__":
-    monitor_progress()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Monitor the progress of the gender analyzers")
+    parser.add_argument('--interval', type=float, default=None,
+                        help="Seconds between updates (default: 5 with a metrics file, 30 otherwise)")
+    parser.add_argument('--metrics-file', default=METRICS_FILE, help=f"Default: {METRICS_FILE}")
+    args = parser.parse_args()
+    
+    if os.path.exists(args.metrics_file):
+        monitor_metrics(args.metrics_file, args.interval or 5)
+    else:
+        print(f"ℹ️  {args.metrics_file} not found; counting results in {CACHE_FILE} instead")
+        monitor_progress(args.interval or 30)
\ No newline at end of file
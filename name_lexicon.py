@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Local given-name lexicon (tier 0) for the name-based analysis.
+
+Builds a compact given name -> [male, female] count table from our own
+accumulated results: confident tier-1 web search results in ci_gender.json
+and confident tier-2 name analyses in ci_name_based_gender_analysis.json.
+Names whose observed gender split is lopsided enough are classified
+locally, with no API call; ambiguous or rare names are left for the LLM.
+
+The saved lexicon records the size and mtime of both result files and is
+rebuilt when either has changed since.
+
+Usage:
+    python name_lexicon.py build
+    python name_lexicon.py lookup "Prof Wei Li"
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+from name_utils import given_name_key
+
+LEXICON_FILE = "given_name_lexicon.json"
+TIER1_FILE = "ci_gender.json"
+TIER2_FILE = "ci_name_based_gender_analysis.json"
+
+ANALYSIS_METHOD = "given_name_lexicon"
+
+# Only confident classifications feed the table
+TRUSTED_CONFIDENCE = ("high", "medium")
+
+def source_fingerprints(tier1_file: str = TIER1_FILE, tier2_file: str = TIER2_FILE) -> Dict[str, Optional[Dict]]:
+    """Size and mtime of each result file the lexicon is built from (None if missing)"""
+    fingerprints = {}
+    for role, path in (("tier1", tier1_file), ("tier2", tier2_file)):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints[role] = {"file": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        else:
+            fingerprints[role] = None
+    return fingerprints
+
+class GivenNameLexicon:
+    """Given name -> gender counts with a thresholded local classifier"""
+
+    def __init__(self, counts: Optional[Dict[str, List[int]]] = None, min_count: int = 3, threshold: float = 0.95):
+        self.counts = counts or {}
+        self.min_count = min_count
+        self.threshold = threshold
+        # Fingerprints of the result files the counts came from
+        self.sources: Optional[Dict] = None
+
+    def add(self, name: str, gender: str):
+        key = given_name_key(name)
+        if key is None or gender not in ("male", "female"):
+            return
+        male_female = self.counts.setdefault(key, [0, 0])
+        male_female[0 if gender == "male" else 1] += 1
+
+    @classmethod
+    def build(cls, tier1_file: str = TIER1_FILE, tier2_file: str = TIER2_FILE, **kwargs) -> 'GivenNameLexicon':
+        """Build the table from the accumulated tier-1 and tier-2 result files"""
+        lexicon = cls(**kwargs)
+        lexicon.sources = source_fingerprints(tier1_file, tier2_file)
+
+        if os.path.exists(tier1_file):
+            with open(tier1_file, 'r') as f:
+                for result in json.load(f).get('results', []):
+                    # Merged tier-2 predictions are counted from the tier-2 file instead
+                    if 'name_analysis' in result:
+                        continue
+                    if result.get('confidence') in TRUSTED_CONFIDENCE:
+                        lexicon.add(result['name'], result.get('gender'))
+
+        if os.path.exists(tier2_file):
+            with open(tier2_file, 'r') as f:
+                for result in json.load(f).get('results', []):
+                    # Don't feed the lexicon its own output back
+                    if result.get('analysis_method') == ANALYSIS_METHOD:
+                        continue
+                    if result.get('name_analysis_confidence') in TRUSTED_CONFIDENCE:
+                        lexicon.add(result['name'], result.get('name_based_gender'))
+
+        return lexicon
+
+    @classmethod
+    def load(cls, path: str = LEXICON_FILE, **kwargs) -> 'GivenNameLexicon':
+        with open(path, 'r') as f:
+            data = json.load(f)
+        lexicon = cls(data['names'], **kwargs)
+        lexicon.sources = data.get('sources')
+        return lexicon
+
+    def save(self, path: str = LEXICON_FILE):
+        with open(path, 'w') as f:
+            json.dump({"format": "given_name -> [male, female]", "sources": self.sources, "names": self.counts}, f,
+                      separators=(',', ':'), sort_keys=True)
+
+    def classify(self, name: str) -> Optional[Dict]:
+        """
+        Return an analysis dict (same fields as analyze_name_for_gender) if the
+        given name is unambiguous in our data, otherwise None
+        """
+        key = given_name_key(name)
+        if key is None or key not in self.counts:
+            return None
+
+        male, female = self.counts[key]
+        total = male + female
+        if total < self.min_count:
+            return None
+
+        gender, share = ("male", male / total) if male >= female else ("female", female / total)
+        if share < self.threshold:
+            return None
+
+        return {
+            "gender": gender,
+            "confidence": "high",
+            "reasoning": f"Given name '{key}' belongs to {gender} researchers in {max(male, female)} of {total} "
+                         f"previously classified cases in our own data",
+            "name_origin": "Unknown",
+            "ambiguity_notes": "" if share == 1 else f"{min(male, female)} of {total} observed cases had the other gender",
+            "analysis_method": ANALYSIS_METHOD
+        }
+
+def load_or_build_lexicon(path: str = LEXICON_FILE, tier1_file: str = TIER1_FILE,
+                          tier2_file: str = TIER2_FILE) -> GivenNameLexicon:
+    """
+    Load the saved lexicon, building and saving it from the result files if
+    it is missing or they have changed since it was built
+    """
+    if os.path.exists(path):
+        lexicon = GivenNameLexicon.load(path)
+        if lexicon.sources == source_fingerprints(tier1_file, tier2_file):
+            return lexicon
+        print(f"Result files changed since {path} was built; rebuilding it")
+
+    lexicon = GivenNameLexicon.build(tier1_file, tier2_file)
+    if lexicon.counts:
+        lexicon.save(path)
+        print(f"Built given-name lexicon with {len(lexicon.counts)} names ({path})")
+    return lexicon
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+
+    if command == 'build':
+        lexicon = GivenNameLexicon.build()
+        lexicon.save()
+        decisive = sum(1 for key in lexicon.counts if lexicon.classify(f"{key} X") is not None)
+        print(f"✅ Saved {len(lexicon.counts)} given names to {LEXICON_FILE} ({decisive} decisive)")
+    elif command == 'lookup' and len(sys.argv) > 2:
+        lexicon = load_or_build_lexicon()
+        name = ' '.join(sys.argv[2:])
+        print(f"Key: {given_name_key(name)}, counts [male, female]: {lexicon.counts.get(given_name_key(name))}")
+        print(json.dumps(lexicon.classify(name), indent=2))
+    else:
+        print("Usage: python name_lexicon.py [build | lookup NAME]")
+        sys.exit(1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Indexed name matching between the gender results and other CI lists.
+
+Matching runs in two passes:
+1. Exact: the normalized name (normalize_name) is looked up in a dict.
+2. Fuzzy, for names the exact pass missed: candidates come only from blocks
+   sharing a blocking key (surname + first initial, or Soundex code of the
+   surname + first initial), and only those candidates are scored. Ties
+   between similarly scored candidates are broken by affiliation overlap.
+
+Blocks keep the fuzzy pass near-linear in the number of names instead of
+comparing every pair.
+"""
+
+import re
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+from name_utils import fold_diacritics, normalize_name, strip_honorifics
+
+DEFAULT_THRESHOLD = 0.85
+# Candidates scoring within this margin of the best one are considered tied
+TIE_MARGIN = 0.03
+
+# Gendered forms of a given name differ at the end (Paul/Paula, Francis/Frances),
+# so edits within its last letters never count as a typo
+PROTECTED_ENDING = 2
+
+_SEPARATORS = re.compile(r"[\s\-]+")
+_DROPPED = re.compile(r"[.'’,()]")
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+def soundex(word: str) -> str:
+    """American Soundex code, e.g. 'Robert' -> 'R163'"""
+    letters = [c for c in word.lower() if c.isalpha()]
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        digit = SOUNDEX_CODES.get(c, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # 'h' and 'w' don't separate letters with the same code; vowels do
+        if c not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+def name_tokens(name: str) -> List[str]:
+    """Lowercase ASCII tokens without honorifics or punctuation; hyphenated parts are split"""
+    cleaned = _DROPPED.sub('', fold_diacritics(strip_honorifics(name)).lower())
+    return [token for token in _SEPARATORS.split(cleaned) if token]
+
+def blocking_keys(name: str) -> List[str]:
+    """Keys under which a name is indexed for the fuzzy pass"""
+    tokens = name_tokens(name)
+    if len(tokens) < 2:
+        return [f"s:{tokens[0]}"] if tokens else []
+    initial = tokens[0][0]
+    surname = tokens[-1]
+    keys = [f"s:{surname}|{initial}", f"p:{soundex(surname)}|{initial}"]
+    # Double-barrelled surnames are also indexed under the first part ('Smith-Jones' / 'Smith')
+    if len(tokens) > 2:
+        keys.append(f"s:{tokens[-2]}|{initial}")
+    return keys
+
+def is_typo_variant(a: str, b: str) -> bool:
+    """
+    Two different given names one typo apart: an adjacent transposition
+    (Micheal/Michael), or one substitution, insertion or deletion before the
+    protected ending (Katherine/Catherine, Mathew/Matthew)
+    """
+    if a == b or min(len(a), len(b)) < 4 or abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:]:
+            return True
+        return i < len(a) - PROTECTED_ENDING and a[i + 1:] == b[i + 1:]
+    shorter, longer = sorted((a, b), key=len)
+    return i < len(shorter) - PROTECTED_ENDING and shorter[i:] == longer[i + 1:]
+
+def given_names_compatible(a: str, b: str) -> bool:
+    """
+    Given names that could belong to the same person: equal, a bare initial
+    agreeing with the other name, or a typo variant. A full name extending
+    another (Paul/Paula, Chris/Christine) is a different name.
+    """
+    if a == b:
+        return True
+    if len(a) == 1 or len(b) == 1:
+        return a[0] == b[0]
+    return is_typo_variant(a, b)
+
+def name_similarity(a: str, b: str) -> float:
+    """
+    Similarity in [0, 1] of two names, ignoring honorifics, accents and
+    punctuation. Middle names or initials present in only one of them don't
+    count against the match.
+    """
+    tokens_a, tokens_b = name_tokens(a), name_tokens(b)
+    if not tokens_a or not tokens_b or not given_names_compatible(tokens_a[0], tokens_b[0]):
+        return 0.0
+    full = SequenceMatcher(None, ' '.join(tokens_a), ' '.join(tokens_b)).ratio()
+    first_last = SequenceMatcher(None, f"{tokens_a[0]} {tokens_a[-1]}", f"{tokens_b[0]} {tokens_b[-1]}").ratio()
+
+    # An initial on one side has to agree with the given name on the other
+    if (len(tokens_a[0]) == 1 or len(tokens_b[0]) == 1) and tokens_a[0][0] == tokens_b[0][0]:
+        first_last = max(first_last, SequenceMatcher(None, tokens_a[-1], tokens_b[-1]).ratio())
+    return max(full, first_last)
+
+def affiliation_overlap(a: Iterable[str], b: Iterable[str]) -> float:
+    """Jaccard overlap of two affiliation lists"""
+    set_a = {x.strip().lower() for x in a or []}
+    set_b = {x.strip().lower() for x in b or []}
+    if not set_a or not set_b:
+        return 0.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+class NameMatcher:
+    """Exact-then-blocked-fuzzy matcher over a list of records with 'name' and 'affiliations'"""
+
+    def __init__(self, records: List[Dict], threshold: float = DEFAULT_THRESHOLD):
+        self.records = records
+        self.threshold = threshold
+        self.exact = {}
+        self.blocks: Dict[str, List[int]] = {}
+
+        for i, record in enumerate(records):
+            # Later duplicates win, as with a plain dict lookup
+            self.exact[normalize_name(record['name'])] = i
+            for key in blocking_keys(record['name']):
+                self.blocks.setdefault(key, []).append(i)
+
+    def candidates(self, name: str) -> List[int]:
+        seen = set()
+        indices = []
+        for key in blocking_keys(name):
+            for i in self.blocks.get(key, []):
+                if i not in seen:
+                    seen.add(i)
+                    indices.append(i)
+        return indices
+
+    def match(self, name: str, affiliations: Optional[List[str]] = None) -> Tuple[Optional[Dict], str, float]:
+        """
+        Return (record, method, score). method is "exact", "fuzzy",
+        "ambiguous" (tied candidates that affiliations couldn't separate) or
+        "none"; record is None unless a match was made.
+        """
+        i = self.exact.get(normalize_name(name))
+        if i is not None:
+            return self.records[i], "exact", 1.0
+
+        scored = [(name_similarity(name, self.records[i]['name']), i) for i in self.candidates(name)]
+        scored = [(score, i) for score, i in scored if score >= self.threshold]
+        if not scored:
+            return None, "none", 0.0
+
+        best_score = max(score for score, _ in scored)
+        tied = [i for score, i in scored if score >= best_score - TIE_MARGIN]
+        if len(tied) == 1:
+            return self.records[tied[0]], "fuzzy", best_score
+
+        # Tie-break on affiliation overlap
+        overlaps = sorted(((affiliation_overlap(affiliations, self.records[i].get('affiliations')), i) for i in tied),
+                          reverse=True)
+        if overlaps[0][0] > overlaps[1][0]:
+            i = overlaps[0][1]
+            return self.records[i], "fuzzy", name_similarity(name, self.records[i]['name'])
+        return None, "ambiguous", best_score
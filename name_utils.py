@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Name helpers shared by the pipeline scripts.
+"""
+
+import unicodedata
+
+# Common academic prefixes found in the grants data
+ACADEMIC_PREFIXES = ['Prof ', 'Dr ', 'A/Prof ', 'Assoc Prof ', 'Associate Prof ', 'Hon Prof ', 'Hon A/Prof ']
+
+def normalize_name(name):
+    """
+    Normalize names for better matching by removing common prefixes and 
+    standardizing format
+    """
+    # Remove common academic prefixes
+    normalized = name
+    for prefix in ACADEMIC_PREFIXES:
+        if normalized.startswith(prefix):
+            normalized = normalized[len(prefix):]
+            break
+    
+    # Strip whitespace and convert to lowercase for comparison
+    return normalized.strip().lower()
+
+# Other honorifics seen in the data; stripped when parsing given names but
+# not by normalize_name, whose matching behaviour add_project_counts relies on
+OTHER_HONORIFICS = ['Em/Prof ', 'Adj/Prof ', 'Hon ', 'Mr ', 'Ms ', 'Mrs ', 'Miss ', 'Professor ', 'Associate Professor ']
+
+def strip_honorifics(name):
+    """Remove every leading academic prefix or honorific (e.g. 'Hon A/Prof ')"""
+    stripped = name.strip()
+    prefixes = sorted(ACADEMIC_PREFIXES + OTHER_HONORIFICS, key=len, reverse=True)
+    changed = True
+    while changed:
+        changed = False
+        for prefix in prefixes:
+            if stripped.lower().startswith(prefix.lower()):
+                stripped = stripped[len(prefix):].strip()
+                changed = True
+                break
+    return stripped
+
+def fold_diacritics(text):
+    """
+    Replace accented characters with their plain ASCII base letters. Every
+    mark (Unicode category M) is dropped, as tokenize() in visualizer.html does.
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.category(c).startswith('M'))
+
+def given_name(name):
+    """
+    Given name as written, e.g. 'Prof Wei Li' -> 'Wei'.
+    
+    Initials ('J.', 'J') are skipped in favour of the next full name; returns
+    None if no usable given name is found.
+    """
+    tokens = strip_honorifics(name).split()
+    # The last token is the surname; a bare surname has no given name
+    for token in tokens[:-1]:
+        token = token.strip('.,()')
+        if len(token.replace('.', '')) > 1:
+            return token
+    return None
+
+def given_name_key(name):
+    """Normalized given name used to group researchers, e.g. 'Prof José García' -> 'jose'"""
+    token = given_name(name)
+    return fold_diacritics(token).lower() if token is not None else None
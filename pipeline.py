@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Incremental pipeline runner.
+
+The analysis scripts are modelled as a DAG of stages with declared input and
+output files. A stage re-runs only when it is stale: an output is missing,
+or the content hash of one of its inputs (or of its own script) differs from
+the last successful run. Stages whose inputs are ready run in parallel, and
+a stage that reproduces byte-identical outputs doesn't invalidate anything
+downstream.
+
+Hashes are kept in .pipeline_state.json. The API-backed analyzer stages only
+run with --api.
+
+Usage:
+    python pipeline.py                  # bring every local stage up to date
+    python pipeline.py web_chart        # only what web_chart needs
+    python pipeline.py --dry-run        # show what would run
+    python pipeline.py --force csv      # re-run a stage regardless of hashes
+    python pipeline.py --mark-clean     # adopt the existing outputs as up to date
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+STATE_FILE = ".pipeline_state.json"
+
+class Stage:
+    """One pipeline step: a script run with arguments, reading inputs and writing outputs"""
+
+    def __init__(self, name: str, script: str, inputs: List[str], outputs: List[str],
+                 args: Optional[List[str]] = None, needs_api: bool = False):
+        self.name = name
+        self.script = script
+        self.inputs = inputs
+        self.outputs = outputs
+        self.args = args or []
+        self.needs_api = needs_api
+
+    def command(self) -> List[str]:
+        return [sys.executable, self.script] + self.args
+
+# Declared once here instead of each script knowing the others' file names
+STAGES = [
+    Stage("tier1_search", "ci_gender_analyzer_v3.py",
+          inputs=["ci_short.json"],
+          outputs=["ci_short_search_results.json"],
+          needs_api=True),
+    Stage("tier2_names", "ci_name_based_gender_analyzer.py",
+          inputs=["ci_short_search_results.json"],
+          outputs=["ci_name_based_gender_analysis.json", "ci_short_search_results_with_name_analysis.json"],
+          needs_api=True),
+    # ci_gender.json is the manually reviewed tier-3 dataset and is edited by hand
+    Stage("project_counts", "add_project_counts.py",
+          inputs=["chief_investigators_data.json", "ci_gender.json"],
+          outputs=["ci_gender_with_projects.json"]),
+    Stage("csv", "convert_results_to_csv.py",
+          inputs=["ci_short_search_results.json"],
+          outputs=["data/output/australian_academics_gender_analysis.csv",
+                   "data/output/gender_analysis_statistics.csv"],
+          args=["--input", "ci_short_search_results.json"]),
+    Stage("charts", "visualize_gender_by_projects.py",
+          inputs=["ci_gender_with_projects.json"],
+          outputs=["gender_by_projects.png", "gender_analysis_detailed.png"]),
+    Stage("facet_cube", "facet_cube.py",
+          inputs=["ci_gender_with_projects.json"],
+          outputs=["ci_gender_with_projects.cube.json"],
+          args=["ci_gender_with_projects.json"]),
+    Stage("web_chart", "create_web_chart.py",
+          inputs=["ci_gender_with_projects.json", "ci_gender_with_projects.cube.json"],
+          outputs=["gender_chart_web.png", "chart_section.html"]),
+    Stage("search_index", "build_search_index.py",
+          inputs=["ci_short_search_results.json"],
+          outputs=["search_index/manifest.json"]),
+]
+
+def file_hash(path: str) -> Optional[str]:
+    """SHA-256 of a file's contents, or None if it doesn't exist"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_state(state_file: str = STATE_FILE) -> Dict:
+    if os.path.exists(state_file):
+        with open(state_file, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_state(state: Dict, state_file: str = STATE_FILE):
+    temp_file = state_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(temp_file, state_file)
+
+def stage_fingerprint(stage: Stage) -> Dict[str, Optional[str]]:
+    """Hashes of everything that determines a stage's outputs"""
+    fingerprint = {path: file_hash(path) for path in stage.inputs}
+    fingerprint[stage.script] = file_hash(stage.script)
+    fingerprint['args'] = hashlib.sha256(json.dumps(stage.args).encode('utf-8')).hexdigest()
+    return fingerprint
+
+class Pipeline:
+    """Dependency graph over STAGES with hash-based staleness checks"""
+
+    def __init__(self, stages: List[Stage] = STAGES, state_file: str = STATE_FILE):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.state = load_state(state_file)
+
+        producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                producers[output] = stage.name
+        self.upstream = {
+            stage.name: sorted({producers[path] for path in stage.inputs if path in producers})
+            for stage in stages
+        }
+
+    def select(self, targets: Optional[List[str]] = None, include_api: bool = False) -> List[str]:
+        """Targets plus everything upstream of them, in declaration (topological) order"""
+        wanted = set()
+        pending = list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name}")
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(self.upstream[name])
+        return [name for name in self.stages
+                if name in wanted and (include_api or not self.stages[name].needs_api)]
+
+    def staleness(self, name: str) -> Optional[str]:
+        """Why a stage needs to run, or None if it is up to date"""
+        stage = self.stages[name]
+        missing_outputs = [path for path in stage.outputs if not os.path.exists(path)]
+        if missing_outputs:
+            return f"missing output {missing_outputs[0]}"
+
+        recorded = self.state.get(name)
+        if recorded is None:
+            return "never run"
+        for key, value in stage_fingerprint(stage).items():
+            if recorded.get(key) != value:
+                return f"{key} changed"
+        return None
+
+    def record(self, name: str):
+        self.state[name] = stage_fingerprint(self.stages[name])
+        save_state(self.state, self.state_file)
+
+    def run(self, targets: Optional[List[str]] = None, include_api: bool = False, force: Optional[List[str]] = None,
+            dry_run: bool = False, jobs: int = 4) -> bool:
+        """Bring the selected stages up to date; returns False if any stage failed"""
+        selected = self.select(targets, include_api)
+        force = set(force or [])
+        done = set()
+        failed = set()
+        would_run = set()
+        running = {}
+
+        env = dict(os.environ, MPLBACKEND="Agg")  # charts render headless
+
+        def ready(name):
+            # Upstream stages outside the selection (e.g. API stages) count as done
+            return all(up in done or up not in selected for up in self.upstream[name])
+
+        executor = ThreadPoolExecutor(max_workers=jobs)
+        try:
+            waiting = list(selected)
+            while waiting or running:
+                for name in [n for n in waiting if ready(n)]:
+                    waiting.remove(name)
+                    stage = self.stages[name]
+
+                    # Upstream stages have all been decided by now; in a dry run an input
+                    # that a stage due to run would produce isn't missing
+                    scheduled_outputs = {path for up in would_run for path in self.stages[up].outputs}
+                    missing_inputs = [path for path in stage.inputs
+                                      if not os.path.exists(path) and path not in scheduled_outputs]
+                    if missing_inputs:
+                        print(f"⏭️  {name}: blocked, missing input {missing_inputs[0]} (keeping existing outputs)")
+                        done.add(name)
+                        continue
+
+                    rerun_upstream = [up for up in self.upstream[name] if up in would_run]
+                    if name in force:
+                        reason = "forced"
+                    elif rerun_upstream:
+                        reason = f"upstream {rerun_upstream[0]} would run"
+                    else:
+                        reason = self.staleness(name)
+                    if reason is None:
+                        print(f"✅ {name}: up to date")
+                        done.add(name)
+                        continue
+
+                    if dry_run:
+                        print(f"🔄 {name}: would run ({reason}): {' '.join(stage.command()[1:])}")
+                        would_run.add(name)
+                        done.add(name)
+                        continue
+
+                    print(f"🔄 {name}: running ({reason})")
+                    running[executor.submit(self._run_stage, stage, env)] = name
+
+                # Anything downstream of a failure is dropped
+                for name in [n for n in waiting if any(up in failed for up in self.upstream[n])]:
+                    waiting.remove(name)
+                    failed.add(name)
+                    print(f"⛔ {name}: skipped, an upstream stage failed")
+
+                if not running:
+                    if waiting:
+                        continue
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    returncode, elapsed = future.result()
+                    if returncode == 0:
+                        self.record(name)
+                        done.add(name)
+                        print(f"✅ {name}: finished in {elapsed:.1f}s")
+                    else:
+                        failed.add(name)
+                        print(f"❌ {name}: exited with status {returncode} after {elapsed:.1f}s "
+                              f"(log: {self._log_path(name)})")
+        finally:
+            executor.shutdown(wait=True)
+
+        return not failed
+
+    def mark_clean(self, targets: Optional[List[str]] = None, include_api: bool = False):
+        """Record current hashes for stages whose outputs exist, without running them"""
+        for name in self.select(targets, include_api):
+            if all(os.path.exists(path) for path in self.stages[name].outputs):
+                self.record(name)
+                print(f"✅ {name}: marked up to date")
+            else:
+                print(f"⏭️  {name}: outputs missing, left stale")
+
+    def _log_path(self, name: str) -> str:
+        return os.path.join("logs", f"pipeline_{name}.log")
+
+    def _run_stage(self, stage: Stage, env: Dict):
+        """Run a stage's script in its own process, logging output to logs/"""
+        os.makedirs("logs", exist_ok=True)
+        start = time.time()
+        with open(self._log_path(stage.name), 'w') as log:
+            returncode = subprocess.call(stage.command(), stdout=log, stderr=subprocess.STDOUT,
+                                         stdin=subprocess.DEVNULL, env=env)
+        return returncode, time.time() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline, skipping up-to-date stages")
+    parser.add_argument('targets', nargs='*', help=f"Stages to bring up to date (default: all). "
+                                                   f"Stages: {', '.join(stage.name for stage in STAGES)}")
+    parser.add_argument('--api', action='store_true', help="Include the OpenAI-backed analyzer stages")
+    parser.add_argument('--force', action='append', default=[], metavar='STAGE',
+                        help="Re-run this stage even if it is up to date (repeatable)")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would run without running it")
+    parser.add_argument('--jobs', type=int, default=4, help="Stages run in parallel at most (default: 4)")
+    parser.add_argument('--mark-clean', action='store_true',
+                        help="Record the current files as up to date without running anything")
+    parser.add_argument('--list', action='store_true', help="List stages with their inputs and outputs")
+    args = parser.parse_args()
+
+    pipeline = Pipeline()
+
+    if args.list:
+        for stage in STAGES:
+            api_note = " [--api]" if stage.needs_api else ""
+            print(f"{stage.name}{api_note}: {stage.script}")
+            print(f"    inputs:  {', '.join(stage.inputs)}")
+            print(f"    outputs: {', '.join(stage.outputs)}")
+            print(f"    after:   {', '.join(pipeline.upstream[stage.name]) or '-'}")
+    elif args.mark_clean:
+        pipeline.mark_clean(args.targets, args.api)
+    else:
+        ok = pipeline.run(args.targets, include_api=args.api, force=args.force, dry_run=args.dry_run, jobs=args.jobs)
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Live progress telemetry shared by the analyzers and monitor_progress.py.
+
+Analyzers append one JSON line per event to analyzer_metrics.jsonl:
+- "start":   a run begins (analyzer, records in total or null while not yet
+             known, records already done)
+- "request": one API call finished (latency of the call, retries before it,
+             token usage, ok)
+- "record":  one result was recorded (done/total, running gender counts,
+             smoothed records per minute and ETA)
+- "end":     the run finished
+
+Every event also carries the run's running totals (requests, retries,
+tokens, failures) and the number of analyses in flight, so a reader only
+needs the last few events, never the whole history. TailReader follows the
+file from its end and keeps just a window of recent latencies and record
+times, so each update costs the same however long the run has been going.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+METRICS_FILE = 'analyzer_metrics.jsonl'
+
+# A file above this size is rotated to <file>.1 when a new run starts
+MAX_METRICS_BYTES = 16 * 1024 * 1024
+
+# Weight of the newest record interval in the smoothed throughput
+ETA_SMOOTHING = 0.1
+
+def _usage_tokens(usage) -> Dict[str, int]:
+    """Prompt/completion token counts of an API response's usage (object or dict)"""
+    if usage is None:
+        return {'prompt_tokens': 0, 'completion_tokens': 0}
+    get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    return {'prompt_tokens': get('prompt_tokens') or 0, 'completion_tokens': get('completion_tokens') or 0}
+
+class MetricsStream:
+    """Thread-safe writer of progress events for one analyzer process"""
+
+    def __init__(self, path: str = METRICS_FILE, smoothing: float = ETA_SMOOTHING):
+        self.path = path
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._file = None
+        self._reset('', 0, 0)
+
+    def _reset(self, analyzer: str, total: Optional[int], done: int):
+        self.analyzer = analyzer
+        self.total = total
+        self.done = done
+        self.in_flight = 0
+        self.totals = {'requests': 0, 'retries': 0, 'failures': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        self.gender_counts: Dict[str, int] = {}
+        self.search_counts = {'successful_searches': 0, 'total_sources': 0}
+        self._last_record = time.time()
+        self._interval: Optional[float] = None
+
+    def _emit(self, event: str, **fields):
+        # Called with the lock held
+        if self._file is None:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_METRICS_BYTES:
+                os.replace(self.path, self.path + '.1')
+            self._file = open(self.path, 'a', encoding='utf-8')
+        line = {'t': round(time.time(), 3), 'event': event, 'analyzer': self.analyzer,
+                'in_flight': self.in_flight, **self.totals, **fields}
+        self._file.write(json.dumps(line) + '\n')
+        self._file.flush()
+
+    def start_run(self, analyzer: str, total: Optional[int], done: int = 0):
+        """Begin a run of `total` records (None if not known yet), `done` of which are already finished"""
+        with self._lock:
+            self._reset(analyzer, total, done)
+            self._emit('start', total=total, done=done)
+
+    def set_total(self, total: int):
+        """The run's total once known, e.g. when a streamed input has been read to the end"""
+        with self._lock:
+            self.total = total
+
+    @contextmanager
+    def analyzing(self):
+        """Count one analysis as in flight for the duration of the block"""
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def request(self, latency: float, retries: int = 0, usage=None, ok: bool = True):
+        """One API call (the latency of the final attempt; retries before it)"""
+        tokens = _usage_tokens(usage)
+        with self._lock:
+            self.totals['requests'] += 1
+            self.totals['retries'] += retries
+            self.totals['failures'] += 0 if ok else 1
+            for key, value in tokens.items():
+                self.totals[key] += value
+            self._emit('request', latency=round(latency, 4), request_retries=retries, ok=ok,
+                       request_tokens=tokens['prompt_tokens'] + tokens['completion_tokens'])
+
+    def record(self, result: Dict, done: Optional[int] = None, failed: bool = False, gender: Optional[str] = None):
+        """One recorded result; done defaults to one more than before, gender to result['gender']"""
+        with self._lock:
+            now = time.time()
+            interval = now - self._last_record
+            self._last_record = now
+            # Exponentially smoothed seconds per record, so bursts of cached results don't swing the ETA
+            if self._interval is None:
+                self._interval = interval
+            else:
+                self._interval = self.smoothing * interval + (1 - self.smoothing) * self._interval
+
+            self.done = self.done + 1 if done is None else done
+            gender = gender or result.get('gender', 'unknown')
+            self.gender_counts[gender] = self.gender_counts.get(gender, 0) + 1
+            if result.get('search_successful'):
+                self.search_counts['successful_searches'] += 1
+            self.search_counts['total_sources'] += result.get('web_sources_found', 0) or 0
+
+            eta_seconds = None
+            if self.total is not None and self._interval:
+                eta_seconds = round(max(0, self.total - self.done) * self._interval)
+            self._emit('record', name=result.get('name'), done=self.done, total=self.total, failed=failed,
+                       gender_counts=self.gender_counts, **self.search_counts,
+                       records_per_minute=round(60 / self._interval, 2) if self._interval else None,
+                       eta_seconds=eta_seconds)
+
+    def end_run(self):
+        with self._lock:
+            if self._file is not None:
+                self._emit('end', done=self.done, total=self.total)
+                self._file.close()
+                self._file = None
+
+_streams: Dict[str, MetricsStream] = {}
+_streams_lock = threading.Lock()
+
+def get_metrics_stream(path: str = METRICS_FILE) -> MetricsStream:
+    """Return the stream shared by every analyzer in this process writing to the given file"""
+    with _streams_lock:
+        if path not in _streams:
+            _streams[path] = MetricsStream(path)
+        return _streams[path]
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class TailReader:
+    """
+    Follows a metrics file, reading only the bytes appended since the last
+    poll. The first poll starts tail_bytes before the end, which is enough
+    for the latest running totals and a latency window.
+    """
+
+    def __init__(self, path: str = METRICS_FILE, latency_window: int = 500, rate_window: float = 300.0,
+                 tail_bytes: int = 256 * 1024):
+        self.path = path
+        self.rate_window = rate_window
+        self.tail_bytes = tail_bytes
+        self.offset: Optional[int] = None
+        self._partial = b''
+        self.latencies = deque(maxlen=latency_window)
+        self.record_times = deque()
+        self.last: Dict[str, Dict] = {}
+
+    def poll(self) -> int:
+        """Read new events; returns how many were read"""
+        if not os.path.exists(self.path):
+            return 0
+        size = os.path.getsize(self.path)
+        if self.offset is None or size < self.offset:
+            # First poll, or the file was rotated: start near the end
+            self.offset = max(0, size - self.tail_bytes)
+            self._partial = b''
+            skip_first = self.offset > 0
+        else:
+            skip_first = False
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset = size
+
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()  # incomplete last line, finished by a later append
+        if skip_first and lines:
+            lines = lines[1:]
+
+        count = 0
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(event)
+            count += 1
+        return count
+
+    def _apply(self, event: Dict):
+        kind = event.get('event')
+        if kind == 'start':
+            # A new run: its latencies and throughput start from scratch
+            self.latencies.clear()
+            self.record_times.clear()
+            self.last.pop('record', None)
+        elif kind == 'request':
+            self.latencies.append(event['latency'])
+        elif kind == 'record':
+            self.record_times.append(event['t'])
+        self.last[kind] = event
+        self.last['any'] = event
+
+        cutoff = event['t'] - self.rate_window
+        while self.record_times and self.record_times[0] < cutoff:
+            self.record_times.popleft()
+
+    def snapshot(self) -> Dict:
+        """Current view: the latest totals plus window statistics"""
+        latencies = sorted(self.latencies)
+        records_per_minute = None
+        if len(self.record_times) >= 2:
+            span = self.record_times[-1] - self.record_times[0]
+            if span > 0:
+                records_per_minute = (len(self.record_times) - 1) / span * 60
+        return {
+            'latest': self.last.get('any'),
+            'record': self.last.get('record'),
+            'start': self.last.get('start'),
+            'ended': self.last.get('any', {}).get('event') == 'end',
+            'p50_latency': percentile(latencies, 0.50),
+            'p95_latency': percentile(latencies, 0.95),
+            'latency_samples': len(latencies),
+            'records_per_minute': records_per_minute,
+        }
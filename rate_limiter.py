@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Adaptive rate limiting shared by the OpenAI-backed analyzers.
+
+A token bucket paces requests; its refill rate is tuned AIMD-style from the
+x-ratelimit-* headers returned with every response and from 429 errors:
+the rate creeps up while the account has headroom and is cut sharply when
+the remaining quota runs low or the API starts rejecting requests.
+"""
+
+import re
+import threading
+import time
+from typing import Dict, Optional
+from retry_policy import CircuitBreaker, backoff_delay, is_transient_error
+
+# Header names used by the OpenAI API
+REMAINING_REQUESTS_HEADER = 'x-ratelimit-remaining-requests'
+LIMIT_REQUESTS_HEADER = 'x-ratelimit-limit-requests'
+RESET_REQUESTS_HEADER = 'x-ratelimit-reset-requests'
+REMAINING_TOKENS_HEADER = 'x-ratelimit-remaining-tokens'
+LIMIT_TOKENS_HEADER = 'x-ratelimit-limit-tokens'
+RESET_TOKENS_HEADER = 'x-ratelimit-reset-tokens'
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations such as '1s', '6m0s' or '20ms' into seconds"""
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+def _header_float(headers, name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket whose refill rate adapts to the API's feedback.
+
+    - acquire() blocks until a request may be sent
+    - on_response(headers) raises the rate additively while the remaining
+      request/token quota is healthy and cuts it multiplicatively when it
+      drops below low_watermark
+    - on_rate_limited(retry_after) cuts the rate and pauses all callers
+    """
+
+    def __init__(self, requests_per_second: float = 0.5, min_rate: float = 0.05, max_rate: float = 10.0,
+                 increase_step: float = 0.05, decrease_factor: float = 0.5, low_watermark: float = 0.1,
+                 decrease_cooldown: float = 5.0, burst: float = 1.0):
+        self.rate = requests_per_second
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.low_watermark = low_watermark
+        self.decrease_cooldown = decrease_cooldown
+        self.burst = burst
+
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def acquire(self):
+        """Block until a request slot is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def _decrease(self):
+        # At most one multiplicative cut per cooldown, so a burst of responses
+        # reporting the same low quota doesn't collapse the rate to the floor
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+    def _increase(self):
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_response(self, headers):
+        """Adjust the rate from the x-ratelimit-* headers of a successful response"""
+        if headers is None:
+            headers = {}
+        with self._lock:
+            fractions = []
+            for remaining_name, limit_name in ((REMAINING_REQUESTS_HEADER, LIMIT_REQUESTS_HEADER),
+                                               (REMAINING_TOKENS_HEADER, LIMIT_TOKENS_HEADER)):
+                remaining = _header_float(headers, remaining_name)
+                limit = _header_float(headers, limit_name)
+                if remaining is not None and limit:
+                    fractions.append(remaining / limit)
+
+            if not fractions or min(fractions) >= self.low_watermark:
+                self._increase()
+                return
+
+            self._decrease()
+
+            # Running low: don't plan to send more requests than the window has left
+            remaining_requests = _header_float(headers, REMAINING_REQUESTS_HEADER)
+            reset_seconds = parse_reset_duration(headers.get(RESET_REQUESTS_HEADER))
+            if remaining_requests is not None and reset_seconds:
+                self.rate = max(self.min_rate, min(self.rate, remaining_requests / reset_seconds))
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Back off after a 429: cut the rate and pause every caller"""
+        with self._lock:
+            self._decrease()
+            self._tokens = 0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model: str, **kwargs) -> AdaptiveRateLimiter:
+    """Return the limiter shared by every caller of the given model"""
+    with _limiters_lock:
+        if model not in _limiters:
+            _limiters[model] = AdaptiveRateLimiter(**kwargs)
+        return _limiters[model]
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for HTTP 429 errors raised by the OpenAI client"""
+    return getattr(error, 'status_code', None) == 429 or type(error).__name__ == 'RateLimitError'
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Extract the Retry-After delay (or the reset headers) from a 429 error, if present"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is None:
+        return None
+
+    retry_after = _header_float(headers, 'retry-after')
+    if retry_after is not None:
+        return retry_after
+    return parse_reset_duration(headers.get(RESET_REQUESTS_HEADER))
+
+def rate_limited_completion(client, limiter: AdaptiveRateLimiter, max_rate_limit_retries: int = 5,
+                            breaker: Optional[CircuitBreaker] = None, max_retries: int = 4, metrics=None, **request):
+    """
+    Send a chat completion request paced by the limiter.
+
+    The limiter is fed the response's rate-limit headers; 429 responses slow
+    it down and are retried up to max_rate_limit_retries times. Transient
+    errors are retried up to max_retries times with jittered exponential
+    backoff, and reported to the circuit breaker, which holds every caller
+    back while it is open.
+
+    With a progress_metrics.MetricsStream as metrics, the outcome is reported
+    to it: latency of the last attempt, retries before it and token usage.
+    """
+    rate_limit_attempt = 0
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            raw_response = client.chat.completions.with_raw_response.create(**request)
+        except Exception as e:
+            latency = time.monotonic() - started
+            if is_rate_limit_error(e):
+                if breaker is not None:
+                    # The API is up, just busy; don't hold a half-open probe slot
+                    breaker.record_success()
+                limiter.on_rate_limited(retry_after_seconds(e))
+                if rate_limit_attempt >= max_rate_limit_retries:
+                    if metrics is not None:
+                        metrics.request(latency, retries=rate_limit_attempt + attempt, ok=False)
+                    raise
+                rate_limit_attempt += 1
+                print(f"Rate limited (429), retrying at {limiter.rate:.2f} req/s "
+                      f"({rate_limit_attempt}/{max_rate_limit_retries})")
+                continue
+
+            if not is_transient_error(e):
+                if breaker is not None:
+                    breaker.record_success()
+                if metrics is not None:
+                    metrics.request(latency, retries=rate_limit_attempt + attempt, ok=False)
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt >= max_retries:
+                if metrics is not None:
+                    metrics.request(latency, retries=rate_limit_attempt + attempt, ok=False)
+                raise
+            delay = backoff_delay(attempt)
+            attempt += 1
+            print(f"Transient error ({type(e).__name__}: {e}), retrying in {delay:.1f}s ({attempt}/{max_retries})")
+            time.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        limiter.on_response(raw_response.headers)
+        response = raw_response.parse()
+        if metrics is not None:
+            metrics.request(time.monotonic() - started, retries=rate_limit_attempt + attempt,
+                            usage=getattr(response, 'usage', None))
+        return response
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+In-memory researcher index behind serve_visualizer.py's query API.
+
+Built once from the results file (whole records, never its columnar copy):
+- an inverted index of name/affiliation/research-area tokens (the same
+  tokens as build_search_index.py), with sorted terms for prefix search
+- integer codes for gender, confidence and primary institution, plus the
+  project counts, as NumPy arrays so every filter is a vectorised mask
+- one precomputed order per sort key
+
+A query is answered from these alone. Search and filters give a mask. Facet
+counts are bincounts under that mask, each facet ignoring its own filter.
+A page is the next `limit` matches in the sort order after the cursor.
+Cursors hold the sort key of the last row returned, not an offset, so they
+stay valid when the data is reloaded.
+
+Usage:
+    python researcher_query.py "q=melbourne&gender=female&sort=-projects&limit=5"
+    python researcher_query.py "min_projects=3" --data ci_gender_with_projects.json
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs
+import numpy as np
+import columnar
+from build_search_index import record_tokens, tokenize
+from ci_reader import JSONL_EXTENSIONS, RESULTS_KEY, iter_records
+from gender_stats import encode
+
+DEFAULT_DATA_FILE = 'ci_short_search_results.json'
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+TOP_INSTITUTIONS = 20
+RELOAD_CHECK_INTERVAL = 1.0
+
+CATEGORY_FIELDS = ('gender', 'confidence', 'institution')
+SORT_KEYS = ('name', 'projects', 'confidence', 'institution')
+CONFIDENCE_RANK = {'high': 0, 'medium': 1, 'low': 2}
+NO_PROJECTS = -1
+
+class QueryError(ValueError):
+    """Invalid query parameters"""
+
+def primary_institution(record: Dict) -> str:
+    return (record.get('affiliations') or ['Unknown'])[0]
+
+def load_records(data_file: str) -> List[Dict]:
+    """Every field of every record: responses carry name_analysis disclaimers the columnar copy lacks"""
+    if data_file.endswith(JSONL_EXTENSIONS):
+        return list(iter_records(data_file, RESULTS_KEY))
+    with open(data_file, 'r') as f:
+        return json.load(f)[RESULTS_KEY]
+
+def encode_cursor(sort: str, descending: bool, key: tuple) -> str:
+    payload = json.dumps({'sort': sort, 'desc': descending, 'key': list(key)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key = tuple(payload['key'])
+    except (ValueError, KeyError, TypeError):
+        raise QueryError("invalid cursor")
+    if payload.get('sort') != sort or payload.get('desc') != descending:
+        raise QueryError("cursor belongs to a different sort order")
+    return key
+
+class ResearcherIndex:
+    """Search, filter, sort and facet structures over a fixed list of records"""
+
+    def __init__(self, records: List[Dict], version: str = ''):
+        self.records = records
+        self.version = version
+        n = len(records)
+
+        postings: Dict[str, List[int]] = {}
+        for i, record in enumerate(records):
+            for token in record_tokens(record):
+                postings.setdefault(token, []).append(i)
+        self.terms = sorted(postings)
+        self.postings = [np.array(postings[term], dtype=np.int64) for term in self.terms]
+
+        self.codes: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List] = {}
+        self.codes['gender'], self.categories['gender'] = encode(r.get('gender', 'unknown') for r in records)
+        self.codes['confidence'], self.categories['confidence'] = encode(r.get('confidence', 'unknown')
+                                                                         for r in records)
+        self.codes['institution'], self.categories['institution'] = encode(map(primary_institution, records))
+        self.projects = np.array([r['total_projects'] if isinstance(r.get('total_projects'), int) else NO_PROJECTS
+                                  for r in records], dtype=np.int64)
+
+        # Sort keys end in (name, position) so every key is unique and rows with equal values stay in name order
+        names = [(r.get('name') or '').lower() for r in records]
+        key_functions = {
+            'name': lambda i: (names[i], i),
+            'projects': lambda i: (int(self.projects[i]), names[i], i),
+            'confidence': lambda i: (CONFIDENCE_RANK.get(records[i].get('confidence'), len(CONFIDENCE_RANK)),
+                                     names[i], i),
+            'institution': lambda i: (primary_institution(records[i]).lower(), names[i], i),
+        }
+        self.orders: Dict[str, np.ndarray] = {}
+        self.sorted_keys: Dict[str, List[tuple]] = {}
+        for sort, key_function in key_functions.items():
+            keys = [key_function(i) for i in range(n)]
+            order = sorted(range(n), key=keys.__getitem__)
+            self.orders[sort] = np.array(order, dtype=np.int64)
+            self.sorted_keys[sort] = [keys[i] for i in order]
+
+    def __len__(self):
+        return len(self.records)
+
+    def search(self, text: str) -> Optional[np.ndarray]:
+        """Mask of records with a term starting with every query token, or None for no text filter"""
+        mask = None
+        for token in tokenize(text or ''):
+            # Tokens are [a-z0-9], so token + '~' sorts after every term with that prefix
+            first, last = bisect_left(self.terms, token), bisect_left(self.terms, token + '~')
+            token_mask = np.zeros(len(self), dtype=bool)
+            for term in range(first, last):
+                token_mask[self.postings[term]] = True
+            mask = token_mask if mask is None else mask & token_mask
+        return mask
+
+    def category_mask(self, field: str, values: Sequence[str]) -> np.ndarray:
+        wanted = [self.categories[field].index(value) for value in values if value in self.categories[field]]
+        return np.isin(self.codes[field], wanted)
+
+    def facet_counts(self, mask: np.ndarray) -> Dict[str, Dict]:
+        facets = {}
+        for field in CATEGORY_FIELDS:
+            counts = np.bincount(self.codes[field][mask], minlength=len(self.categories[field]))
+            pairs = [(self.categories[field][code], int(count)) for code, count in enumerate(counts)]
+            if field == 'institution':
+                pairs = sorted((pair for pair in pairs if pair[1]), key=lambda pair: -pair[1])[:TOP_INSTITUTIONS]
+            facets[field] = dict(pairs)
+
+        projects = self.projects[mask]
+        known = projects[projects != NO_PROJECTS]
+        facets['projects'] = {str(value): int(count) for value, count in enumerate(np.bincount(known)) if count}
+        if len(known) < len(projects):
+            facets['projects']['unknown'] = int(len(projects) - len(known))
+        return facets
+
+    def query(self, q: str = '', gender: Sequence[str] = (), confidence: Sequence[str] = (),
+              institution: Sequence[str] = (), min_projects: Optional[int] = None,
+              max_projects: Optional[int] = None, sort: str = 'name', descending: bool = False,
+              cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT) -> Dict:
+        """One page of matching records, the total matched and facet counts"""
+        filters: Dict[str, np.ndarray] = {}
+        for field, values in (('gender', gender), ('confidence', confidence), ('institution', institution)):
+            if values:
+                filters[field] = self.category_mask(field, values)
+        if min_projects is not None or max_projects is not None:
+            in_range = self.projects >= (min_projects or 0)
+            if max_projects is not None:
+                in_range &= self.projects <= max_projects
+            filters['projects'] = in_range
+
+        text_mask = self.search(q)
+        base = text_mask if text_mask is not None else np.ones(len(self), dtype=bool)
+
+        def combined(exclude: Optional[str] = None) -> np.ndarray:
+            mask = base.copy()
+            for field, field_mask in filters.items():
+                if field != exclude:
+                    mask &= field_mask
+            return mask
+
+        matched = combined()
+        facets = self.facet_counts(matched)
+        # Facets ignore their own filter, so they show what choosing another value would give
+        for field in filters:
+            facets[field] = self.facet_counts(combined(field))[field]
+
+        # Positions in the sort order of the matches, ascending, without sorting anything per query
+        order, keys = self.orders[sort], self.sorted_keys[sort]
+        ranks = np.flatnonzero(matched[order])
+        if cursor is not None:
+            key = decode_cursor(cursor, sort, descending)
+            try:
+                boundary = bisect_left(keys, key) if descending else bisect_right(keys, key)
+            except TypeError:
+                raise QueryError("invalid cursor")
+            split = np.searchsorted(ranks, boundary)
+            ranks = ranks[:split] if descending else ranks[split:]
+        if descending:
+            ranks = ranks[::-1]
+
+        page = ranks[:limit]
+        next_cursor = None
+        if len(ranks) > limit:
+            next_cursor = encode_cursor(sort, descending, keys[page[-1]])
+        return {
+            'total': int(matched.sum()),
+            'count': len(page),
+            'results': [self.records[i] for i in order[page]],
+            'next_cursor': next_cursor,
+            'facets': facets,
+            'version': self.version,
+        }
+
+def _int_param(params: Dict[str, List[str]], name: str) -> Optional[int]:
+    if not params.get(name) or params[name][0] == '':
+        return None
+    try:
+        return int(params[name][0])
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+def parse_query(params: Dict[str, List[str]]) -> Dict:
+    """
+    ResearcherIndex.query() arguments from parsed query string parameters.
+    gender and confidence take comma-separated values, institution repeats.
+    sort is name, projects, confidence or institution; prefix '-' for descending.
+    """
+    def values(name: str, split: bool) -> List[str]:
+        raw = params.get(name, [])
+        if split:
+            raw = [value for item in raw for value in item.split(',')]
+        return [value.strip() for value in raw if value.strip()]
+
+    sort = (params.get('sort') or ['name'])[0]
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_KEYS:
+        raise QueryError(f"sort must be one of {', '.join(SORT_KEYS)}")
+
+    limit = _int_param(params, 'limit')
+    limit = DEFAULT_LIMIT if limit is None else limit
+    if not 1 <= limit <= MAX_LIMIT:
+        raise QueryError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    return {
+        'q': (params.get('q') or [''])[0],
+        'gender': values('gender', split=True),
+        'confidence': values('confidence', split=True),
+        'institution': values('institution', split=False),
+        'min_projects': _int_param(params, 'min_projects'),
+        'max_projects': _int_param(params, 'max_projects'),
+        'sort': sort,
+        'descending': descending,
+        'cursor': (params.get('cursor') or [None])[0] or None,
+        'limit': limit,
+    }
+
+class ResearcherQueryService:
+    """The current ResearcherIndex of a data file, rebuilt when the file changes"""
+
+    def __init__(self, data_file: str = DEFAULT_DATA_FILE, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.data_file = data_file
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self._fingerprint = columnar.source_fingerprint(data_file)
+        self.index = self._build()
+
+    def _build(self) -> ResearcherIndex:
+        version = f"{self._fingerprint['size']}-{self._fingerprint['mtime_ns']}"
+        return ResearcherIndex(load_records(self.data_file), version)
+
+    def current(self) -> ResearcherIndex:
+        """
+        The index to answer a request with. At most once per check_interval
+        the data file is stat'ed; if it changed, one request rebuilds the
+        index while the others keep using the previous one.
+        """
+        now = time.monotonic()
+        if now - self._checked < self.check_interval or not self._lock.acquire(blocking=False):
+            return self.index
+        try:
+            self._checked = now
+            try:
+                fingerprint = columnar.source_fingerprint(self.data_file)
+            except OSError:
+                return self.index  # being replaced; look again next time
+            if fingerprint != self._fingerprint:
+                previous = self._fingerprint
+                self._fingerprint = fingerprint
+                start = time.time()
+                try:
+                    self.index = self._build()
+                except (OSError, ValueError) as e:
+                    self._fingerprint = previous  # e.g. a half-written file; retry on the next check
+                    print(f"⚠️  Could not reload {self.data_file}: {e}")
+                else:
+                    print(f"🔄 Reloaded {len(self.index)} researchers from {self.data_file} "
+                          f"in {time.time() - start:.2f}s")
+            return self.index
+        finally:
+            self._lock.release()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one researcher query against a results file")
+    parser.add_argument('query', nargs='?', default='', help="Query string, e.g. 'q=sydney&gender=female&limit=5'")
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE, help=f"Results file (default: {DEFAULT_DATA_FILE})")
+    args = parser.parse_args()
+
+    start = time.time()
+    index = ResearcherIndex(load_records(args.data))
+    print(f"✅ Indexed {len(index)} researchers in {time.time() - start:.2f}s")
+
+    start = time.time()
+    try:
+        response = index.query(**parse_query(parse_qs(args.query)))
+    except QueryError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    print(f"🔍 {response['total']} matches in {(time.time() - start) * 1000:.1f} ms")
+    for record in response['results']:
+        print(f"   {record.get('name')} | {record.get('gender')} ({record.get('confidence')}) | "
+              f"{primary_institution(record)} | projects: {record.get('total_projects', '-')}")
+    print(json.dumps({'facets': response['facets'], 'next_cursor': response['next_cursor']}, indent=2))
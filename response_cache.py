@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Persistent LLM response cache shared by the analyzers.
+
+Responses are stored in SQLite keyed by a SHA-256 of (model, normalized
+prompt, request parameters), so re-runs, overlapping cohorts and repeated
+names never pay for the same call twice. Unlike the per-run progress cache
+it is never deleted at the end of a run; instead entries older than
+max_age_days are expired and the least recently used entries are evicted
+once the cache holds more than max_entries.
+
+The database is opened (and created) on first use, so importing an
+analyzer, --help or a dry run leave no file behind.
+
+Usage:
+    python response_cache.py stats
+    python response_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_FILE = "llm_response_cache.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_accessed ON responses(last_accessed);
+"""
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace so indentation-only prompt edits don't change the key"""
+    return _WHITESPACE.sub(' ', text).strip()
+
+def make_key(model: str, messages: List[Dict], **params) -> str:
+    """Content address for a chat completion request"""
+    payload = {
+        "model": model,
+        "messages": [{"role": m['role'], "content": normalize_prompt(m['content'])} for m in messages],
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """Thread-safe SQLite response cache with age/size-based eviction and hit/miss counters"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, max_entries: int = 100000, max_age_days: float = 180,
+                 evict_every: int = 500):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self.evict_every = evict_every
+
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_eviction = 0
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The SQLite connection, opened and cleaned up on first use"""
+        if self._conn is None:
+            with self._connect_lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                    # Callers may already hold self._lock here
+                    self._evict(conn)
+                    self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE responses SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        """Store a response; periodically evicts expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now)
+                )
+            self._puts_since_eviction += 1
+            evict_now = self._puts_since_eviction >= self.evict_every
+
+        if evict_now:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        with self._lock:
+            return self._evict(self.conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        self._puts_since_eviction = 0
+        with conn:
+            expired = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_seconds,)
+            ).rowcount
+            overflow = conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        return expired + overflow
+
+    def size(self) -> int:
+        if self._conn is None and not os.path.exists(self.path):
+            return 0
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\nResponse cache ({self.path}):")
+        print(f"  Hits: {stats['hits']}, misses: {stats['misses']} ({stats['hit_rate']:.1f}% hit rate)")
+        print(f"  Entries stored: {stats['entries']}")
+
+    def clear(self):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM responses")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+def get_response_cache(path: str = DEFAULT_CACHE_FILE) -> ResponseCache:
+    """Return the cache instance shared by every analyzer using the given file"""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ResponseCache(path)
+        return _caches[path]
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = ResponseCache()
+
+    if command == 'stats':
+        rows = cache.conn.execute(
+            "SELECT model, COUNT(*), SUM(hit_count) FROM responses GROUP BY model ORDER BY model"
+        ).fetchall()
+        print(f"Response cache: {DEFAULT_CACHE_FILE}")
+        for model, count, hit_count in rows:
+            print(f"  {model}: {count} entries, {hit_count or 0} lifetime hits")
+        if not rows:
+            print("  (empty)")
+    elif command == 'clear':
+        cache.clear()
+        print("Response cache cleared")
+    else:
+        print("Usage: python response_cache.py [stats|clear]")
+        sys.exit(1)
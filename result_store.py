@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Optional embedded SQLite store shared by all pipeline stages.
+
+Tables:
+- cis:            input Chief Investigators (name, affiliations)
+- search_results: tier-1 web search results (ci_short_search_results.json)
+- name_analyses:  tier-2 name-based analyses (ci_name_based_gender_analysis.json)
+- project_counts: total_projects per CI (chief_investigators_data.json)
+- imports:        size and mtime of the file each table was last imported from
+
+Every table is indexed by name and by the normalized name key used for
+matching, so resume checks and joins are indexed lookups instead of
+re-parsing multi-megabyte JSON files. Full records are kept as JSON so the
+existing {"total_analyzed", "results"} files can always be exported again.
+
+Usage:
+    python result_store.py import --store results.db
+    python result_store.py export merged ci_gender.json --store results.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+from name_utils import normalize_name
+
+DEFAULT_STORE = "results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cis (
+    name TEXT PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    affiliations TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cis_name_key ON cis(name_key);
+
+CREATE TABLE IF NOT EXISTS search_results (
+    name TEXT PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    gender TEXT,
+    confidence TEXT,
+    search_successful INTEGER,
+    record TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_results_name_key ON search_results(name_key);
+CREATE INDEX IF NOT EXISTS idx_search_results_gender ON search_results(gender);
+
+CREATE TABLE IF NOT EXISTS name_analyses (
+    name TEXT PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    name_based_gender TEXT,
+    confidence TEXT,
+    record TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_name_analyses_name_key ON name_analyses(name_key);
+
+CREATE TABLE IF NOT EXISTS project_counts (
+    name_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    total_projects INTEGER,
+    affiliations TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS imports (
+    table_name TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+# Default files for each table when importing/exporting
+TABLE_FILES = {
+    'cis': 'ci_full.json',
+    'search_results': 'ci_short_search_results.json',
+    'name_analyses': 'ci_name_based_gender_analysis.json',
+    'project_counts': 'chief_investigators_data.json',
+}
+
+def apply_name_analysis(researcher: Dict, analysis: Dict) -> Dict:
+    """Return a copy of a tier-1 result updated with its tier-2 name analysis"""
+    updated_researcher = researcher.copy()
+
+    # Only update if name-based analysis provided a gender prediction
+    if analysis['name_based_gender'] != 'unknown':
+        updated_researcher['gender'] = analysis['name_based_gender']
+        updated_researcher['confidence'] = analysis['name_analysis_confidence']
+
+    # Always update search notes to include the disclaimer
+    updated_researcher['search_notes'] = analysis['updated_search_notes']
+
+    # Add name analysis metadata
+    updated_researcher['name_analysis'] = {
+        "method": "given_name_lexicon" if analysis.get('analysis_method') == 'given_name_lexicon' else "name_pattern_analysis",
+        "original_gender": analysis['original_gender'],
+        "name_based_gender": analysis['name_based_gender'],
+        "confidence": analysis['name_analysis_confidence'],
+        "reasoning": analysis['name_reasoning'],
+        "name_origin": analysis['name_origin'],
+        "disclaimer": analysis['disclaimer']
+    }
+
+    return updated_researcher
+
+def _load_records(input_file: str) -> List[Dict]:
+    """Load records from any of the pipeline's JSON layouts"""
+    with open(input_file, 'r') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        return data
+    if 'results' in data:
+        return data['results']
+    if 'unique_chief_investigators' in data:
+        return data['unique_chief_investigators']
+    raise ValueError(f"Unsupported data format in {input_file}")
+
+class ResultStore:
+    """SQLite-backed store for CIs, tier-1/tier-2 results and project counts"""
+
+    def __init__(self, path: str = DEFAULT_STORE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one atomic commit"""
+        with self.conn:
+            yield self.conn
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Chief Investigators
+
+    def add_cis(self, cis: Iterable[Dict]):
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO cis (name, name_key, affiliations) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET affiliations = excluded.affiliations",
+                ((ci['name'], normalize_name(ci['name']), json.dumps(ci.get('affiliations', []))) for ci in cis)
+            )
+
+    def iter_cis(self) -> Iterator[Dict]:
+        for name, affiliations in self.conn.execute("SELECT name, affiliations FROM cis ORDER BY rowid"):
+            yield {"name": name, "affiliations": json.loads(affiliations)}
+
+    # Tier 1: web search results
+
+    def save_search_result(self, entry: Dict):
+        """Insert or replace a single tier-1 result in its own transaction"""
+        self.save_search_results([entry])
+
+    def save_search_results(self, entries: Iterable[Dict]):
+        with self.transaction():
+            self.upsert_search_results(entries)
+
+    def upsert_search_results(self, entries: Iterable[Dict]):
+        """Write tier-1 results inside the caller's transaction"""
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.conn.executemany(
+            "INSERT INTO search_results (name, name_key, gender, confidence, search_successful, record, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET gender = excluded.gender, confidence = excluded.confidence, "
+            "search_successful = excluded.search_successful, record = excluded.record, updated_at = excluded.updated_at",
+            ((e['name'], normalize_name(e['name']), e.get('gender'), e.get('confidence'),
+              int(bool(e.get('search_successful'))), json.dumps(e, ensure_ascii=False), now) for e in entries)
+        )
+
+    def delete_search_results(self, names: Iterable[str]) -> int:
+        with self.transaction():
+            return self.conn.executemany("DELETE FROM search_results WHERE name = ?",
+                                         ((name,) for name in names)).rowcount
+
+    def has_search_result(self, name: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM search_results WHERE name = ?", (name,)).fetchone() is not None
+
+    def get_search_result(self, name: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT record FROM search_results WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_search_results(self, gender: Optional[str] = None) -> Iterator[Dict]:
+        if gender is None:
+            rows = self.conn.execute("SELECT record FROM search_results ORDER BY rowid")
+        else:
+            rows = self.conn.execute("SELECT record FROM search_results WHERE gender = ? ORDER BY rowid", (gender,))
+        for (record,) in rows:
+            yield json.loads(record)
+
+    def count_search_results(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+
+    # Tier 2: name-based analyses
+
+    def save_name_analysis(self, entry: Dict):
+        """Insert or replace a single tier-2 analysis in its own transaction"""
+        self.save_name_analyses([entry])
+
+    def save_name_analyses(self, entries: Iterable[Dict]):
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO name_analyses (name, name_key, name_based_gender, confidence, record, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET name_based_gender = excluded.name_based_gender, "
+                "confidence = excluded.confidence, record = excluded.record, updated_at = excluded.updated_at",
+                ((e['name'], normalize_name(e['name']), e.get('name_based_gender'), e.get('name_analysis_confidence'),
+                  json.dumps(e, ensure_ascii=False), now) for e in entries)
+            )
+
+    def has_name_analysis(self, name: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM name_analyses WHERE name = ?", (name,)).fetchone() is not None
+
+    def get_name_analysis(self, name: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT record FROM name_analyses WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_name_analyses(self) -> Iterator[Dict]:
+        for (record,) in self.conn.execute("SELECT record FROM name_analyses ORDER BY rowid"):
+            yield json.loads(record)
+
+    # Project counts
+
+    def save_project_counts(self, cis: Iterable[Dict], replace: bool = False):
+        """Upsert project counts; replace=True first drops every existing count, in the same transaction"""
+        with self.transaction():
+            if replace:
+                self.conn.execute("DELETE FROM project_counts")
+            self.conn.executemany(
+                "INSERT INTO project_counts (name_key, name, total_projects, affiliations) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name_key) DO UPDATE SET name = excluded.name, total_projects = excluded.total_projects, "
+                "affiliations = excluded.affiliations",
+                ((normalize_name(ci['name']), ci['name'], ci.get('total_projects'),
+                  json.dumps(ci.get('affiliations', []))) for ci in cis)
+            )
+
+    def has_project_counts(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM project_counts LIMIT 1").fetchone() is not None
+
+    def get_project_count(self, name: str) -> Optional[int]:
+        row = self.conn.execute("SELECT total_projects FROM project_counts WHERE name_key = ?",
+                                (normalize_name(name),)).fetchone()
+        return row[0] if row else None
+
+    def iter_project_counts(self) -> Iterator[Dict]:
+        rows = self.conn.execute("SELECT name, total_projects, affiliations FROM project_counts ORDER BY rowid")
+        for name, total_projects, affiliations in rows:
+            yield {"name": name, "total_projects": total_projects, "affiliations": json.loads(affiliations)}
+
+    # Joined views
+
+    def iter_merged_results(self, include_project_counts: bool = False) -> Iterator[Dict]:
+        """
+        Yield tier-1 results with tier-2 analyses applied (the ci_gender.json
+        view), optionally with total_projects joined in (ci_gender_with_projects.json)
+        """
+        rows = self.conn.execute(
+            "SELECT s.record, n.record, p.total_projects FROM search_results s "
+            "LEFT JOIN name_analyses n ON n.name = s.name "
+            "LEFT JOIN project_counts p ON p.name_key = s.name_key "
+            "ORDER BY s.rowid"
+        )
+        for search_record, analysis_record, total_projects in rows:
+            researcher = json.loads(search_record)
+            if analysis_record is not None:
+                researcher = apply_name_analysis(researcher, json.loads(analysis_record))
+            if include_project_counts:
+                researcher['total_projects'] = total_projects
+            yield researcher
+
+    # JSON import/export
+
+    def import_json(self, table: str, input_file: str) -> int:
+        """
+        Load one of the pipeline's JSON files into a table. The project counts
+        file is the complete source for its table, so it replaces it.
+        """
+        stat = os.stat(input_file)
+        records = _load_records(input_file)
+        if table == 'cis':
+            self.add_cis(records)
+        elif table == 'search_results':
+            self.save_search_results(records)
+        elif table == 'name_analyses':
+            self.save_name_analyses(records)
+        elif table == 'project_counts':
+            self.save_project_counts(records, replace=True)
+        else:
+            raise ValueError(f"Unknown table: {table}")
+        with self.transaction():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO imports (table_name, file, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                (table, os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns)
+            )
+        return len(records)
+
+    def import_is_current(self, table: str, input_file: str) -> bool:
+        """Whether table was last imported from input_file and the file hasn't changed since"""
+        row = self.conn.execute("SELECT file, size, mtime_ns FROM imports WHERE table_name = ?", (table,)).fetchone()
+        if row is None or not os.path.exists(input_file):
+            return False
+        stat = os.stat(input_file)
+        return tuple(row) == (os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns)
+
+    def export_json(self, view: str, output_file: str) -> int:
+        """Write a table (or the merged view) in the {"total_analyzed", "results"} layout"""
+        if view == 'cis':
+            records = list(self.iter_cis())
+        elif view == 'search_results':
+            records = list(self.iter_search_results())
+        elif view == 'name_analyses':
+            records = list(self.iter_name_analyses())
+        elif view == 'merged':
+            records = list(self.iter_merged_results())
+        elif view == 'merged_with_projects':
+            records = list(self.iter_merged_results(include_project_counts=True))
+        else:
+            raise ValueError(f"Unknown view: {view}")
+
+        with open(output_file, 'w') as f:
+            json.dump({"total_analyzed": len(records), "results": records}, f, indent=2)
+        return len(records)
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--store', default=DEFAULT_STORE, help=f"SQLite database file (default: {DEFAULT_STORE})")
+
+    parser = argparse.ArgumentParser(description="Import/export pipeline results to/from the SQLite result store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', parents=[common], help="Load existing JSON files into the store")
+    for table, default_file in TABLE_FILES.items():
+        import_parser.add_argument(f"--{table.replace('_', '-')}", dest=table, default=default_file,
+                                   help=f"File for the {table} table (default: {default_file})")
+
+    export_parser = subparsers.add_parser('export', parents=[common], help="Export a table or view as JSON")
+    export_parser.add_argument('view', choices=['cis', 'search_results', 'name_analyses', 'merged', 'merged_with_projects'])
+    export_parser.add_argument('output_file')
+
+    args = parser.parse_args()
+
+    with ResultStore(args.store) as store:
+        if args.command == 'import':
+            for table in TABLE_FILES:
+                input_file = getattr(args, table)
+                if not os.path.exists(input_file):
+                    print(f"⚠️  Skipping {table}: {input_file} not found")
+                    continue
+                count = store.import_json(table, input_file)
+                print(f"✅ Imported {count} records from {input_file} into {table}")
+        else:
+            count = store.export_json(args.view, args.output_file)
+            print(f"✅ Exported {count} records from {args.view} to {args.output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Failure handling shared by the OpenAI-backed analyzers.
+
+Transient API errors (connection problems, timeouts, 5xx) are retried with
+jittered exponential backoff. A per-model circuit breaker counts consecutive
+failures; once it trips, every worker pauses until a cooldown has passed and
+a single probe request has succeeded, so an outage doesn't burn through the
+queue producing placeholder results.
+
+Requests that still fail get a placeholder result carrying an
+"analysis_error" field. Those records don't count as processed on resume,
+are listed in a separate <output>_failed.json file, and can be re-run on
+their own with the analyzers' --retry-failed mode.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+from checkpoint_journal import write_results_file
+
+# Result field marking a placeholder written after a failed analysis
+FAILED_FIELD = "analysis_error"
+
+# HTTP statuses worth retrying (429 is handled by the rate limiter)
+TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {'APIConnectionError', 'APITimeoutError', 'InternalServerError', 'ServiceUnavailableError',
+                         'Timeout', 'TryAgain'}
+
+def is_transient_error(error: Exception) -> bool:
+    """True for errors a later identical request is likely to avoid"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return (getattr(error, 'status_code', None) in TRANSIENT_STATUS_CODES
+            or type(error).__name__ in TRANSIENT_ERROR_NAMES)
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0, rng=random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]"""
+    return rng.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures; open -> half-open
+    after cooldown seconds, when one probe call is let through. A successful
+    probe closes the breaker, a failed one re-opens it.
+    
+    clock returns the current time in seconds (time.time unless a test injects one).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0, clock: Callable[[], float] = time.time):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_in_flight = False
+        self._condition = threading.Condition()
+
+    def before_call(self):
+        """Block while the breaker is open (or another thread is probing)"""
+        with self._condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.OPEN:
+                    remaining = self.opened_at + self.cooldown - self.clock()
+                    if remaining <= 0:
+                        self.state = self.HALF_OPEN
+                        continue
+                    self._condition.wait(remaining)
+                    continue
+                # Half-open: exactly one caller probes, the rest wait for its outcome
+                if not self._probe_in_flight:
+                    self._probe_in_flight = True
+                    return
+                self._condition.wait()
+
+    def record_success(self):
+        with self._condition:
+            if self.state != self.CLOSED:
+                print("Circuit breaker closed; resuming requests")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self.consecutive_failures += 1
+            probe_failed = self.state == self.HALF_OPEN and self._probe_in_flight
+            if probe_failed or (self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self.trips += 1
+                print(f"Circuit breaker open after {self.consecutive_failures} consecutive failures; "
+                      f"pausing requests for {self.cooldown:.0f}s")
+            self._probe_in_flight = False
+            self._condition.notify_all()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(model: str, **kwargs) -> CircuitBreaker:
+    """Return the breaker shared by every caller of the given model"""
+    with _breakers_lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker(**kwargs)
+        return _breakers[model]
+
+def is_failed(result: Dict) -> bool:
+    """True for placeholder results left by a failed analysis"""
+    return bool(result.get(FAILED_FIELD))
+
+def failed_records_path(output_file: str) -> str:
+    """File listing the failed records of an output file (foo.json -> foo_failed.json)"""
+    return os.path.splitext(output_file)[0] + '_failed.json'
+
+def write_failed_records(output_file: str, results: List[Dict]) -> int:
+    """Write the failed results next to output_file (or remove a stale list) and return their count"""
+    failed = [r for r in results if is_failed(r)]
+    path = failed_records_path(output_file)
+    if failed:
+        write_results_file(path, failed)
+        print(f"{len(failed)} failed records listed in {path}; re-run them with --retry-failed")
+    elif os.path.exists(path):
+        os.remove(path)
+    return len(failed)
@@ -2,13 +2,13 @@
 """
 Simple HTTP server to serve the academic gender search visualizer locally.
 Run this script and then open http://localhost:8000/visualizer.html in your browser.
+Uses the threaded server in static_server.py (compression, ETags, ranges).
 """
 
-import http.server
-import socketserver
 import webbrowser
 import os
 import sys
+from static_server import make_server, precompress
 
 def main():
     # Change to the directory containing this script
@@ -28,13 +28,16 @@ def main():
         print("Make sure you're running this script from the project directory.")
         sys.exit(1)
     
+    written, fresh = precompress('.')
+    print(f"🗜️  Precompressed sidecars: {written} written, {fresh} up to date")
+    
     print(f"🚀 Starting local server on port {PORT}...")
     print(f"📊 Visualizer will be available at: http://localhost:{PORT}/visualizer.html")
     print(f"🏠 Index page will be available at: http://localhost:{PORT}/index.html")
     print("Press Ctrl+C to stop the server")
     
     try:
-        with socketserver.TCPServer(("", PORT), http.server.SimpleHTTPRequestHandler) as httpd:
+        with make_server(PORT) as httpd:
             print(f"✅ Server started successfully!")
             print(f"🌐 Opening browser...")
             
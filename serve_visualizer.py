@@ -2,16 +2,52 @@
 """
 Simple HTTP server to serve the HTML visualizer and JSON data.
 This avoids CORS issues when loading local JSON files.
+Uses the threaded server in static_server.py (compression, ETags, ranges).
+
+Also answers researcher queries at /api/researchers from an in-memory index
+of the data file (researcher_query.py), reloaded when the file changes, so
+the visualizer only receives one page of results at a time:
+    /api/researchers?q=melbourne&gender=female&confidence=high,medium
+        &institution=The+University+of+Sydney&min_projects=2&max_projects=5
+        &sort=-projects&limit=50&cursor=<next_cursor of the previous page>
 """
 
-import http.server
-import socketserver
+import argparse
+import json
+import time
 import webbrowser
 import os
-import sys
+from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from researcher_query import DEFAULT_DATA_FILE, QueryError, ResearcherQueryService, parse_query
+from static_server import StaticHandler, make_server, precompress
+
+API_PATH = '/api/researchers'
+
+class VisualizerHandler(StaticHandler):
+    """Static files plus the researcher query API"""
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != API_PATH:
+            return super().do_GET()
 
-def serve_visualizer(port=8000):
+        try:
+            index = self.server.researchers.current()
+            response, status = index.query(**parse_query(parse_qs(parts.query))), HTTPStatus.OK
+        except QueryError as e:
+            response, status = {'error': str(e)}, HTTPStatus.BAD_REQUEST
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+        self._bytes_sent = len(body)
+
+def serve_visualizer(port=8000, data_file=DEFAULT_DATA_FILE, researchers=None):
     """Start a local HTTP server and open the visualizer in the browser."""
     
     # Change to the script directory
@@ -23,17 +59,25 @@ def serve_visualizer(port=8000):
         print("Error: visualizer.html not found in current directory")
         return
     
-    if not Path("ci_short_search_results.json").exists():
-        print("Error: ci_short_search_results.json not found in current directory")
+    if not Path(data_file).exists():
+        print(f"Error: {data_file} not found in current directory")
         return
     
-    # Set up the server
-    Handler = http.server.SimpleHTTPRequestHandler
+    # Compressed copies of the JSON and HTML files, served to browsers that accept them
+    written, fresh = precompress('.')
+    print(f"Precompressed sidecars: {written} written, {fresh} up to date")
+    
+    if researchers is None:
+        start = time.time()
+        researchers = ResearcherQueryService(data_file)
+        print(f"Indexed {len(researchers.index)} researchers from {data_file} in {time.time() - start:.2f}s")
     
     try:
-        with socketserver.TCPServer(("", port), Handler) as httpd:
+        with make_server(port, handler_class=VisualizerHandler) as httpd:
+            httpd.researchers = researchers
             print(f"Serving at http://localhost:{port}")
             print(f"Opening visualizer at http://localhost:{port}/visualizer.html")
+            print(f"Query API at http://localhost:{port}{API_PATH}")
             print("Press Ctrl+C to stop the server")
             
             # Open the visualizer in the default browser
@@ -47,16 +91,15 @@ def serve_visualizer(port=8000):
     except OSError as e:
         if e.errno == 48:  # Address already in use
             print(f"Port {port} is already in use. Trying port {port + 1}")
-            serve_visualizer(port + 1)
+            serve_visualizer(port + 1, data_file, researchers)
         else:
             print(f"Error starting server: {e}")
 
 if __name__ == "__main__":
-    port = 8000
-    if len(sys.argv) > 1:
-        try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print("Invalid port number. Using default port 8000.")
+    parser = argparse.ArgumentParser(description="Serve the visualizer and the researcher query API")
+    parser.add_argument('port', nargs='?', type=int, default=8000, help="Port (default: 8000)")
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE,
+                        help=f"Results file behind the query API (default: {DEFAULT_DATA_FILE})")
+    args = parser.parse_args()
     
-    serve_visualizer(port)
+    serve_visualizer(args.port, args.data)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Threaded static file server for the visualizer (serve_local.py and
+serve_visualizer.py use it).
+
+Compared to http.server's single-threaded SimpleHTTPRequestHandler it:
+- handles every connection in its own thread, with HTTP/1.1 keep-alive
+- serves precompressed sidecars (file.json.br / file.json.gz) to clients
+  that accept brotli or gzip; sidecars are built by precompress() and
+  ignored once they are older than the file
+- sends a strong ETag (hash of the bytes of the representation sent) and
+  answers a matching If-None-Match with 304 Not Modified
+- supports single byte ranges (Range, If-Range)
+- logs the status, bytes sent and latency of every request
+
+Brotli sidecars are only written when the optional `brotli` package is
+installed; gzip always works.
+
+Usage:
+    python static_server.py serve --port 8000
+    python static_server.py precompress
+    python static_server.py loadtest http://localhost:8000/ci_short_search_results.json -c 16 -n 2000 --encoding gzip
+"""
+
+import argparse
+import gzip
+import hashlib
+import http.client
+import http.server
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_PORT = 8000
+COPY_BLOCK_SIZE = 64 * 1024
+
+# Files worth compressing, and the sidecars tried in order of preference
+COMPRESSIBLE_EXTENSIONS = ('.html', '.htm', '.json', '.jsonl', '.js', '.css', '.csv', '.svg', '.txt', '.md')
+MIN_COMPRESS_SIZE = 1024
+SIDECARS = (('br', '.br'), ('gzip', '.gz'))
+SKIP_DIRS = {'__pycache__', 'node_modules', 'venv'}
+
+# Content-hashed names (build_search_index.py) never change content, so they can be cached for good
+HASHED_NAME = re.compile(r'\.[0-9a-f]{16}\.[a-z]+$')
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Precompressed sidecars
+
+def is_compressible(path: str) -> bool:
+    return path.endswith(COMPRESSIBLE_EXTENSIONS) and os.path.getsize(path) >= MIN_COMPRESS_SIZE
+
+def sidecar_is_fresh(path: str, sidecar: str) -> bool:
+    try:
+        return os.stat(sidecar).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def precompress(directory: str = '.') -> Tuple[int, int]:
+    """Write missing or stale sidecars for compressible files; returns (written, already fresh)"""
+    encodings = [(encoding, suffix) for encoding, suffix in SIDECARS if encoding != 'br' or brotli is not None]
+    written = fresh = 0
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        for name in files:
+            path = os.path.join(root, name)
+            if not is_compressible(path):
+                continue
+            data = None
+            for encoding, suffix in encodings:
+                sidecar = path + suffix
+                if sidecar_is_fresh(path, sidecar):
+                    fresh += 1
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                with open(sidecar + '.tmp', 'wb') as f:
+                    f.write(compress(data, encoding))
+                os.replace(sidecar + '.tmp', sidecar)
+                written += 1
+    return written, fresh
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        match = re.search(r'q=([0-9.]+)', params)
+        try:
+            accepted[coding] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            accepted[coding] = 0.0
+    return accepted
+
+def choose_representation(path: str, accept_encoding: Optional[str]) -> Tuple[Optional[str], str]:
+    """(content coding or None, file to send) for path"""
+    accepted = accepted_encodings(accept_encoding or '')
+    for encoding, suffix in SIDECARS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0 and sidecar_is_fresh(path, path + suffix):
+            return encoding, path + suffix
+    return None, path
+
+# Validators and ranges
+
+_etags: Dict[str, Tuple[int, int, str]] = {}
+_etags_lock = threading.Lock()
+
+def file_etag(path: str, st: os.stat_result) -> str:
+    """Strong ETag from a hash of the file, recomputed only when its size or mtime changes"""
+    with _etags_lock:
+        cached = _etags.get(path)
+    if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    etag = f'"{digest.hexdigest()[:32]}"'
+    with _etags_lock:
+        _etags[path] = (st.st_size, st.st_mtime_ns, etag)
+    return etag
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for it)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in header.split(','))
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte of a single-range Range header. Returns None for
+    anything else (multiple ranges, other units), which is answered with the
+    whole file; raises ValueError if the range can't be satisfied.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError(f"range {header} outside {size} bytes")
+    return first, last
+
+# Server
+
+class StaticHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; on a kept-alive connection
+        # Nagle's algorithm would hold the body back until the client's delayed ACK (~40 ms)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle_one_request(self):
+        self._started = time.perf_counter()
+        self._status = None
+        self._encoding = None
+        self._bytes_sent = 0
+        self._remaining = sys.maxsize
+        super().handle_one_request()
+        if self._status is not None and self.server.log_requests:
+            latency_ms = (time.perf_counter() - self._started) * 1000
+            self.log_message('"%s" %s %d bytes %.1f ms%s', self.requestline, self._status, self._bytes_sent,
+                             latency_ms, f' ({self._encoding})' if self._encoding else '')
+
+    def log_request(self, code='-', size='-'):
+        # Logged once the body is sent, in handle_one_request
+        self._status = code.value if isinstance(code, HTTPStatus) else code
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Let http.server redirect to the trailing slash or list the directory
+            index = os.path.join(path, 'index.html')
+            if not urlsplit(self.path).path.endswith('/') or not os.path.isfile(index):
+                return super().send_head()
+            path = index
+        if path.endswith('/') or not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        encoding, served_path = choose_representation(path, self.headers.get('Accept-Encoding'))
+        try:
+            f = open(served_path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            st = os.fstat(f.fileno())
+            etag = file_etag(served_path, st)
+            self._encoding = encoding
+
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                f.close()
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_cache_headers(path, etag)
+                self.end_headers()
+                return None
+
+            size = st.st_size
+            byte_range = None
+            if self.headers.get('Range') and self.headers.get('If-Range', etag) == etag:
+                try:
+                    byte_range = parse_range(self.headers['Range'], size)
+                except ValueError:
+                    f.close()
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return None
+
+            if byte_range:
+                first, last = byte_range
+                f.seek(first)
+                self._remaining = last - first + 1
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-Range', f'bytes {first}-{last}/{size}')
+            else:
+                self._remaining = size
+                self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', self.guess_type(path))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.send_header('Content-Length', str(self._remaining))
+            self.send_header('Last-Modified', self.date_time_string(st.st_mtime))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_cache_headers(path, etag)
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def send_cache_headers(self, path: str, etag: str):
+        self.send_header('ETag', etag)
+        if path.endswith(COMPRESSIBLE_EXTENSIONS):
+            self.send_header('Vary', 'Accept-Encoding')
+        if HASHED_NAME.search(path):
+            self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        else:
+            self.send_header('Cache-Control', 'no-cache')
+
+    def copyfile(self, source, outputfile):
+        """Copy at most the requested range, counting the bytes sent"""
+        while self._remaining > 0:
+            block = source.read(min(COPY_BLOCK_SIZE, self._remaining))
+            if not block:
+                break
+            outputfile.write(block)
+            self._remaining -= len(block)
+            self._bytes_sent += len(block)
+
+class StaticServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    log_requests = True
+
+def make_server(port: int = DEFAULT_PORT, directory: str = '.', log_requests: bool = True,
+                host: str = '', handler_class=StaticHandler) -> StaticServer:
+    server = StaticServer((host, port), partial(handler_class, directory=directory))
+    server.log_requests = log_requests
+    return server
+
+# Load test
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def load_test(url: str, concurrency: int = 16, requests: int = 1000, encoding: Optional[str] = None,
+              revalidate: bool = False) -> Dict:
+    """
+    GET url `requests` times from `concurrency` keep-alive clients. With
+    revalidate, clients send the ETag they got back (measures 304s).
+    """
+    parts = urlsplit(url)
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+    def client(count: int) -> Tuple[List[float], int, int]:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        headers = {'Accept-Encoding': encoding} if encoding else {}
+        latencies, errors, received = [], 0, 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                connection.request('GET', target, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - start)
+            received += len(body)
+            if response.status >= 400:
+                errors += 1
+            elif revalidate and response.getheader('ETag'):
+                headers['If-None-Match'] = response.getheader('ETag')
+        connection.close()
+        return latencies, errors, received
+
+    counts = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, counts))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    received = sum(result[2] for result in results)
+    return {
+        'requests': requests,
+        'completed': len(latencies),
+        'errors': sum(result[1] for result in results),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'mb_per_second': received / elapsed / 1e6 if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+def serve(port: int = DEFAULT_PORT, directory: str = '.', log_requests: bool = True, compress_files: bool = True):
+    if compress_files:
+        written, fresh = precompress(directory)
+        print(f"🗜️  Precompressed sidecars: {written} written, {fresh} up to date"
+              f"{'' if brotli else ' (gzip only; pip install brotli for .br)'}")
+    with make_server(port, directory, log_requests) as httpd:
+        print(f"🚀 Serving {os.path.abspath(directory)} at http://localhost:{port}/ (Ctrl+C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Server stopped.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Threaded static server with compression, ETags and ranges")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Serve a directory")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--directory', default='.')
+    serve_parser.add_argument('--quiet', action='store_true', help="Don't log every request")
+    serve_parser.add_argument('--no-precompress', action='store_true', help="Don't refresh sidecars at startup")
+
+    compress_parser = subparsers.add_parser('precompress', help="Write .gz/.br sidecars for compressible files")
+    compress_parser.add_argument('directory', nargs='?', default='.')
+
+    load_parser = subparsers.add_parser('loadtest', help="Measure requests per second against a running server")
+    load_parser.add_argument('url')
+    load_parser.add_argument('-c', '--concurrency', type=int, default=16, help="Concurrent clients (default: 16)")
+    load_parser.add_argument('-n', '--requests', type=int, default=1000, help="Total requests (default: 1000)")
+    load_parser.add_argument('--encoding', help="Accept-Encoding to send, e.g. gzip or br")
+    load_parser.add_argument('--revalidate', action='store_true', help="Send If-None-Match with the ETag received")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.port, args.directory, not args.quiet, not args.no_precompress)
+    elif args.command == 'precompress':
+        written, fresh = precompress(args.directory)
+        print(f"✅ {written} sidecars written, {fresh} already up to date")
+    else:
+        stats = load_test(args.url, args.concurrency, args.requests, args.encoding, args.revalidate)
+        print(f"📈 {stats['completed']}/{stats['requests']} requests in {stats['seconds']:.2f}s "
+              f"with {args.concurrency} clients ({stats['errors']} errors)")
+        print(f"   {stats['requests_per_second']:.0f} requests/s, {stats['mb_per_second']:.1f} MB/s")
+        print(f"   latency p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Batch mode of the name-based tier: requests go out one per distinct given
+name through a local transport, and resuming a submitted batch neither
+resubmits it nor duplicates researchers answered locally in the meantime.
+"""
+import json
+import os
+import re
+import pytest
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+import ci_name_based_gender_analyzer as analyzer
+from batch_transport import LocalBatchTransport
+from response_cache import ResponseCache
+
+RESEARCHERS = ["Prof Alice Brown", "Dr Alice Green", "Prof Sam Lee", "Dr Kim Park"]
+ANSWERS = {"Alice": "female", "Sam": "unknown", "Kim": "female"}
+
+def answer(body):
+    name = re.search(r'Analyze the name "([^"]+)"', body['messages'][-1]['content']).group(1)
+    if name not in ANSWERS:
+        raise ValueError(f"unexpected name {name}")
+    return json.dumps({"gender": ANSWERS[name], "confidence": "medium", "reasoning": f"batch answer for {name}"})
+
+class InterruptedTransport(LocalBatchTransport):
+    """Interrupted while polling, as if the run was stopped before the batch finished"""
+
+    def poll(self, batch_id):
+        raise KeyboardInterrupt
+
+class FakeLexicon:
+    def __init__(self, decided):
+        self.decided = decided
+
+    def classify(self, name):
+        if name in self.decided:
+            return {"gender": self.decided[name], "confidence": "high", "analysis_method": "given_name_lexicon"}
+        return None
+
+@pytest.fixture
+def batch_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(analyzer, 'response_cache', ResponseCache(str(tmp_path / 'cache.db')))
+    tier1 = [{"name": name, "affiliations": ["Uni A"], "gender": "unknown", "search_notes": "none"} for name in RESEARCHERS]
+    tier1.append({"name": "Prof Known Person", "affiliations": ["Uni A"], "gender": "male"})
+    with open('tier1.json', 'w') as f:
+        json.dump({"results": tier1}, f)
+    return dict(batch_file='batch.jsonl', state_file='state.json', poll_interval=0)
+
+def load_results():
+    with open('names.json') as f:
+        return json.load(f)['results']
+
+def test_batch_submits_one_request_per_given_name(batch_run):
+    transport = LocalBatchTransport(answer)
+    analyzer.process_unknown_gender_researchers_batch('tier1.json', 'names.json', transport=transport,
+                                                      use_lexicon=False, **batch_run)
+
+    [batch] = transport._batches.values()
+    assert len(batch['requests']) == 3
+    results = {r['name']: r for r in load_results()}
+    assert sorted(results) == sorted(RESEARCHERS)
+    assert results["Dr Alice Green"]['name_based_gender'] == "female"
+    assert results["Dr Alice Green"]['name_reasoning'] == "batch answer for Alice"
+    assert results["Prof Sam Lee"]['name_based_gender'] == "unknown"
+    assert not os.path.exists('state.json') and not os.path.exists('batch.jsonl')
+
+    # Answers were added to the response cache, so a re-run submits nothing
+    os.remove('names.json')
+    rerun = LocalBatchTransport(answer)
+    analyzer.process_unknown_gender_researchers_batch('tier1.json', 'names.json', transport=rerun,
+                                                      use_lexicon=False, **batch_run)
+    assert rerun._batches == {}
+    assert sorted(r['name'] for r in load_results()) == sorted(RESEARCHERS)
+
+def test_failed_requests_are_marked_failed(batch_run):
+    def flaky(body):
+        if '"Kim"' in body['messages'][-1]['content']:
+            raise RuntimeError("server error")
+        return answer(body)
+
+    analyzer.process_unknown_gender_researchers_batch('tier1.json', 'names.json', transport=LocalBatchTransport(flaky),
+                                                      use_lexicon=False, **batch_run)
+    failed = [r['name'] for r in load_results() if analyzer.is_failed(r)]
+    assert failed == ["Dr Kim Park"]
+
+def test_resume_does_not_duplicate_locally_answered_researchers(batch_run, monkeypatch):
+    transport = InterruptedTransport(answer)
+    with pytest.raises(KeyboardInterrupt):
+        analyzer.process_unknown_gender_researchers_batch('tier1.json', 'names.json', transport=transport,
+                                                          use_lexicon=False, **batch_run)
+    with open('state.json') as f:
+        batch_id = json.load(f)['batch_id']
+
+    # Meanwhile the lexicon learned Alice and the response cache got an answer for Sam
+    monkeypatch.setattr(analyzer, 'load_or_build_lexicon', lambda: FakeLexicon({"Prof Alice Brown": "female",
+                                                                               "Dr Alice Green": "female"}))
+    sam_request = analyzer.build_name_request("Sam")
+    analyzer.response_cache.put(analyzer.make_key(**sam_request), analyzer.NAME_MODEL, '{"gender": "male"}')
+
+    resumed = LocalBatchTransport(answer)
+    resumed._batches = transport._batches
+    analyzer.process_unknown_gender_researchers_batch('tier1.json', 'names.json', transport=resumed, **batch_run)
+
+    assert list(resumed._batches) == [batch_id]
+    results = load_results()
+    assert sorted(r['name'] for r in results) == sorted(RESEARCHERS)
+    # Everything in the submitted batch is taken from the batch
+    assert all(r['analysis_method'] == 'name_pattern_only' for r in results)
+    assert {r['name']: r['name_based_gender'] for r in results}["Prof Sam Lee"] == "unknown"
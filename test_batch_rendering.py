@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Batch rendering builds one variant per (institution, min_projects,
+confidence) combination with its own crosstab, and renders every figure of
+every variant headless in a process pool.
+"""
+import os
+import pytest
+
+pytest.importorskip('seaborn')
+import visualize_gender_by_projects as visualize
+from gender_stats import GenderTable
+
+def researcher(gender, projects, institution, confidence):
+    return {"gender": gender, "total_projects": projects, "affiliations": [institution], "confidence": confidence}
+
+RESEARCHERS = (
+    [researcher("male", p, "Uni A", "high") for p in (1, 2, 3, 3, 5)]
+    + [researcher("female", p, "Uni A", "medium") for p in (1, 3, 4)]
+    + [researcher("female", p, "Uni B", "high") for p in (1, 1, 2)]
+    + [researcher("unknown", None, "Uni B", "low")]
+)
+
+def by_projects(records, min_projects=None):
+    return GenderTable.from_records(records).by_projects(min_projects)
+
+def test_build_variants():
+    table = GenderTable.from_records(RESEARCHERS)
+    variants = visualize.build_variants(table, [visualize.ALL, "Uni A", "Uni B"], [1, 3], [visualize.ALL, "high"])
+    by_slug = {slug: (label, data) for label, slug, data in variants}
+
+    # Uni B has nobody with 3+ projects, so both of its 3+ variants are skipped
+    assert len(variants) == 10
+    assert "uni-b_min3_all" not in by_slug and "uni-b_min3_high" not in by_slug
+
+    label, data = by_slug["uni-a_min3_high"]
+    assert label == "Uni A | 3+ projects | high confidence"
+    assert data == by_projects([r for r in RESEARCHERS if r['affiliations'] == ["Uni A"] and r['confidence'] == "high"], 3)
+    assert by_slug["all_min1_all"][1] == by_projects(RESEARCHERS, 1)
+
+def test_run_batch_renders_every_figure_headless(tmp_path):
+    written = visualize.run_batch(RESEARCHERS, str(tmp_path), institutions=[visualize.ALL, "Uni B"],
+                                  min_projects_values=[1, 3], processes=2, dpi=20)
+    expected = sorted(str(tmp_path / f"{slug}_{figure}.png")
+                      for slug in ("all_min1_all", "all_min3_all", "uni-b_min1_all")
+                      for figure in visualize.FIGURES)
+    assert written == expected
+    for path in written:
+        with open(path, 'rb') as f:
+            assert f.read(4) == b'\x89PNG'
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in expected)
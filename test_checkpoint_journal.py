@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Journal replay must recover every complete record, survive a torn final
+line, and compact into the standard results file.
+"""
+import json
+from checkpoint_journal import CheckpointJournal, journal_path, read_journal
+
+def record(i):
+    return {"name": f"Researcher {i}", "gender": "female", "summary": "Émilie's lab"}
+
+def test_journal_path():
+    assert journal_path('ci_search_model_cache.json') == 'ci_search_model_cache.jsonl'
+    assert journal_path('results.jsonl') == 'results.jsonl'
+
+def test_append_and_replay(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    with CheckpointJournal(path, sync_every=2) as journal:
+        for i in range(5):
+            journal.append(record(i))
+    assert CheckpointJournal(path).replay() == [record(i) for i in range(5)]
+
+def test_torn_final_line_is_skipped_and_repaired(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    with CheckpointJournal(path) as journal:
+        journal.append(record(0))
+        journal.append(record(1))
+    # Crash in the middle of an append
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record(2))[:15])
+
+    assert read_journal(path) == [record(0), record(1)]
+
+    # The next append starts on a fresh line, so nothing after the tear is lost
+    with CheckpointJournal(path) as journal:
+        journal.append(record(3))
+    assert read_journal(path) == [record(0), record(1), record(3)]
+
+def test_compact_and_remove(tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    output_file = str(tmp_path / 'results.json')
+    journal = CheckpointJournal(path)
+    results = [record(i) for i in range(3)]
+    for result in results:
+        journal.append(result)
+    journal.compact(output_file, results)
+
+    with open(output_file, encoding='utf-8') as f:
+        assert json.load(f) == {"total_analyzed": 3, "results": results}
+    assert not (tmp_path / 'results.json.tmp').exists()
+
+    journal.remove()
+    assert not (tmp_path / 'cache.jsonl').exists()
+    assert read_journal(path) == []
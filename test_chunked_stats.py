@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Chunked multi-process aggregation gives exactly the tables of the
+single-process path: the convert_results_to_csv files and the
+print_summary_statistics table.
+"""
+import json
+import os
+import random
+import pytest
+import convert_results_to_csv
+from chunked_stats import aggregate
+from columnar import write_columnar
+from convert_results_to_csv import RESULTS_CSV, STATISTICS_CSV, convert_to_csv, write_statistics_csv
+from gender_stats import print_summary_statistics
+from visualize_gender_by_projects import analyze_gender_by_projects
+
+def make_records(n=137, seed=7):
+    rng = random.Random(seed)
+    institutions = [f"University {letter}" for letter in "ABCDEFG"]
+    records = []
+    for i in range(n):
+        records.append({
+            "name": f"Prof Researcher {i}",
+            "affiliations": rng.sample(institutions, rng.randint(1, 2)),
+            "gender": rng.choice(["male", "female", "unknown", "female", "male"]),
+            "summary": f"Works on topic {i % 11}",
+            "confidence": rng.choice(["high", "medium", "low"]),
+            "research_areas": rng.sample(["Ecology", "Physics", "Law", "Medicine"], rng.randint(0, 2)),
+            "web_sources_found": rng.randint(0, 5),
+            "search_successful": rng.random() < 0.7,
+            "search_notes": "",
+            "total_projects": rng.choice([1, 1, 2, 3, 5, 8, None]),
+        })
+    return records
+
+RECORDS = make_records()
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+@pytest.fixture
+def single_process(tmp_path, monkeypatch):
+    """The CSV files and summary table of the single-process path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(convert_results_to_csv, 'OUTPUT_DIR', 'single')
+    with open('results.json', 'w') as f:
+        json.dump({"results": RECORDS}, f, indent=2)
+    convert_to_csv('results.json')
+    os.remove('results.cube.json')
+    return {
+        'rows': read(os.path.join('single', RESULTS_CSV)),
+        'statistics': read(os.path.join('single', STATISTICS_CSV)),
+        'project_data': analyze_gender_by_projects(RECORDS),
+    }
+
+def write_input(layout):
+    if layout == 'jsonl':
+        with open('results.jsonl', 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in RECORDS)
+        return 'results.jsonl'
+    if layout == 'columnar':
+        write_columnar(RECORDS, 'results.json', 'stdlib')
+    return 'results.json'
+
+@pytest.mark.parametrize('layout', ['json', 'jsonl', 'columnar'])
+def test_chunked_tables_match_the_single_process_path(single_process, layout, capsys):
+    input_file = write_input(layout)
+    stats = aggregate(input_file, chunk_size=10, processes=3, rows_file='rows.csv')
+
+    assert stats['total'] == len(RECORDS)
+    assert read('rows.csv') == single_process['rows']
+
+    write_statistics_csv('statistics.csv', stats['total'], stats['gender_counts'], stats['confidence_counts'],
+                         stats['by_institution'])
+    assert read('statistics.csv') == single_process['statistics']
+
+    assert stats['by_projects'] == single_process['project_data']
+    capsys.readouterr()
+    print_summary_statistics(single_process['project_data'])
+    expected = capsys.readouterr().out
+    print_summary_statistics(stats['by_projects'])
+    assert capsys.readouterr().out == expected
+
+def test_chunk_size_and_process_count_do_not_change_the_result(single_process):
+    input_file = write_input('jsonl')
+    baseline = aggregate(input_file, chunk_size=len(RECORDS), processes=1)
+    for chunk_size, processes in ((1, 2), (13, 4), (50, 1)):
+        assert aggregate(input_file, chunk_size=chunk_size, processes=processes) == baseline
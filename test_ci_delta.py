@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Delta classification of a new CI list against existing results.
+"""
+import json
+from ci_delta import CHANGED, NEW, REMOVED, UNCHANGED, CIDelta, affiliation_fingerprint
+from retry_policy import FAILED_FIELD
+
+EXISTING = [
+    {"name": "Prof Ann Lee", "affiliations": ["Uni A", "Uni B"], "gender": "female"},
+    {"name": "Dr Bo Chen", "affiliations": ["Uni C"], "gender": "male"},
+    {"name": "Dr Cy Diaz", "affiliations": ["Uni D"], "gender": "unknown", FAILED_FIELD: "API error"},
+    {"name": "Prof Di Eve", "affiliations": ["Uni E"], "gender": "female"},
+]
+
+def test_affiliation_fingerprint_ignores_order_case_and_whitespace():
+    assert affiliation_fingerprint([" uni b", "Uni A "]) == affiliation_fingerprint(["Uni A", "UNI B"])
+    assert affiliation_fingerprint([]) == affiliation_fingerprint(None) == ()
+
+def test_classification():
+    delta = CIDelta(EXISTING)
+    assert delta.classify({"name": "Prof Ann Lee", "affiliations": ["uni b", "Uni A"]}) == (UNCHANGED, EXISTING[0])
+    assert delta.classify({"name": "Dr Bo Chen", "affiliations": ["Uni X"]}) == (CHANGED, EXISTING[1])
+    # A failed analysis is redone even with the same affiliations
+    assert delta.classify({"name": "Dr Cy Diaz", "affiliations": ["Uni D"]}) == (CHANGED, EXISTING[2])
+    assert delta.classify({"name": "Dr Ed Fox", "affiliations": ["Uni F"]}) == (NEW, None)
+
+    assert delta.removed() == ["Prof Di Eve"]
+    assert delta.summary() == {NEW: 1, CHANGED: 2, UNCHANGED: 1, REMOVED: 1}
+
+def test_renamed_ci_keeps_its_result():
+    delta = CIDelta(EXISTING)
+    status, previous = delta.classify({"name": "Prof Bo Chen", "affiliations": ["Uni C"]})
+    assert (status, previous) == (UNCHANGED, EXISTING[1])
+    assert delta.renamed == ["Dr Bo Chen"]
+    assert "Dr Bo Chen" not in delta.removed()
+
+def test_report(tmp_path):
+    delta = CIDelta(EXISTING)
+    delta.classify({"name": "Dr Ed Fox", "affiliations": ["Uni F"]})
+    path = tmp_path / 'report.json'
+    delta.write_report(str(path))
+    report = json.loads(path.read_text())
+    assert report[NEW] == ["Dr Ed Fox"]
+    assert sorted(report[REMOVED]) == sorted(r['name'] for r in EXISTING)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+The streaming CI reader must give the same records whatever the chunk
+boundaries, and decide the file format without reading the whole file.
+"""
+import json
+import tracemalloc
+import pytest
+from ci_reader import CIS_KEY, RESULTS_KEY, _is_jsonl, iter_cis, iter_records
+
+CIS = [{"name": f"Prof Researcher {i}", "affiliations": ["University A"], "total_projects": i} for i in range(20)]
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_numbers_split_across_chunks(tmp_path, chunk_size):
+    path = tmp_path / 'results.json'
+    document = {"total_analyzed": 1.5, "score": -12.25e3, "version": 10, RESULTS_KEY: CIS}
+    path.write_text(json.dumps(document))
+    assert list(iter_records(str(path), RESULTS_KEY, chunk_size)) == CIS
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 64])
+def test_layouts(tmp_path, chunk_size):
+    layouts = {
+        'list.json': json.dumps(CIS, indent=2),
+        'wrapped.json': json.dumps({"total": 20, CIS_KEY: CIS}),
+        'lines.json': '\n'.join(json.dumps(ci) for ci in CIS) + '\n',
+    }
+    for name, text in layouts.items():
+        path = tmp_path / name
+        path.write_text(text)
+        assert list(iter_cis(str(path), chunk_size)) == CIS, name
+
+def test_format_sniffing(tmp_path):
+    jsonl = tmp_path / 'cis.json'
+    jsonl.write_text('\n'.join(json.dumps(ci) for ci in CIS) + '\n')
+    assert _is_jsonl(str(jsonl))
+
+    pretty = tmp_path / 'pretty.json'
+    pretty.write_text(json.dumps({CIS_KEY: CIS}, indent=2))
+    assert not _is_jsonl(str(pretty))
+
+    # A single record without a trailing newline is still one line of JSONL
+    one_record = tmp_path / 'one.json'
+    one_record.write_text(json.dumps(CIS[0]))
+    assert _is_jsonl(str(one_record))
+    assert list(iter_cis(str(one_record))) == CIS[:1]
+
+def test_minified_file_is_not_read_whole_to_sniff(tmp_path):
+    path = tmp_path / 'minified.json'
+    many = [dict(ci, summary='x' * 200) for ci in CIS] * 1000
+    path.write_text(json.dumps({CIS_KEY: many}, separators=(',', ':')))
+    assert path.stat().st_size > 4_000_000
+
+    tracemalloc.start()
+    try:
+        assert not _is_jsonl(str(path))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 1_000_000
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+The columnar copy only stands in for the JSON when a caller asks for
+columns it holds; whole records always come from the JSON.
+"""
+import json
+import os
+import pytest
+import columnar
+from columnar import find_columnar, load_results, write_columnar
+
+RECORDS = [
+    {"name": "Prof Ann Lee", "gender": "female", "confidence": "high", "affiliations": ["Uni A", "Uni B"],
+     "total_projects": 4, "web_sources_found": 3, "search_successful": True, "research_areas": ["Ecology"],
+     "summary": "Ecologist", "search_notes": None},
+    {"name": "Dr Sam Park", "gender": "male", "confidence": "low", "affiliations": ["Uni B"],
+     "total_projects": None, "web_sources_found": 0, "search_successful": False, "research_areas": [],
+     "summary": "", "search_notes": "No sources",
+     "name_analysis": {"method": "name_pattern_only", "confidence": "low",
+                       "disclaimer": "Speculative, based on the name only"}},
+]
+
+FORMATS = ['stdlib'] + (['parquet'] if columnar.pq is not None else [])
+
+@pytest.fixture
+def results_file(tmp_path):
+    path = str(tmp_path / 'with_projects.json')
+    with open(path, 'w') as f:
+        json.dump({"results": RECORDS}, f)
+    return path
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_whole_records_come_from_the_json(results_file, fmt):
+    without_copy = load_results(results_file)
+    write_columnar(RECORDS, results_file, fmt)
+    assert find_columnar(results_file) is not None
+    assert load_results(results_file) == without_copy == RECORDS
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_explicit_columns_are_read_from_the_copy(results_file, fmt):
+    write_columnar(RECORDS, results_file, fmt)
+    # Make the JSON unreadable without changing its fingerprint to show which file is used
+    stat = os.stat(results_file)
+    with open(results_file, 'w') as f:
+        f.write(' ' * stat.st_size)
+    os.utime(results_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert load_results(results_file, columns=['gender', 'total_projects', 'affiliations', 'name_analysis_method']) == [
+        {"gender": "female", "total_projects": 4, "affiliations": ["Uni A", "Uni B"], "name_analysis_method": None},
+        {"gender": "male", "total_projects": None, "affiliations": ["Uni B"],
+         "name_analysis_method": "name_pattern_only"},
+    ]
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_columns_outside_the_schema_or_a_stale_copy_read_the_json(results_file, fmt):
+    write_columnar(RECORDS, results_file, fmt)
+    assert load_results(results_file, columns=['gender', 'name_analysis']) == RECORDS
+
+    with open(results_file, 'w') as f:
+        json.dump({"results": RECORDS[:1]}, f)
+    assert load_results(results_file, columns=['gender']) == RECORDS[:1]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Resuming an interrupted delta run of the tier-1 analyzer must neither
+duplicate results nor lose the baseline it diffs against.
+"""
+import json
+import os
+import pytest
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+import ci_gender_analyzer_v3 as analyzer
+
+def ci(i, affiliation="University A"):
+    return {"name": f"Prof Researcher {i}", "affiliations": [affiliation]}
+
+def existing_result(i):
+    return dict(ci(i), gender="male", confidence="high", search_successful=True, web_sources_found=2)
+
+@pytest.fixture
+def delta_inputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Existing results for CIs 0-7; the new list changes 3 and 4 and adds 8 and 9
+    with open('output.json', 'w') as f:
+        json.dump({"total_analyzed": 8, "results": [existing_result(i) for i in range(8)]}, f)
+    cis = [ci(i, "University B" if i in (3, 4) else "University A") for i in range(10)]
+    with open('cis.json', 'w') as f:
+        json.dump({"unique_chief_investigators": cis}, f)
+    return tmp_path
+
+def fake_analyzer(calls, interrupt_after=None):
+    def analyze(name, affiliations):
+        if interrupt_after is not None and len(calls) >= interrupt_after:
+            raise KeyboardInterrupt
+        calls.append(name)
+        return {"gender": "female", "confidence": "high", "search_successful": True, "web_sources_found": 1}
+    return analyze
+
+@pytest.mark.parametrize('checkpoint_mode', ['journal', 'json'])
+def test_resume_after_interrupted_delta_run(delta_inputs, monkeypatch, checkpoint_mode):
+    run = dict(cache_file='cache.json', max_workers=1, checkpoint_mode=checkpoint_mode, delta=True)
+
+    first_calls = []
+    monkeypatch.setattr(analyzer, 'analyze_ci_profile_with_search_model', fake_analyzer(first_calls, interrupt_after=2))
+    with pytest.raises(KeyboardInterrupt):
+        analyzer.process_cis_with_search_model('cis.json', 'output.json', **run)
+    assert len(first_calls) == 2
+
+    # The interrupted run left the baseline in place
+    with open('output.json') as f:
+        assert len(json.load(f)['results']) == 8
+
+    resumed_calls = []
+    monkeypatch.setattr(analyzer, 'analyze_ci_profile_with_search_model', fake_analyzer(resumed_calls))
+    analyzer.process_cis_with_search_model('cis.json', 'output.json', **run)
+
+    with open('output.json') as f:
+        results = json.load(f)['results']
+    names = [r['name'] for r in results]
+    assert len(names) == len(set(names)) == 10
+    # Only CIs the first run did not record are analyzed again. CI 3 is always
+    # recorded; CI 4 may finish in the worker just after the interrupt lands
+    expected = {ci(i)['name'] for i in (3, 4, 8, 9)}
+    assert len(resumed_calls) == len(set(resumed_calls))
+    assert set(first_calls) | set(resumed_calls) == expected
+    assert ci(3)['name'] not in resumed_calls
+    by_name = {r['name']: r for r in results}
+    assert by_name[ci(3)['name']]['affiliations'] == ["University B"]
+    assert by_name[ci(0)['name']]['gender'] == "male"
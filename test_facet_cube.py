@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Facet cube counts, the unknown project-count bucket, and Key Insights for
+cubes without any researcher above the project cut-off.
+"""
+import json
+from create_web_chart import analyze_gender_by_projects, generate_html_section, key_insights
+from facet_cube import UNKNOWN_PROJECTS, FacetCube
+
+RECORDS = [
+    {"name": "A", "gender": "male", "confidence": "high", "affiliations": ["Uni A"], "total_projects": 3},
+    {"name": "B", "gender": "female", "confidence": "high", "affiliations": ["Uni A"], "total_projects": 6},
+    {"name": "C", "gender": "female", "confidence": "low", "affiliations": ["Uni B"], "total_projects": None},
+    {"name": "D", "gender": "unknown", "affiliations": [], "total_projects": 1},
+]
+
+def test_unmatched_project_counts_form_an_unknown_bucket():
+    cube = FacetCube.from_records(RECORDS)
+    assert cube.categories['projects'] == [1, 3, 6, UNKNOWN_PROJECTS]
+    assert cube.count(projects=UNKNOWN_PROJECTS) == 1
+    assert cube.count(min_projects=3) == 2
+    assert list(cube.counts_by('projects')) == [1, 3, 6, UNKNOWN_PROJECTS]
+
+    # Survives the JSON round trip
+    restored = FacetCube.from_dict(json.loads(json.dumps(cube.to_dict())))
+    assert restored.count(min_projects=3, gender='female') == 1
+    assert restored.count(projects=UNKNOWN_PROJECTS) == 1
+
+def test_key_insights_without_project_rows():
+    cube = FacetCube.from_records([r for r in RECORDS if r['total_projects'] in (1, None)])
+    project_data = analyze_gender_by_projects(cube, min_projects=3)
+    assert project_data == {}
+    assert key_insights(project_data) is None
+    assert "No researchers with 3+ projects" in generate_html_section("", project_data)
+
+def test_key_insights():
+    insights = key_insights(analyze_gender_by_projects(FacetCube.from_records(RECORDS)))
+    assert insights['lowest'] == 3 and insights['high_impact'] == 6
+    assert insights['female_pct_lowest'] == 0 and insights['female_pct_high_impact'] == 100
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+The name-based tier analyzes each distinct given name once and shares the
+answer with every researcher who has that given name.
+"""
+import os
+import pytest
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+import ci_name_based_gender_analyzer as analyzer
+from name_utils import given_name, given_name_key
+
+@pytest.mark.parametrize('name, expected', [
+    ("Prof Wei Li", "Wei"),
+    ("Hon A/Prof José García", "José"),
+    ("Dr J. Robert Smith", "Robert"),
+    ("Em/Prof Mary-Anne O'Brien", "Mary-Anne"),
+    ("Dr J Smith", None),
+    ("Prof Smith", None),
+])
+def test_given_name(name, expected):
+    assert given_name(name) == expected
+
+def test_given_name_key_folds_case_and_accents():
+    assert given_name_key("Prof José García") == given_name_key("Dr JOSE Lopez") == "jose"
+    assert given_name_key("Dr J Smith") is None
+
+def researcher(name):
+    return {"name": name, "affiliations": ["Uni A"], "gender": "unknown"}
+
+def test_group_by_given_name():
+    researchers = [researcher(name) for name in
+                   ("Prof Wei Li", "Dr wei Zhang", "Prof Renée Dubois", "Dr Renee Martin", "Dr J Smith", "Prof Anna Wei")]
+    groups = analyzer.group_by_given_name(researchers)
+    assert {label: [r['name'] for r in members] for label, members in groups.items()} == {
+        "Wei": ["Prof Wei Li", "Dr wei Zhang"],
+        "Renée": ["Prof Renée Dubois", "Dr Renee Martin"],
+        # No usable given name: analyzed on its own, without the title
+        "J Smith": ["Dr J Smith"],
+        "Anna": ["Prof Anna Wei"],
+    }
+
+def test_each_given_name_is_analyzed_once(monkeypatch):
+    calls = []
+
+    def analyze(name):
+        calls.append(name)
+        return {"gender": "female", "confidence": "medium", "reasoning": f"from {name}"}
+
+    monkeypatch.setattr(analyzer, 'analyze_name_for_gender', analyze)
+    researchers = [researcher(name) for name in ("Prof Wei Li", "Dr Anna Wei", "Dr Wei Zhang", "Prof Anna Smith")]
+    pairs = list(analyzer.iter_name_analyses(researchers))
+
+    assert calls == ["Wei", "Anna"]
+    assert sorted(r['name'] for r, _ in pairs) == sorted(r['name'] for r in researchers)
+    assert {r['name']: a['reasoning'] for r, a in pairs}["Dr Wei Zhang"] == "from Wei"
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Leased job queue: expired leases are reclaimed, and a result is only
+recorded by the worker currently holding the job's lease.
+"""
+import time
+import pytest
+from job_queue import JobQueue
+from retry_policy import FAILED_FIELD
+
+def ci(i):
+    return {"name": f"Prof Researcher {i}", "affiliations": ["University A"]}
+
+def result(i, failed=False):
+    entry = dict(ci(i), gender="female", confidence="high", search_successful=not failed)
+    if failed:
+        entry[FAILED_FIELD] = "API error"
+    return entry
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'results.db')
+
+def test_claims_do_not_overlap(store_path):
+    with JobQueue(store_path) as queue:
+        assert queue.enqueue([ci(i) for i in range(5)]) == 5
+        assert queue.enqueue([ci(0)]) == 0
+        _, first = queue.claim('a', batch_size=3)
+        _, second = queue.claim('b', batch_size=3)
+        _, third = queue.claim('c', batch_size=3)
+    assert [c['name'] for c in first + second] == [ci(i)['name'] for i in range(5)]
+    assert third == []
+
+def test_expired_lease_is_reclaimed_and_recorded_once(store_path):
+    with JobQueue(store_path, lease_seconds=0.05) as queue:
+        queue.enqueue([ci(0)])
+        stalled_token, claimed = queue.claim('stalled')
+        assert len(claimed) == 1
+        assert queue.claim('other')[1] == []
+
+        time.sleep(0.1)
+        assert queue.counts()['expired'] == 1
+        token, reclaimed = queue.claim('other')
+        assert reclaimed == claimed
+
+        # The stalled worker finishing late must not overwrite or double-record
+        assert not queue.complete(stalled_token, dict(result(0), gender="male"))
+        assert queue.complete(token, result(0))
+        assert queue.store.get_search_result(ci(0)['name'])['gender'] == "female"
+        assert queue.is_drained()
+
+def test_heartbeat_keeps_the_lease(store_path):
+    with JobQueue(store_path, lease_seconds=0.5) as queue:
+        queue.enqueue([ci(0)])
+        token, _ = queue.claim('a')
+        time.sleep(0.3)
+        assert queue.heartbeat(token) == 1
+        time.sleep(0.3)
+        assert queue.claim('b')[1] == []
+        assert queue.complete(token, result(0))
+        assert queue.heartbeat(token) == 0
+
+def test_release_returns_jobs_without_spending_an_attempt(store_path):
+    with JobQueue(store_path, max_attempts=1) as queue:
+        queue.enqueue([ci(0)])
+        token, _ = queue.claim('a')
+        assert queue.release(token) == 1
+        token, claimed = queue.claim('b')
+        assert len(claimed) == 1
+        # Still the first real attempt, so a failure is final
+        assert queue.complete(token, result(0, failed=True))
+        assert queue.counts()['failed'] == 1
+
+def test_failed_jobs_are_retried_up_to_max_attempts(store_path):
+    with JobQueue(store_path, max_attempts=2) as queue:
+        queue.enqueue([ci(0)])
+        token, _ = queue.claim('a')
+        queue.complete(token, result(0, failed=True))
+        assert queue.counts()['pending'] == 1
+        assert queue.store.get_search_result(ci(0)['name']) is None
+
+        token, _ = queue.claim('a')
+        queue.complete(token, result(0, failed=True))
+        assert queue.counts()['failed'] == 1
+        assert FAILED_FIELD in queue.store.get_search_result(ci(0)['name'])
+
+        assert queue.retry_failed() == 1
+        token, _ = queue.claim('a')
+        queue.complete(token, result(0))
+        assert queue.counts()['done'] == 1
+
+def test_enqueue_skips_cis_with_a_result(store_path):
+    with JobQueue(store_path) as queue:
+        queue.store.save_search_results([result(0), result(1, failed=True)])
+        assert queue.enqueue([ci(0), ci(1), ci(2)]) == 2
+        assert queue.counts()['done'] == 1
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+The saved given-name lexicon is reused only while the result files it was
+built from are unchanged.
+"""
+import json
+import os
+from name_lexicon import load_or_build_lexicon
+
+def write_results(path, results):
+    with open(path, 'w') as f:
+        json.dump({"results": results}, f)
+
+def tier1_result(name, gender):
+    return {"name": name, "gender": gender, "confidence": "high"}
+
+def test_lexicon_is_rebuilt_when_results_change(tmp_path):
+    tier1, tier2, lexicon_file = (str(tmp_path / name) for name in ('tier1.json', 'tier2.json', 'lexicon.json'))
+    write_results(tier1, [tier1_result(f"Prof Robin {surname}", "male") for surname in "ABC"])
+    write_results(tier2, [])
+
+    lexicon = load_or_build_lexicon(lexicon_file, tier1, tier2)
+    assert os.path.exists(lexicon_file)
+    key = next(iter(lexicon.counts))
+    assert lexicon.counts[key] == [3, 0]
+
+    # Unchanged sources: the saved file is reused as is
+    saved_mtime = os.stat(lexicon_file).st_mtime_ns
+    assert load_or_build_lexicon(lexicon_file, tier1, tier2).counts == lexicon.counts
+    assert os.stat(lexicon_file).st_mtime_ns == saved_mtime
+
+    # Hand-corrected results must reach tier 0
+    write_results(tier1, [tier1_result(f"Prof Robin {surname}", "female") for surname in "ABCD"])
+    assert load_or_build_lexicon(lexicon_file, tier1, tier2).counts[key] == [0, 4]
+    with open(lexicon_file) as f:
+        assert json.load(f)['names'][key] == [0, 4]
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Fuzzy name matching must tolerate initials and typos but never join two
+different given names, least of all the male and female forms of one.
+"""
+import pytest
+from name_matcher import NameMatcher, given_names_compatible, name_similarity
+
+@pytest.mark.parametrize('a, b', [
+    ('paul', 'paula'),
+    ('daniel', 'danielle'),
+    ('chris', 'christine'),
+    ('francis', 'frances'),
+    ('louis', 'louise'),
+    ('julian', 'juliana'),
+    ('john', 'joan'),
+])
+def test_different_given_names_are_incompatible(a, b):
+    assert not given_names_compatible(a, b)
+    assert not given_names_compatible(b, a)
+
+@pytest.mark.parametrize('a, b', [
+    ('john', 'john'),
+    ('j', 'john'),
+    ('micheal', 'michael'),
+    ('katherine', 'catherine'),
+    ('mathew', 'matthew'),
+])
+def test_initials_and_typos_are_compatible(a, b):
+    assert given_names_compatible(a, b)
+    assert given_names_compatible(b, a)
+
+@pytest.mark.parametrize('a, b', [
+    ('Prof Paul Smith', 'Dr Paula Smith'),
+    ('Daniel Nguyen', 'Danielle Nguyen'),
+    ('Chris Taylor', 'Christine Taylor'),
+])
+def test_cross_gender_names_score_zero(a, b):
+    assert name_similarity(a, b) == 0.0
+
+def test_initial_matches_full_given_name():
+    assert name_similarity('J. Smith', 'Prof John Smith') == 1.0
+    assert name_similarity('J. Smith', 'Prof Mary Smith') == 0.0
+
+def test_matcher_does_not_join_cross_gender_names():
+    matcher = NameMatcher([
+        {"name": "Paul Smith", "affiliations": ["University A"], "total_projects": 3},
+        {"name": "Danielle Nguyen", "affiliations": ["University B"], "total_projects": 5},
+    ])
+    assert matcher.match("Dr Paula Smith", ["University A"]) == (None, "none", 0.0)
+    assert matcher.match("Daniel Nguyen", ["University B"]) == (None, "none", 0.0)
+
+    record, method, _ = matcher.match("A/Prof Paul Smyth", ["University A"])
+    assert method == "fuzzy" and record["total_projects"] == 3
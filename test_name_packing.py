@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Packed name analysis: replies that are malformed, partial or reordered are
+mapped back to the requested names, and any name missing from a pack is
+re-asked on its own.
+"""
+import json
+import os
+import re
+import pytest
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+import ci_name_based_gender_analyzer as analyzer
+from ci_name_based_gender_analyzer import MAX_PACK_SIZE, choose_pack_size, parse_packed_response
+from rate_limiter import AdaptiveRateLimiter
+from response_cache import ResponseCache
+from retry_policy import CircuitBreaker
+
+NAMES = ["Alice", "Wei", "Olusegun"]
+
+def item(name, gender="female"):
+    return {"name": name, "gender": gender, "confidence": "high"}
+
+def test_reordered_reply_is_matched_by_name():
+    reply = json.dumps([item("Olusegun", "male"), item("Alice"), item("Wei", "unknown")])
+    analyses = parse_packed_response(reply, NAMES)
+    assert {name: a['gender'] for name, a in analyses.items()} == {"Alice": "female", "Wei": "unknown", "Olusegun": "male"}
+
+def test_partial_reply_leaves_missing_names_out():
+    reply = json.dumps([item("Alice"), item("Someone Else"), "not an object", {"gender": "male"}])
+    assert list(parse_packed_response(reply, NAMES)) == ["Alice"]
+
+@pytest.mark.parametrize('reply', [
+    'Here you go:\n[' + json.dumps(item("Wei")) + ']\nHope this helps',
+    json.dumps({"results": [item("Wei")]}),
+])
+def test_wrapped_reply(reply):
+    assert list(parse_packed_response(reply, NAMES)) == ["Wei"]
+
+@pytest.mark.parametrize('reply', ['', 'no JSON here', '[{"name": "Alice", ', '{"gender": "female"}', '"Alice"'])
+def test_malformed_reply_gives_nothing(reply):
+    assert parse_packed_response(reply, NAMES) == {}
+
+def test_choose_pack_size():
+    assert choose_pack_size([]) == 1
+    assert choose_pack_size(NAMES, token_budget=10) == 1
+    assert choose_pack_size(NAMES, token_budget=10 ** 6) == MAX_PACK_SIZE
+    sizes = [choose_pack_size(NAMES, token_budget) for token_budget in (1000, 2000, 4000, 8000)]
+    assert sizes == sorted(sizes) and 1 < sizes[-1] <= MAX_PACK_SIZE
+    # Longer names leave room for fewer per pack
+    assert choose_pack_size(["Maximiliana Konstantinopoulou"] * 3, 4000) <= choose_pack_size(NAMES, 4000)
+
+class FakeRawResponse:
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def parse(self):
+        message = type('Message', (), {'content': self.content})()
+        return type('Response', (), {'choices': [type('Choice', (), {'message': message})()], 'usage': None})()
+
+class FakeClient:
+    """Drops Olusegun from packed replies and answers single-name requests in full"""
+
+    def __init__(self):
+        self.requests = []
+        self.chat = self.completions = self.with_raw_response = self
+
+    def create(self, model, messages, **params):
+        prompt = messages[-1]['content']
+        single = re.search(r'Analyze the name "([^"]+)"', prompt)
+        if single:
+            self.requests.append([single.group(1)])
+            return FakeRawResponse(json.dumps({"gender": "male", "confidence": "medium", "reasoning": "single"}))
+        names = re.findall(r'^\s+- (.+)$', prompt.split('Consider:')[0], re.MULTILINE)
+        self.requests.append(names)
+        return FakeRawResponse(json.dumps([item(name) for name in reversed(names) if name != "Olusegun"]))
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(analyzer, 'client', client)
+    monkeypatch.setattr(analyzer, 'rate_limiter', AdaptiveRateLimiter(requests_per_second=1000, max_rate=1000))
+    monkeypatch.setattr(analyzer, 'circuit_breaker', CircuitBreaker())
+    monkeypatch.setattr(analyzer, 'response_cache', ResponseCache(str(tmp_path / 'cache.db')))
+    return client
+
+def test_name_missing_from_pack_is_asked_on_its_own(client):
+    analyses = analyzer.analyze_names_for_gender_packed(NAMES)
+    assert client.requests == [NAMES, ["Olusegun"]]
+    assert analyses["Alice"]['gender'] == "female" and analyses["Wei"]['gender'] == "female"
+    assert analyses["Olusegun"]['reasoning'] == "single"
+
+class RefusingClient(FakeClient):
+    """Answers packed requests with text that holds no JSON"""
+
+    def create(self, model, messages, **params):
+        if 'Names:' in messages[-1]['content']:
+            self.requests.append(None)
+            return FakeRawResponse("Sorry, I can't help with that")
+        return super().create(model, messages, **params)
+
+def test_unparseable_pack_falls_back_for_every_name(client, monkeypatch):
+    refusing = RefusingClient()
+    monkeypatch.setattr(analyzer, 'client', refusing)
+    analyses = analyzer.analyze_names_for_gender_packed(NAMES)
+    assert refusing.requests == [None] + [[name] for name in NAMES]
+    assert all(analyses[name]['reasoning'] == "single" for name in NAMES)
+    # The unusable pack reply is not cached
+    assert analyzer.response_cache.size() == len(NAMES)
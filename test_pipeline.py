@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+A dry run reports a stage as blocked only when no stage due to run would
+produce its missing input.
+"""
+import pytest
+from pipeline import Pipeline, Stage
+
+@pytest.fixture
+def stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'source.json').write_text('{}')
+    return [
+        Stage("cube", "cube.py", inputs=["source.json"], outputs=["source.cube.json"]),
+        Stage("chart", "chart.py", inputs=["source.json", "source.cube.json"], outputs=["chart.png"]),
+        Stage("orphan", "orphan.py", inputs=["never_produced.json"], outputs=["orphan.png"]),
+    ]
+
+def test_dry_run_counts_scheduled_outputs_as_inputs(stages, capsys):
+    pipeline = Pipeline(stages, state_file='.state.json')
+    assert pipeline.run(dry_run=True)
+    lines = {line.split(':')[0].split()[-1]: line for line in capsys.readouterr().out.splitlines()}
+
+    assert "would run" in lines['cube']
+    assert "would run (upstream cube would run)" in lines['chart']
+    assert "blocked, missing input never_produced.json" in lines['orphan']
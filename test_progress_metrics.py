@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Progress telemetry: the analyzers' event stream carries running totals and
+an ETA once the total is known, and TailReader follows it incrementally.
+"""
+import json
+import pytest
+import progress_metrics
+from monitor_progress import print_metrics
+from progress_metrics import MetricsStream, TailReader
+
+def events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'metrics.jsonl')
+
+def test_stream_events_and_running_totals(path):
+    stream = MetricsStream(path)
+    stream.start_run('tier1_search', total=None, done=2)
+    with stream.analyzing():
+        stream.request(0.5, retries=2, usage={'prompt_tokens': 10, 'completion_tokens': 4})
+        assert stream.in_flight == 1
+    stream.request(0.25, usage=type('Usage', (), {'prompt_tokens': 3, 'completion_tokens': 1})(), ok=False)
+    stream.record({'name': 'A', 'gender': 'female', 'search_successful': True, 'web_sources_found': 3})
+    # The ETA starts once a streamed input has been read to the end
+    stream.set_total(10)
+    stream.record({'name': 'B', 'gender': 'male', 'web_sources_found': None}, failed=True)
+    stream.end_run()
+
+    start, first, second, record_a, record_b, end = events(path)
+    assert [e['event'] for e in (start, first, second, record_a, record_b, end)] == \
+        ['start', 'request', 'request', 'record', 'record', 'end']
+    assert start['total'] is None and start['done'] == 2
+    assert first['in_flight'] == 1 and first['request_retries'] == 2 and first['request_tokens'] == 14
+    assert second['in_flight'] == 0
+    assert (second['requests'], second['retries'], second['failures']) == (2, 2, 1)
+    assert (second['prompt_tokens'], second['completion_tokens']) == (13, 5)
+
+    assert record_a['done'] == 3 and record_a['total'] is None and record_a['eta_seconds'] is None
+    assert record_b['done'] == 4 and record_b['total'] == 10 and record_b['eta_seconds'] is not None
+    assert record_b['gender_counts'] == {'female': 1, 'male': 1}
+    assert (record_b['successful_searches'], record_b['total_sources']) == (1, 3)
+    assert record_b['failed'] and end['done'] == 4 and end['total'] == 10
+
+def test_large_file_is_rotated_when_a_run_starts(path, monkeypatch):
+    monkeypatch.setattr(progress_metrics, 'MAX_METRICS_BYTES', 100)
+    with open(path, 'w') as f:
+        f.write('x' * 200)
+    stream = MetricsStream(path)
+    stream.start_run('tier2_names', total=1)
+    stream.end_run()
+    with open(path + '.1') as f:
+        assert f.read() == 'x' * 200
+    assert [e['event'] for e in events(path)] == ['start', 'end']
+
+def test_tail_reader_reads_only_appended_events(path):
+    reader = TailReader(path, latency_window=3)
+    assert reader.poll() == 0
+
+    stream = MetricsStream(path)
+    stream.start_run('tier1_search', total=4)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        stream.request(latency)
+    assert reader.poll() == 5
+    snapshot = reader.snapshot()
+    assert snapshot['latency_samples'] == 3
+    assert snapshot['p50_latency'] == 0.3 and snapshot['p95_latency'] == 0.4
+    assert snapshot['records_per_minute'] is None and not snapshot['ended']
+
+    # A half-written line waits for the rest of it
+    stream.record({'name': 'A', 'gender': 'female'})
+    stream.end_run()
+    with open(path) as f:
+        written = f.read()
+    last_line = written[written.rstrip('\n').rindex('\n') + 1:]
+    with open(path, 'w') as f:
+        f.write(written[:-len(last_line)] + last_line[:10])
+    assert reader.poll() == 1
+    assert not reader.snapshot()['ended']
+    with open(path, 'a') as f:
+        f.write(last_line[10:])
+    assert reader.poll() == 1
+    snapshot = reader.snapshot()
+    assert snapshot['ended'] and snapshot['record']['name'] == 'A'
+
+    # A new run starts its window from scratch
+    stream.start_run('tier2_names', total=None)
+    reader.poll()
+    assert reader.snapshot()['latency_samples'] == 0 and reader.snapshot()['record'] is None
+
+def test_tail_reader_starts_near_the_end(path):
+    stream = MetricsStream(path)
+    stream.start_run('tier1_search', total=1000)
+    for i in range(1000):
+        stream.request(0.01)
+    reader = TailReader(path, tail_bytes=2000)
+    count = reader.poll()
+    assert 0 < count < 50
+    assert reader.snapshot()['latest']['requests'] == 1000
+
+def test_monitor_shows_unknown_total(path, capsys):
+    stream = MetricsStream(path)
+    stream.start_run('tier1_search', total=None)
+    stream.record({'name': 'Prof Ann Lee', 'gender': 'female', 'search_successful': True, 'web_sources_found': 2})
+    reader = TailReader(path)
+    reader.poll()
+    print_metrics(reader.snapshot())
+    output = capsys.readouterr().out
+    assert "Progress: 1 researchers (total known once the input has been read)" in output
+    assert "Last Processed: Prof Ann Lee" in output
+    stream.end_run()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+AIMD tuning of the adaptive rate limiter: additive increase on healthy
+quota, at most one multiplicative cut per cooldown, and pauses after 429s.
+"""
+import time
+import pytest
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, parse_reset_duration, rate_limited_completion
+
+def quota(remaining, limit=100, reset='1s'):
+    return {
+        'x-ratelimit-remaining-requests': str(remaining),
+        'x-ratelimit-limit-requests': str(limit),
+        'x-ratelimit-reset-requests': reset,
+    }
+
+@pytest.mark.parametrize('value, seconds', [('1s', 1.0), ('6m0s', 360.0), ('20ms', 0.02), ('1h2m', 3720.0),
+                                            ('2.5', 2.5), ('', None), ('soon', None)])
+def test_parse_reset_duration(value, seconds):
+    assert parse_reset_duration(value) == seconds
+
+def test_additive_increase_up_to_max_rate():
+    limiter = AdaptiveRateLimiter(requests_per_second=1.0, increase_step=0.5, max_rate=2.2)
+    limiter.on_response(quota(90))
+    assert limiter.rate == pytest.approx(1.5)
+    limiter.on_response({})  # no quota headers: treated as headroom
+    limiter.on_response(quota(90))
+    assert limiter.rate == pytest.approx(2.2)
+
+def test_one_multiplicative_cut_per_cooldown():
+    limiter = AdaptiveRateLimiter(requests_per_second=4.0, decrease_factor=0.5, decrease_cooldown=60)
+    # A short reset window, so only the cooldown limits the cuts
+    for _ in range(5):
+        limiter.on_response(quota(5, reset='10ms'))
+    assert limiter.rate == pytest.approx(2.0)
+
+    # Once the cooldown has passed, the next low-quota response cuts again
+    limiter._last_decrease -= 61
+    limiter.on_response(quota(5, reset='10ms'))
+    assert limiter.rate == pytest.approx(1.0)
+
+def test_low_quota_caps_rate_to_what_the_window_has_left():
+    limiter = AdaptiveRateLimiter(requests_per_second=8.0, decrease_factor=0.5, min_rate=0.05)
+    limiter.on_response(quota(2, reset='10s'))
+    assert limiter.rate == pytest.approx(0.2)
+
+def test_rate_never_drops_below_min_rate():
+    limiter = AdaptiveRateLimiter(requests_per_second=0.1, min_rate=0.08, decrease_cooldown=0)
+    for _ in range(5):
+        limiter.on_rate_limited(retry_after=0)
+    assert limiter.rate == pytest.approx(0.08)
+
+def test_rate_limited_pauses_every_caller():
+    limiter = AdaptiveRateLimiter(requests_per_second=100.0, burst=5)
+    limiter.on_rate_limited(retry_after=0.2)
+    assert limiter.rate == pytest.approx(50.0)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.19
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class FakeRawResponse:
+    headers = quota(90)
+
+    def parse(self):
+        return type('Response', (), {'usage': {'prompt_tokens': 7, 'completion_tokens': 3}})()
+
+class FakeClient:
+    """Answers with the queued outcomes in turn (an exception is raised)"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.chat = self.completions = self.with_raw_response = self
+
+    def create(self, **request):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+class FakeMetrics:
+    def __init__(self):
+        self.requests = []
+
+    def request(self, latency, retries=0, usage=None, ok=True):
+        self.requests.append((retries, usage, ok))
+
+def test_completion_retries_after_429_and_reports_metrics():
+    limiter = AdaptiveRateLimiter(requests_per_second=100.0)
+    metrics = FakeMetrics()
+    client = FakeClient([RateLimitError(), FakeRawResponse()])
+    response = rate_limited_completion(client, limiter, metrics=metrics, model='m', messages=[])
+    assert response.usage == {'prompt_tokens': 7, 'completion_tokens': 3}
+    assert limiter.rate < 100.0
+    assert metrics.requests == [(1, response.usage, True)]
+
+def test_completion_gives_up_after_max_rate_limit_retries(monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'backoff_delay', lambda attempt: 0)
+    limiter = AdaptiveRateLimiter(requests_per_second=100.0, decrease_cooldown=0)
+    metrics = FakeMetrics()
+    client = FakeClient([RateLimitError() for _ in range(3)])
+    with pytest.raises(RateLimitError):
+        rate_limited_completion(client, limiter, max_rate_limit_retries=2, metrics=metrics, model='m', messages=[])
+    assert metrics.requests == [(2, None, False)]
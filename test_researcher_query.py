@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+The researcher query API: search, filters, facets, keyset pagination and
+reloads, serving whole records even when a columnar copy sits next to the
+data file.
+"""
+import json
+import os
+from urllib.parse import parse_qs
+import pytest
+import columnar
+from researcher_query import QueryError, ResearcherIndex, ResearcherQueryService, parse_query
+
+def record(i, name, gender, institution, projects, confidence="high", **extra):
+    return {"name": name, "gender": gender, "confidence": confidence, "affiliations": [institution],
+            "research_areas": ["Marine Ecology"] if i % 2 else ["Law"], "total_projects": projects,
+            "summary": f"Researcher {i}", "search_notes": None, **extra}
+
+RECORDS = [
+    record(0, "Prof Ann Lee", "female", "University of Melbourne", 5),
+    record(1, "Dr Bo Chen", "male", "University of Sydney", 2, "medium"),
+    record(2, "Prof Cara Diaz", "female", "University of Sydney", 7),
+    record(3, "Dr Dev Patel", "unknown", "University of Melbourne", None, "low"),
+    record(4, "Prof Eli Nguyen", "male", "Monash University", 3),
+    record(5, "Dr Fay Wong", "female", "Monash University", 1, "medium",
+           name_analysis={"method": "name_pattern_only", "confidence": "medium",
+                          "disclaimer": "Speculative, based on the name only", "reasoning": "Fay is usually female"}),
+]
+
+@pytest.fixture
+def index():
+    return ResearcherIndex(RECORDS)
+
+def names(response):
+    return [r['name'] for r in response['results']]
+
+def test_search_filters_and_facets(index):
+    response = index.query(q='melb')
+    assert names(response) == ["Dr Dev Patel", "Prof Ann Lee"]
+
+    response = index.query(q='marine', gender=['female'])
+    assert names(response) == ["Dr Fay Wong"]
+    # Each facet ignores its own filter
+    assert response['facets']['gender'] == {"male": 1, "female": 1, "unknown": 1}
+    assert response['facets']['confidence'] == {"high": 0, "medium": 1, "low": 0}
+
+    response = index.query(institution=['University of Sydney'], min_projects=3)
+    assert names(response) == ["Prof Cara Diaz"] and response['total'] == 1
+
+def test_cursor_pages_cover_every_match_once(index):
+    for sort, descending in (('name', False), ('projects', True), ('institution', False), ('confidence', True)):
+        seen, cursor = [], None
+        while True:
+            page = index.query(sort=sort, descending=descending, limit=4, cursor=cursor)
+            seen += names(page)
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert sorted(seen) == sorted(r['name'] for r in RECORDS), sort
+    assert names(index.query(sort='projects', descending=True, limit=2)) == ["Prof Cara Diaz", "Prof Ann Lee"]
+
+def test_invalid_queries(index):
+    with pytest.raises(QueryError):
+        parse_query(parse_qs('sort=age'))
+    with pytest.raises(QueryError):
+        parse_query(parse_qs('limit=0'))
+    with pytest.raises(QueryError):
+        parse_query(parse_qs('min_projects=many'))
+    cursor = index.query(limit=1)['next_cursor']
+    with pytest.raises(QueryError):
+        index.query(sort='projects', cursor=cursor)
+    assert parse_query(parse_qs('gender=female,male&sort=-projects'))['descending']
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = str(tmp_path / 'with_projects.json')
+    with open(path, 'w') as f:
+        json.dump({"results": RECORDS}, f)
+    return path
+
+@pytest.mark.parametrize('fmt', ['stdlib'] + (['parquet'] if columnar.pq is not None else []))
+def test_serves_whole_records_next_to_a_columnar_copy(data_file, fmt):
+    columnar.write_columnar(RECORDS, data_file, fmt)
+    assert columnar.find_columnar(data_file) is not None
+
+    service = ResearcherQueryService(data_file)
+    served = service.index.query(limit=10)['results']
+    assert sorted(served, key=lambda r: r['name']) == sorted(RECORDS, key=lambda r: r['name'])
+    fay = next(r for r in served if r['name'] == "Dr Fay Wong")
+    assert fay['name_analysis']['disclaimer'] == "Speculative, based on the name only"
+
+def test_reloads_when_the_file_changes(data_file):
+    service = ResearcherQueryService(data_file, check_interval=0)
+    assert len(service.current()) == len(RECORDS)
+    with open(data_file, 'w') as f:
+        json.dump({"results": RECORDS[:2]}, f)
+    os.utime(data_file, ns=(1, 1))
+    assert len(service.current()) == 2
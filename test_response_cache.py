@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Response cache keys are stable across formatting-only prompt changes, hits
+and misses are counted, and old or least recently used entries are evicted.
+"""
+import os
+import time
+from response_cache import ResponseCache, make_key
+
+MESSAGES = [{"role": "system", "content": "Return JSON."},
+            {"role": "user", "content": "Analyze the name:\n    Jane Smith\n"}]
+
+def test_key_ignores_whitespace_and_parameter_order():
+    key = make_key("gpt-4o-mini", MESSAGES, max_tokens=150, temperature=0.1)
+    reindented = [dict(m, content="  " + m['content'].replace("\n    ", "\n")) for m in MESSAGES]
+    assert make_key("gpt-4o-mini", reindented, temperature=0.1, max_tokens=150) == key
+
+    assert make_key("gpt-4o", MESSAGES, max_tokens=150, temperature=0.1) != key
+    assert make_key("gpt-4o-mini", MESSAGES, max_tokens=200, temperature=0.1) != key
+    other_name = [MESSAGES[0], {"role": "user", "content": "Analyze the name: John Smith"}]
+    assert make_key("gpt-4o-mini", other_name, max_tokens=150, temperature=0.1) != key
+
+def test_hits_misses_and_persistence(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(path)
+    # Nothing is created until the cache is used
+    assert cache.size() == 0 and not os.path.exists(path)
+
+    key = make_key("gpt-4o-mini", MESSAGES)
+    assert cache.get(key) is None
+    cache.put(key, "gpt-4o-mini", '{"gender": "female"}')
+    assert cache.get(key) == '{"gender": "female"}'
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 50.0}
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.get(key) == '{"gender": "female"}'
+    reopened.close()
+
+def test_expired_entries_are_misses_and_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_age_days=1)
+    cache.put("old", "m", "stale")
+    cache.conn.execute("UPDATE responses SET created_at = ?", (time.time() - 2 * 86400,))
+    assert cache.get("old") is None
+    assert cache.evict() == 1
+    assert cache.size() == 0
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_entries=2, evict_every=3)
+    cache.put("a", "m", "1")
+    cache.put("b", "m", "2")
+    time.sleep(0.01)
+    assert cache.get("a") == "1"
+    # The third put triggers eviction of the least recently used entry
+    cache.put("c", "m", "3")
+    assert cache.size() == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Store mode picks up edits to the project counts file instead of keeping the
+counts from the first import.
+"""
+import json
+import os
+from add_project_counts import add_project_counts_from_store
+from result_store import ResultStore
+
+def write_counts(path, counts):
+    cis = [{"name": name, "affiliations": ["Uni A"], "total_projects": total} for name, total in counts.items()]
+    with open(path, 'w') as f:
+        json.dump({"unique_chief_investigators": cis}, f)
+
+def merged_counts(output_file):
+    with open(output_file) as f:
+        return {r['name']: r['total_projects'] for r in json.load(f)['results']}
+
+def test_project_counts_are_reimported_when_the_file_changes(tmp_path):
+    store_path, counts_file, output_file = (str(tmp_path / name) for name in
+                                            ('results.db', 'counts.json', 'with_projects.json'))
+    with ResultStore(store_path) as store:
+        store.save_search_results([{"name": name, "affiliations": ["Uni A"], "gender": "female"}
+                                   for name in ("Prof Ann Lee", "Dr Bo Chen")])
+
+    write_counts(counts_file, {"Prof Ann Lee": 3, "Dr Bo Chen": 5})
+    add_project_counts_from_store(counts_file, store_path, output_file)
+    assert merged_counts(output_file) == {"Prof Ann Lee": 3, "Dr Bo Chen": 5}
+
+    with ResultStore(store_path) as store:
+        assert store.import_is_current('project_counts', counts_file)
+
+    # A corrected file replaces the imported counts, including dropped entries
+    write_counts(counts_file, {"Prof Ann Lee": 4})
+    os.utime(counts_file, ns=(1, 1))
+    add_project_counts_from_store(counts_file, store_path, output_file)
+    assert merged_counts(output_file) == {"Prof Ann Lee": 4, "Dr Bo Chen": None}
+
+    # Without the file, the counts already in the store are used
+    os.remove(counts_file)
+    add_project_counts_from_store(counts_file, store_path, output_file)
+    assert merged_counts(output_file) == {"Prof Ann Lee": 4, "Dr Bo Chen": None}
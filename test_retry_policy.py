@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker transitions (closed -> open -> half-open -> closed or open
+again) and jittered backoff bounds, with an injected clock and random source.
+"""
+import random
+import threading
+import pytest
+from retry_policy import CircuitBreaker, backoff_delay, is_transient_error
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class MaxRandom:
+    """Always draws the upper bound"""
+
+    def uniform(self, low, high):
+        return high
+
+def call_in_thread(breaker):
+    thread = threading.Thread(target=breaker.before_call, daemon=True)
+    thread.start()
+    return thread
+
+def test_breaker_transitions():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=30, clock=clock)
+
+    # Failures below the threshold, or interrupted by a success, keep it closed
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened_at == 1000.0 and breaker.trips == 1
+
+    # Callers are held back until the cooldown has passed
+    clock.advance(29.95)
+    waiting = call_in_thread(breaker)
+    waiting.join(0.2)
+    assert waiting.is_alive()
+    clock.advance(0.1)
+    waiting.join(2)
+    assert not waiting.is_alive()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # A failed probe re-opens it for another cooldown
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened_at == clock.now and breaker.trips == 2
+
+    # Half-open lets exactly one probe through; the rest wait for its outcome
+    clock.advance(30)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    waiting = call_in_thread(breaker)
+    waiting.join(0.2)
+    assert waiting.is_alive()
+
+    breaker.record_success()
+    waiting.join(2)
+    assert not waiting.is_alive()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.consecutive_failures == 0
+
+@pytest.mark.parametrize('attempt, cap', [(0, 1.0), (1, 2.0), (3, 8.0), (6, 60.0), (20, 60.0)])
+def test_backoff_bounds(attempt, cap):
+    assert backoff_delay(attempt, rng=MaxRandom()) == cap
+    rng = random.Random(attempt)
+    delays = [backoff_delay(attempt, rng=rng) for _ in range(200)]
+    assert all(0 <= delay <= cap for delay in delays)
+    # Full jitter spreads retries over the whole window
+    assert min(delays) < cap * 0.1 and max(delays) > cap * 0.9
+
+def test_backoff_respects_base_and_max_delay():
+    assert backoff_delay(2, base_delay=0.5, max_delay=1.5, rng=MaxRandom()) == 1.5
+    assert backoff_delay(1, base_delay=0.5, max_delay=10, rng=MaxRandom()) == 1.0
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+@pytest.mark.parametrize('error, transient', [
+    (ConnectionError(), True), (TimeoutError(), True), (StatusError(503), True), (StatusError(408), True),
+    (StatusError(400), False), (StatusError(429), False), (ValueError(), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) == transient
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Search tokens: the same names must tokenize identically in
+build_search_index.py and in visualizer.html, or page searches miss
+index terms.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import pytest
+from build_search_index import STOPWORDS, record_tokens, tokenize
+
+# Shared vector: accents, combining marks outside U+0300-U+036F, compatibility forms and non-Latin scripts
+NAMES = [
+    "Prof José García",
+    "Dr Zoë Saldaña",
+    "A/Prof Nguyễn Thị Minh Khai",
+    "Dr Björk Guðmundsdóttir",
+    "Prof Søren Kierkegaard",
+    "Dr Đorđe Marković",
+    "Prof İlker Straße",
+    "Dr Ｆｕｌｌｗｉｄｔｈ Name",
+    "Prof ﬁnn O'Brien-Smith",
+    "Dr Mari͏a Lopez",        # combining grapheme joiner (class 0)
+    "Dr Ka⃝te Jones",         # enclosing circle
+    "Dr Zu҉lu Mbeki",         # enclosing millions sign
+    "Prof Ana᷄is Nin",        # combining supplement block
+    "Dr Ba︠rt Simpson",       # combining half mark
+    "Dr अनिल Kumar",
+    "Prof Anne-Marie of the University of Sydney",
+]
+
+EXPECTED = {
+    "Prof José García": ["prof", "jose", "garcia"],
+    "A/Prof Nguyễn Thị Minh Khai": ["prof", "nguyen", "thi", "minh", "khai"],
+    "Dr Mari͏a Lopez": ["dr", "maria", "lopez"],
+    "Dr Ka⃝te Jones": ["dr", "kate", "jones"],
+    "Dr Ｆｕｌｌｗｉｄｔｈ Name": ["dr", "fullwidth", "name"],
+    "Prof Anne-Marie of the University of Sydney": ["prof", "anne", "marie", "university", "sydney"],
+}
+
+def js_tokenize(names):
+    """Run tokenize() from visualizer.html under node"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'visualizer.html'), encoding='utf-8') as f:
+        html = f.read()
+    function = re.search(r'^( *)function tokenize\(text\) \{.*?^\1\}', html, re.MULTILINE | re.DOTALL).group(0)
+    script = (f"const searchIndex = {{stopwords: new Set({json.dumps(sorted(STOPWORDS))})}};\n{function}\n"
+              f"console.log(JSON.stringify({json.dumps(names)}.map(tokenize)));")
+    output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def test_python_tokens():
+    for name, tokens in EXPECTED.items():
+        assert tokenize(name) == tokens, name
+    assert record_tokens({"name": "Dr Ka⃝te Jones", "affiliations": ["Université de Montréal"]}) == {
+        "dr", "kate", "jones", "universite", "de", "montreal"}
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+def test_page_and_index_tokenize_alike():
+    assert js_tokenize(NAMES) == [tokenize(name) for name in NAMES]
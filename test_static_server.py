@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+The threaded static server: precompressed sidecars, ETag revalidation, byte
+ranges and cache headers, over kept-alive HTTP/1.1 connections.
+"""
+import gzip
+import http.client
+import os
+import socket
+import threading
+import pytest
+from static_server import StaticHandler, accepted_encodings, etag_matches, make_server, parse_range, precompress
+
+DATA = b''.join(b'{"name": "Prof Researcher %d", "gender": "female"}\n' % i for i in range(200))
+
+class RecordingHandler(StaticHandler):
+    nodelay = []
+
+    def setup(self):
+        super().setup()
+        self.nodelay.append(self.connection.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / 'data.json').write_bytes(DATA)
+    (tmp_path / 'shard-000.0123456789abcdef.json').write_bytes(b'[]')
+    assert precompress(str(tmp_path))[0] >= 1
+    httpd = make_server(0, str(tmp_path), log_requests=False, host='127.0.0.1', handler_class=RecordingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+def get(connection, path, **headers):
+    connection.request('GET', path, headers={name.replace('_', '-'): value for name, value in headers.items()})
+    response = connection.getresponse()
+    return response, response.read()
+
+def test_compression_etags_and_keep_alive(server):
+    directory, port = server
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+
+    response, body = get(connection, '/data.json')
+    assert response.status == 200 and body == DATA
+    assert response.getheader('Content-Encoding') is None
+    assert response.getheader('Cache-Control') == 'no-cache'
+    etag = response.getheader('ETag')
+
+    response, body = get(connection, '/data.json', Accept_Encoding='br;q=0, gzip')
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert response.getheader('Vary') == 'Accept-Encoding'
+    assert gzip.decompress(body) == DATA
+    assert response.getheader('ETag') != etag
+
+    # Revalidation on the same kept-alive connection
+    response, body = get(connection, '/data.json', If_None_Match=etag)
+    assert response.status == 304 and body == b''
+    response, body = get(connection, '/data.json', If_None_Match='"other"')
+    assert response.status == 200 and body == DATA
+
+    # A sidecar older than its file is ignored
+    os.utime(directory / 'data.json.gz', ns=(1, 1))
+    response, body = get(connection, '/data.json', Accept_Encoding='gzip')
+    assert response.getheader('Content-Encoding') is None and body == DATA
+
+    response, _ = get(connection, '/shard-000.0123456789abcdef.json')
+    assert response.getheader('Cache-Control') == 'public, max-age=31536000, immutable'
+    response, _ = get(connection, '/missing.json')
+    assert response.status == 404
+    connection.close()
+
+    # Every connection has Nagle's algorithm disabled
+    assert RecordingHandler.nodelay and all(RecordingHandler.nodelay)
+
+def test_byte_ranges(server):
+    _, port = server
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+
+    response, body = get(connection, '/data.json', Range='bytes=10-19')
+    assert response.status == 206 and body == DATA[10:20]
+    assert response.getheader('Content-Range') == f'bytes 10-19/{len(DATA)}'
+
+    response, body = get(connection, '/data.json', Range='bytes=-5')
+    assert response.status == 206 and body == DATA[-5:]
+
+    response, body = get(connection, '/data.json', Range=f'bytes={len(DATA)}-')
+    assert response.status == 416
+    assert response.getheader('Content-Range') == f'bytes */{len(DATA)}'
+
+    # If-Range with an outdated ETag gets the whole file
+    response, body = get(connection, '/data.json', Range='bytes=0-9', If_Range='"outdated"')
+    assert response.status == 200 and body == DATA
+    connection.close()
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', (0, 99)), ('bytes=50-', (50, 99)), ('bytes=-10', (90, 99)), ('bytes=90-500', (90, 99)),
+    ('bytes=0-1,5-6', None), ('items=0-1', None), ('bytes=-', None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+@pytest.mark.parametrize('header', ['bytes=100-', 'bytes=20-10', 'bytes=-0'])
+def test_unsatisfiable_range(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+def test_header_parsing():
+    assert accepted_encodings('gzip, br;q=0.5, identity;q=0') == {'gzip': 1.0, 'br': 0.5, 'identity': 0.0}
+    assert etag_matches('W/"abc", "def"', '"abc"') and etag_matches('*', '"abc"')
+    assert not etag_matches('"def"', '"abc"') and not etag_matches(None, '"abc"')
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+The web chart is rendered once per distinct project data and style; later
+runs reuse the cached PNG and leave gender_chart_web.png untouched.
+"""
+import base64
+import os
+import pytest
+import create_web_chart
+from create_web_chart import chart_cache_key, create_web_optimized_chart, prune_chart_cache, WEB_CHART_STYLE
+
+PROJECT_DATA = {3: {'male': 10, 'female': 4, 'unknown': 1}, 5: {'male': 3, 'female': 2, 'unknown': 0}}
+
+@pytest.fixture
+def renders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    def render(project_data, style):
+        calls.append((project_data, style))
+        return f"png for {sorted(project_data)} {style['dpi']}".encode()
+
+    monkeypatch.setattr(create_web_chart, 'render_chart_png', render)
+    return calls
+
+def test_cache_key():
+    style = dict(WEB_CHART_STYLE)
+    key = chart_cache_key(PROJECT_DATA, style)
+    assert chart_cache_key(dict(reversed(list(PROJECT_DATA.items()))), dict(style)) == key
+    assert chart_cache_key({**PROJECT_DATA, 6: {'male': 1, 'female': 0, 'unknown': 0}}, style) != key
+    assert chart_cache_key(PROJECT_DATA, dict(style, dpi=300)) != key
+
+def test_unchanged_chart_is_rendered_once(renders):
+    first = create_web_optimized_chart(PROJECT_DATA, output_file='chart.png', cache_dir='cache')
+    with open('chart.png', 'rb') as f:
+        assert base64.b64decode(first) == f.read()
+    os.utime('chart.png', ns=(1, 1))
+
+    again = create_web_optimized_chart(PROJECT_DATA, output_file='chart.png', cache_dir='cache')
+    assert again == first
+    assert len(renders) == 1
+    # Same bytes: the file is not rewritten, so downstream up-to-date checks hold
+    assert os.stat('chart.png').st_mtime_ns == 1
+
+    create_web_optimized_chart(PROJECT_DATA, style={'dpi': 300}, output_file='chart.png', cache_dir='cache')
+    assert len(renders) == 2
+    assert os.stat('chart.png').st_mtime_ns != 1
+
+def test_without_cache_dir_every_call_renders(renders):
+    create_web_optimized_chart(PROJECT_DATA, output_file='chart.png', cache_dir=None)
+    create_web_optimized_chart(PROJECT_DATA, output_file='chart.png', cache_dir=None)
+    assert len(renders) == 2
+
+def test_prune_keeps_most_recently_used(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"{i}.png"
+        path.write_bytes(b"png")
+        os.utime(path, (i, i))
+    prune_chart_cache(str(tmp_path), keep=2)
+    assert sorted(os.listdir(tmp_path)) == ["3.png", "4.png"]
+
+def test_real_render_is_a_png(tmp_path, monkeypatch):
+    pytest.importorskip('matplotlib')
+    monkeypatch.setenv('MPLBACKEND', 'Agg')
+    monkeypatch.chdir(tmp_path)
+    encoded = create_web_optimized_chart(PROJECT_DATA, output_file='chart.png', cache_dir='cache')
+    assert base64.b64decode(encoded).startswith(b'\x89PNG')
+    assert len(os.listdir('cache')) == 1
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+The tier-1 worker pool keeps a bounded window of CIs in flight, yields every
+CI exactly once and keeps the other results when one worker fails.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+import ci_gender_analyzer_v3 as analyzer
+from rate_limiter import AdaptiveRateLimiter
+from response_cache import ResponseCache
+from retry_policy import CircuitBreaker, is_failed
+
+CIS = [{"name": f"Prof Researcher {i}", "affiliations": ["University A"]} for i in range(20)]
+
+class FakeRawResponse:
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def parse(self):
+        message = type('Message', (), {'content': self.content})()
+        return type('Response', (), {'choices': [type('Choice', (), {'message': message})()], 'usage': None})()
+
+class FakeClient:
+    """Answers after a short delay, tracking how many requests overlap; fails for the names in fail"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+        self._lock = threading.Lock()
+        self.chat = self.completions = self.with_raw_response = self
+
+    def create(self, model, messages, **params):
+        name = next(ci['name'] for ci in CIS if f'"{ci["name"]}"' in messages[-1]['content'])
+        with self._lock:
+            self.calls.append(name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.01)
+            if name in self.fail:
+                raise ValueError("bad request")
+            return FakeRawResponse(json.dumps({"gender": "female", "confidence": "high", "search_successful": True}))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    client = FakeClient(fail={CIS[5]['name']})
+    monkeypatch.setattr(analyzer, 'client', client)
+    monkeypatch.setattr(analyzer, 'rate_limiter', AdaptiveRateLimiter(requests_per_second=1000, max_rate=1000, burst=100))
+    monkeypatch.setattr(analyzer, 'circuit_breaker', CircuitBreaker())
+    monkeypatch.setattr(analyzer, 'response_cache', ResponseCache(str(tmp_path / 'cache.db')))
+    return client
+
+def test_bounded_window_yields_every_ci_once(client):
+    drawn = []
+
+    def source():
+        for ci in CIS:
+            drawn.append(ci['name'])
+            yield ci
+
+    yielded = []
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        for entry in analyzer.iter_completed_analyses(source(), executor, max_pending=4):
+            # CIs are drawn from the input only while the window has room
+            assert len(drawn) - len(yielded) <= 4
+            yielded.append(entry)
+
+    assert sorted(r['name'] for r in yielded) == sorted(ci['name'] for ci in CIS)
+    assert sorted(client.calls) == sorted(ci['name'] for ci in CIS)
+    assert client.max_in_flight <= 3
+
+    failed = [r['name'] for r in yielded if is_failed(r)]
+    assert failed == [CIS[5]['name']]
+    assert all(r['gender'] == 'female' for r in yielded if not is_failed(r))
+
+def test_a_raising_worker_does_not_lose_other_results(client, monkeypatch):
+    def analyze(name, affiliations):
+        if name == CIS[2]['name']:
+            raise RuntimeError("worker crashed")
+        return {"gender": "male", "confidence": "high", "search_successful": True}
+
+    monkeypatch.setattr(analyzer, 'analyze_ci_profile_with_search_model', analyze)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(analyzer.iter_completed_analyses(iter(CIS), executor, max_pending=8))
+
+    assert len(results) == len(CIS)
+    by_name = {r['name']: r for r in results}
+    assert is_failed(by_name[CIS[2]['name']])
+    assert sum(1 for r in results if r['gender'] == 'male') == len(CIS) - 1
@@ -2,34 +2,37 @@
 """
 Script to visualize gender ratios by project count using bar charts.
 Creates visualizations showing how gender distribution varies with number of projects.
+
+--batch renders headless (Agg backend, no plt.show()) and fans every figure
+out to a process pool, for any combination of primary institution,
+min_projects threshold and confidence filter:
+    python visualize_gender_by_projects.py --batch --top-institutions 20 --min-projects 1 3 5 --confidence all high
 """
 
-import json
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
 import matplotlib.pyplot as plt
 import numpy as np
-from collections import defaultdict
+from columnar import load_results
+from gender_stats import GenderTable, print_summary_statistics
 import seaborn as sns
 
-def load_data(filename):
-    """Load the gender data with project counts"""
-    with open(filename, 'r') as f:
-        data = json.load(f)
-    return data['results']
+BATCH_OUTPUT_DIR = 'reports'
+ALL = 'all'
+
+def load_data(filename, columns=('gender', 'total_projects')):
+    """Load the gender data with project counts (from the columnar copy when it is up to date)"""
+    return load_results(filename, columns=list(columns))
 
 def analyze_gender_by_projects(researchers):
     """Analyze gender distribution by project count"""
-    
-    # Group by project count
-    project_gender_data = defaultdict(lambda: {'male': 0, 'female': 0, 'unknown': 0})
-    
-    for researcher in researchers:
-        project_count = researcher.get('total_projects', 0)
-        gender = researcher.get('gender', 'unknown')
-        project_gender_data[project_count][gender] += 1
-    
-    return dict(project_gender_data)
+    return GenderTable.from_records(researchers).by_projects()
 
-def create_gender_ratio_chart(project_data, output_file='gender_by_projects.png'):
+def create_gender_ratio_chart(project_data, output_file='gender_by_projects.png', title=None, dpi=300):
     """Create bar chart showing gender ratios by project count"""
     
     # Prepare data for plotting
@@ -96,12 +99,14 @@ def create_gender_ratio_chart(project_data, output_file='gender_by_projects.png'
             ax2.text(i, male_p + female_p/2, f'{female_p:.0f}%', ha='center', va='center', 
                     fontweight='bold', color='white', fontsize=8)
     
+    if title:
+        fig.suptitle(title, fontweight='bold')
     plt.tight_layout()
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
     print(f"Chart saved as: {output_file}")
     return fig
 
-def create_detailed_analysis_chart(project_data, output_file='gender_analysis_detailed.png'):
+def create_detailed_analysis_chart(project_data, output_file='gender_analysis_detailed.png', title=None, dpi=300):
     """Create more detailed analysis charts"""
     
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
@@ -169,56 +174,121 @@ def create_detailed_analysis_chart(project_data, output_file='gender_analysis_de
         ax4.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(gender_ratios)*0.02, 
                 f'{ratio:.2f}', ha='center', va='bottom', fontweight='bold', fontsize=8)
     
+    if title:
+        fig.suptitle(title, fontweight='bold')
     plt.tight_layout()
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
     print(f"Detailed analysis saved as: {output_file}")
     return fig
 
-def print_summary_statistics(project_data):
-    """Print summary statistics"""
-    
-    print("\n" + "="*80)
-    print("GENDER DISTRIBUTION BY PROJECT COUNT - SUMMARY")
-    print("="*80)
-    
-    project_counts = sorted(project_data.keys())
-    
-    print(f"{'Projects':<10} {'Total':<8} {'Male':<6} {'Female':<8} {'Unknown':<8} {'Male%':<7} {'Female%':<9} {'F/M Ratio':<8}")
-    print("-" * 80)
+FIGURES = {
+    'gender_by_projects': create_gender_ratio_chart,
+    'detailed': create_detailed_analysis_chart,
+}
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-')
+
+def build_variants(table, institutions, min_projects_values, confidences):
+    """(label, slug, project_data) for every requested combination that has researchers"""
+    variants = []
+    for institution, min_projects, confidence in product(institutions, min_projects_values, confidences):
+        mask = table.mask_for(institution=None if institution == ALL else institution,
+                              confidence=None if confidence == ALL else confidence)
+        project_data = table.select(mask).by_projects(min_projects)
+        label = (f"{'All institutions' if institution == ALL else institution} | {min_projects}+ projects | "
+                 f"{'all confidence levels' if confidence == ALL else confidence + ' confidence'}")
+        slug = f"{slugify(institution)}_min{min_projects}_{slugify(confidence)}"
+        if project_data:
+            variants.append((label, slug, project_data))
+        else:
+            print(f"⏭️  No researchers for {label}; skipped")
+    return variants
+
+def _init_headless_worker():
+    plt.switch_backend('Agg')
+
+def render_figure(figure, project_data, output_file, title, dpi):
+    """Render one figure in a worker process and return (output_file, seconds)"""
+    start = time.time()
+    fig = FIGURES[figure](project_data, output_file, title=title, dpi=dpi)
+    plt.close(fig)
+    return output_file, time.time() - start
+
+def run_batch(researchers, output_dir=BATCH_OUTPUT_DIR, institutions=(ALL,), min_projects_values=(1,),
+              confidences=(ALL,), processes=None, dpi=300):
+    """Render both figures for every variant headless, in parallel; returns the files written"""
+    plt.switch_backend('Agg')
+    os.makedirs(output_dir, exist_ok=True)
+    
+    table = GenderTable.from_records(researchers)
+    variants = build_variants(table, institutions, min_projects_values, confidences)
+    tasks = [(figure, project_data, os.path.join(output_dir, f"{slug}_{figure}.png"), label, dpi)
+             for label, slug, project_data in variants for figure in FIGURES]
+    print(f"🎨 Rendering {len(tasks)} figures for {len(variants)} variants into {output_dir}/...")
+    
+    processes = processes or os.cpu_count() or 1
+    start = time.time()
+    written = []
+    render_time = 0.0
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_headless_worker) as executor:
+        futures = [executor.submit(render_figure, *task) for task in tasks]
+        for future in as_completed(futures):
+            output_file, elapsed = future.result()
+            written.append(output_file)
+            render_time += elapsed
+    
+    wall_time = time.time() - start
+    print(f"✅ Rendered {len(written)} figures in {wall_time:.1f}s "
+          f"({render_time:.1f}s of rendering across {processes} processes)")
+    return sorted(written)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Visualize gender ratios by project count")
+    parser.add_argument('--batch', action='store_true',
+                        help="Render headless into --output-dir, one figure per process, for every variant")
+    parser.add_argument('--institution', nargs='+', default=[], metavar='NAME',
+                        help="Primary institutions to render (batch mode)")
+    parser.add_argument('--top-institutions', type=int, default=0, metavar='K',
+                        help="Also render the K largest primary institutions (batch mode)")
+    parser.add_argument('--min-projects', type=int, nargs='+', default=[1], metavar='N',
+                        help="Only researchers with at least N projects; one variant per value (default: 1)")
+    parser.add_argument('--confidence', nargs='+', default=[ALL], metavar='LEVEL',
+                        help="Confidence filters, e.g. all high medium (default: all)")
+    parser.add_argument('--output-dir', default=BATCH_OUTPUT_DIR, help=f"Batch output directory (default: {BATCH_OUTPUT_DIR})")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--dpi', type=int, default=300, help="Figure resolution (default: 300)")
+    return parser.parse_args()
+
+def batch_main(args):
+    print("📊 Loading data from ci_gender_with_projects.json...")
+    try:
+        researchers = load_data('ci_gender_with_projects.json',
+                                columns=('gender', 'total_projects', 'confidence', 'affiliations'))
+    except FileNotFoundError:
+        print("❌ Error: ci_gender_with_projects.json not found!")
+        print("Please run add_project_counts.py first to create this file.")
+        return
+    print(f"✅ Loaded {len(researchers)} researchers")
     
-    total_researchers = 0
-    total_male = 0
-    total_female = 0
-    total_unknown = 0
+    institutions = list(args.institution)
+    if args.top_institutions:
+        largest = GenderTable.from_records(researchers).institution_totals()
+        institutions += [name for name in list(largest)[:args.top_institutions] if name not in institutions]
+    # Every batch includes the all-institutions view
+    institutions = [ALL] + [name for name in institutions if name != ALL]
     
-    for pc in project_counts:
-        male = project_data[pc]['male']
-        female = project_data[pc]['female']
-        unknown = project_data[pc]['unknown']
-        total = male + female + unknown
-        
-        male_pct = (male / total * 100) if total > 0 else 0
-        female_pct = (female / total * 100) if total > 0 else 0
-        ratio = (female / male) if male > 0 else 0
-        
-        print(f"{pc:<10} {total:<8} {male:<6} {female:<8} {unknown:<8} {male_pct:<6.1f}% {female_pct:<8.1f}% {ratio:<8.2f}")
-        
-        total_researchers += total
-        total_male += male
-        total_female += female
-        total_unknown += unknown
-    
-    print("-" * 80)
-    overall_male_pct = (total_male / total_researchers * 100) if total_researchers > 0 else 0
-    overall_female_pct = (total_female / total_researchers * 100) if total_researchers > 0 else 0
-    overall_ratio = (total_female / total_male) if total_male > 0 else 0
-    
-    print(f"{'TOTAL':<10} {total_researchers:<8} {total_male:<6} {total_female:<8} {total_unknown:<8} {overall_male_pct:<6.1f}% {overall_female_pct:<8.1f}% {overall_ratio:<8.2f}")
-    print("="*80)
+    run_batch(researchers, args.output_dir, institutions, args.min_projects, args.confidence,
+              args.processes, args.dpi)
 
 def main():
     """Main function"""
     
+    args = parse_args()
+    if args.batch:
+        batch_main(args)
+        return
+    
     # Load data
     print("📊 Loading data from ci_gender_with_projects.json...")
     try: